@@ -1,7 +1,12 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routers import docs, questions, memory
-from core.config import APP_TITLE, APP_VERSION, APP_DESCRIPTION
+from core.config import APP_TITLE, APP_VERSION, APP_DESCRIPTION, TRACE_HEADER
+from core.tracing import TraceMiddleware, render_metrics
+from utils.logger import get_logger, shutdown_logging
+
+logger = get_logger(__name__)
 
 # Create FastAPI app
 app = FastAPI(
@@ -14,24 +19,38 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Reload existing Weaviate data on application startup."""
+    from core.concurrency import install_default_executor
+    install_default_executor()
+
     try:
         from routers.docs import reload_existing_data
         
-        print("🔄 Starting up - attempting to reload existing Weaviate data...")
+        logger.info("🔄 Starting up - attempting to reload existing Weaviate data...")
         success = await reload_existing_data()
         
         if success:
             # Import state after reload to get updated values
             import core.state as state
-            print(f"✅ Startup complete - existing data reloaded successfully")
-            print(f"📊 Loaded {state.documents_count} documents from Weaviate")
-            print(f"🔗 RAG system ready: {state.rag_chain is not None}")
+            logger.info(f"✅ Startup complete - existing data reloaded successfully")
+            logger.info(f"📊 Loaded {state.documents_count} documents from Weaviate")
+            logger.info(f"🔗 RAG system ready: {state.rag_chain is not None}")
         else:
-            print("ℹ️ No existing data found - ready for new documentation upload")
+            logger.info("ℹ️ No existing data found - ready for new documentation upload")
             
     except Exception as e:
-        print(f"⚠️ Startup warning - could not reload existing data: {e}")
-        print("ℹ️ This is normal for first-time startup")
+        logger.warning(f"⚠️ Startup warning - could not reload existing data: {e}")
+        logger.info("ℹ️ This is normal for first-time startup")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the worker pool, pooled client connections and the session store, then flush queued logs."""
+    from core.concurrency import shutdown_executor
+    from core.clients import close_clients
+    from core.memory import close_memory_store
+    shutdown_executor()
+    await close_clients()
+    close_memory_store()
+    shutdown_logging()
 
 # Add CORS middleware
 app.add_middleware(
@@ -40,8 +59,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TRACE_HEADER, "Server-Timing"],
 )
 
+# Per-request trace id, stage timings and latency histograms (outermost, so it times everything)
+app.add_middleware(TraceMiddleware)
+
 # Register routers
 app.include_router(docs.router)
 app.include_router(questions.router)
@@ -57,9 +80,11 @@ async def root():
         "endpoints": {
             "POST /docs/process": "Process API documentation",
             "POST /questions/ask": "Ask questions about the documentation",
+            "POST /questions/ask/stream": "Ask questions with the answer streamed over SSE",
             "POST /memory/clear": "Clear conversation memory",
             "GET /docs/status": "Get documentation status",
-            "GET /memory/health": "Get memory system health"
+            "GET /memory/health": "Get memory system health",
+            "GET /metrics": "Prometheus metrics (stage latency, request latency, LLM tokens)"
         }
     }
 
@@ -69,6 +94,12 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "RAG API Documentation Assistant is running"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Stage and request latency histograms plus LLM token counters, in Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
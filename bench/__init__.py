@@ -0,0 +1 @@
+# Benchmarks for RAG API Documentation Assistant
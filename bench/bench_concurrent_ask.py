@@ -0,0 +1,113 @@
+"""
+Concurrency benchmark for POST /questions/ask.
+
+Runs N concurrent questions against the real FastAPI app with a stubbed
+vector store (blocking, like the Weaviate v3 client) and a stubbed LLM
+(async, like ChatAnthropic.ainvoke), while probing GET /health. Reports
+p50/p99 latency so event-loop stalls show up in the /health numbers.
+
+Usage:
+    python -m bench.bench_concurrent_ask --requests 50 --llm-ms 800 --search-ms 120
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain.schema.runnable import RunnableLambda
+
+import core.state as state
+from app_new import app
+from core.concurrency import install_default_executor
+
+class _BlockingRetriever(BaseRetriever):
+    """Sync-only retriever that sleeps like a Weaviate round trip."""
+    search_ms: float = 100.0
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        time.sleep(self.search_ms / 1000.0)
+        return [Document(page_content=f"Stub chunk for: {query}", metadata={"section_path": "Stub"})]
+
+def _build_stub_chain(retriever: _BlockingRetriever, llm_ms: float):
+    async def _map_inputs(x: Dict[str, Any]) -> Dict[str, Any]:
+        docs = await retriever.ainvoke(x.get("input", ""))
+        return {"context": docs, "input": x.get("input", ""), "chat_history": x.get("chat_history", "")}
+
+    async def _fake_llm(x: Dict[str, Any]) -> str:
+        await asyncio.sleep(llm_ms / 1000.0)
+        return json.dumps({"answer": f"Stub answer ({len(x['context'])} docs)", "description": ""})
+
+    return RunnableLambda(_map_inputs) | RunnableLambda(_fake_llm)
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50), 2),
+        "p99_ms": round(_percentile(values, 99), 2),
+        "mean_ms": round(statistics.fmean(values), 2) if values else 0.0,
+        "max_ms": round(max(values), 2) if values else 0.0,
+    }
+
+async def _timed(client: httpx.AsyncClient, method: str, url: str, **kwargs: Any) -> float:
+    start = time.perf_counter()
+    resp = await client.request(method, url, **kwargs)
+    resp.raise_for_status()
+    return (time.perf_counter() - start) * 1000.0
+
+async def run(requests: int, llm_ms: float, search_ms: float, health_probes: int) -> Dict[str, Any]:
+    install_default_executor()
+    retriever = _BlockingRetriever(search_ms=search_ms)
+    state.retriever = retriever
+    state.rag_chain = _build_stub_chain(retriever, llm_ms)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+        ask_tasks = [
+            _timed(client, "POST", "/questions/ask", json={"question": f"How do I authenticate? #{i}", "session_id": f"bench-{i}"})
+            for i in range(requests)
+        ]
+
+        async def _probe_health() -> List[float]:
+            out = []
+            for _ in range(health_probes):
+                out.append(await _timed(client, "GET", "/health"))
+                await asyncio.sleep(0.01)
+            return out
+
+        wall_start = time.perf_counter()
+        results = await asyncio.gather(asyncio.gather(*ask_tasks), _probe_health())
+        wall_ms = (time.perf_counter() - wall_start) * 1000.0
+
+    ask_latencies, health_latencies = results
+    return {
+        "config": {"requests": requests, "llm_ms": llm_ms, "search_ms": search_ms},
+        "wall_ms": round(wall_ms, 2),
+        "ask": _summary(list(ask_latencies)),
+        "health": _summary(health_latencies),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Concurrent /questions/ask calls")
+    parser.add_argument("--llm-ms", type=float, default=800.0, help="Stub LLM latency in ms")
+    parser.add_argument("--search-ms", type=float, default=120.0, help="Stub vector search latency in ms")
+    parser.add_argument("--health-probes", type=int, default=20, help="Number of /health probes during the load")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.requests, args.llm_ms, args.search_ms, args.health_probes)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Microbenchmark for utils.parser.extract_endpoints_from_text.
+
+Compares the single-pass extractor against the previous three-scan version
+(kept below as the reference) on the bundled docs/*.md files, concatenated
+and repeated to scale the corpus up, plus a synthetic endpoint-dense document
+(one section and cURL fence per endpoint). Fails if the outputs differ.
+
+Usage:
+    python -m bench.bench_endpoint_extraction --scale 1 5 20 --synthetic 500 2000 --repeat 3
+"""
+
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.parser import extract_endpoints_from_text
+
+DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+
+def _legacy_curl_spans(text: str) -> List[Tuple[int, int]]:
+    spans = []
+    for m in re.finditer(r"```[a-zA-Z]*\n([\s\S]*?)```", text):
+        if re.search(r"(?im)^\s*curl\b", m.group(1)):
+            spans.append((m.start(), m.end()))
+    return spans
+
+def _legacy_pos_in_spans(pos: int, spans: List[Tuple[int, int]]) -> bool:
+    for start, end in spans:
+        if start <= pos <= end:
+            return True
+    return False
+
+def legacy_extract_endpoints_from_text(text: str) -> List[Dict[str, Any]]:
+    """The original implementation: three full scans plus three regexes per match window."""
+    endpoints: List[Dict[str, Any]] = []
+    curl_spans = _legacy_curl_spans(text)
+    patterns = [
+        (re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+(/[^\s`#]+)"), ""),
+        (re.compile(r"(?is)\*\*\s*(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s*\*\*\s*`\s*(/[^`\s]+)\s*`"), ""),
+        (re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+([a-zA-Z][^\s`#]+/[^\s`#]+)"), "/"),
+    ]
+    for pattern, prefix in patterns:
+        for match in pattern.finditer(text):
+            if _legacy_pos_in_spans(match.start(), curl_spans):
+                continue
+            window = text[max(0, match.start() - 300):min(len(text), match.end() + 500)]
+            has_curl = bool(re.search(r"(?im)```\s*curl|^\s*curl\s", window))
+            auth = "bearer" if re.search(r"(?i)authorization|bearer|oauth|api[-_ ]?key", window) else "unknown"
+            summary_match = re.search(r"(?m)^[#]{1,3}\s+.*$", window)
+            summary = summary_match.group(0).lstrip('# ').strip() if summary_match else ""
+            endpoints.append({
+                "http_method": match.group(1).upper(),
+                "endpoint": prefix + match.group(2).strip(),
+                "summary": summary,
+                "auth": auth,
+                "has_curl": has_curl,
+            })
+    return endpoints
+
+def load_corpus(scale: int) -> str:
+    base = "\n\n".join(p.read_text(encoding="utf-8") for p in sorted(DOCS_DIR.glob("*.md")))
+    return "\n\n".join([base] * scale)
+
+def synthetic_corpus(endpoints: int) -> str:
+    methods = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+    sections = []
+    for i in range(endpoints):
+        method = methods[i % len(methods)]
+        sections.append(
+            f"### Resource {i}\n\n**{method}** `/v1/resources/{i}/items`\n\n"
+            f"Send `Authorization: Bearer <token>`. Also reachable as {method} v1/resources/{i}.\n\n"
+            f"```bash\ncurl -X {method} https://api.example.com/v1/resources/{i}/items\n```\n"
+        )
+    return "\n".join(sections)
+
+def _best_ms(func: Callable[[str], Any], text: str, repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, (time.perf_counter() - start) * 1000.0)
+    return best, result
+
+def run(scales: List[int], synthetic: List[int], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    corpora = [(f"docs x{scale}", load_corpus(scale)) for scale in scales]
+    corpora += [(f"synthetic {n} endpoints", synthetic_corpus(n)) for n in synthetic]
+    for name, text in corpora:
+        legacy_ms, legacy_out = _best_ms(legacy_extract_endpoints_from_text, text, repeat)
+        new_ms, new_out = _best_ms(extract_endpoints_from_text, text, repeat)
+        if new_out != legacy_out:
+            raise SystemExit(f"Output mismatch for {name}: {len(new_out)} vs {len(legacy_out)} endpoints")
+        rows.append({
+            "corpus": name,
+            "chars": len(text),
+            "endpoints": len(new_out),
+            "legacy_ms": round(legacy_ms, 2),
+            "single_pass_ms": round(new_ms, 2),
+            "speedup": round(legacy_ms / new_ms, 2) if new_ms else None,
+        })
+    return rows
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 5, 20], help="Times the docs corpus is repeated")
+    parser.add_argument("--synthetic", type=int, nargs="*", default=[500, 2000], help="Endpoint counts for the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.scale, args.synthetic, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Per-request logging overhead benchmark.
+
+Replays the logging done by one /questions/ask request N times, in two styles:
+  - print: the previous pattern, ~30 synchronous print() calls including the
+    full chain result, answer and structured_content (multi-KB strings) on a
+    line-buffered stdout, plus INFO lines through a synchronous FileHandler
+  - queue: the current pattern through utils.logger (QueueHandler feeding a
+    background QueueListener), with payloads passed as lazy %-args so they are
+    only rendered at DEBUG
+and reports per-request p50/p95/mean overhead in microseconds. Output for the
+print style goes to a temporary file standing in for the container log pipe.
+
+Usage:
+    python -m bench.bench_logging --requests 2000 --payload-kb 6
+    python -m bench.bench_logging --requests 2000 --level DEBUG
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+def _payloads(payload_kb: int) -> Dict[str, Any]:
+    answer = json.dumps({
+        "answer": "Use POST /file-storage to upload a file.",
+        "description": "x" * (payload_kb * 1024),
+        "endpoints": [{"method": "POST", "url": "/file-storage"}],
+        "links": [],
+    })
+    return {"answer": answer, "result": {"input": "How do I upload?", "answer": answer}, "structured": json.loads(answer)}
+
+def _print_style(p: Dict[str, Any], file_logger: logging.Logger) -> None:
+    answer = p["answer"]
+    print("DEBUG: session_id: bench, chat_history count: 0=================")
+    print("DEBUG: No chat history available")
+    print("DEBUG: About to invoke rag_chain...")
+    print(f"DEBUG: rag_chain.ainvoke returned: {p['result']}=================")
+    print(f"DEBUG: answer: {answer}=================")
+    print(f"DEBUG: answer type: {type(answer)}")
+    print(f"DEBUG: answer length: {len(answer)}")
+    print(f"DEBUG: answer starts with '{{': {answer.strip().startswith('{')}")
+    print(f"DEBUG: answer ends with '}}': {answer.strip().endswith('}')}")
+    print(f"DEBUG: Memory updated - User message: How do I upload?..., AI message: {answer[:50]}...")
+    print("DEBUG: Memory count after update: 2")
+    print(f"DEBUG: Initial JSON parse successful: {type(p['structured'])}")
+    print("DEBUG: No answer field or not a string, using parsed structure")
+    print(f"DEBUG: Final structured_content: {p['structured']}")
+    file_logger.info("Context packed: 16 chunks -> 6 blocks, 2900/3000 tokens")
+    file_logger.info("trace=bench POST /questions/ask 200 812.0ms")
+
+def _queue_style(p: Dict[str, Any], logger: logging.Logger) -> None:
+    answer = p["answer"]
+    logger.debug("session_id: %s, chat_history count: %d", "bench", 0)
+    logger.debug("No chat history available")
+    logger.debug("About to invoke rag_chain...")
+    logger.debug("rag_chain.ainvoke returned: %s", p["result"])
+    logger.debug("Answer (%d chars): %s", len(answer), answer)
+    logger.debug("Memory updated for session %s, %d messages", "bench", 2)
+    logger.debug("Initial JSON parse successful: %s", dict)
+    logger.debug("No answer field or not a string, using parsed structure")
+    logger.debug("Final structured_content: %s", p["structured"])
+    logger.info("Context packed: 16 chunks -> 6 blocks, 2900/3000 tokens")
+    logger.info("trace=bench POST /questions/ask 200 812.0ms")
+
+def _measure(fn: Callable[[], None], requests: int) -> List[float]:
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "p50_us": round(ordered[len(ordered) // 2], 1),
+        "p95_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "mean_us": round(statistics.fmean(ordered), 1),
+    }
+
+def run(requests: int, payload_kb: int, level: str) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="rag-bench-log-")
+    os.environ["LOG_FILE"] = os.path.join(workdir, "queued.log")
+    os.environ["LOG_LEVEL"] = level
+    payloads = _payloads(payload_kb)
+
+    # Previous setup: prints to a line-buffered stream plus a synchronous file handler
+    file_logger = logging.getLogger("bench.sync")
+    file_logger.propagate = False
+    file_logger.setLevel(logging.INFO)
+    file_logger.addHandler(logging.FileHandler(os.path.join(workdir, "sync.log")))
+    real_stdout = sys.stdout
+    with open(os.path.join(workdir, "stdout.log"), "w", buffering=1) as fake_stdout:
+        sys.stdout = fake_stdout
+        try:
+            baseline = _measure(lambda: _print_style(payloads, file_logger), requests)
+
+            # Imported here so the console handler also binds to the temporary stdout
+            from utils.logger import get_logger, shutdown_logging, get_dropped_records
+            queued_logger = get_logger("bench.queue")
+            queued = _measure(lambda: _queue_style(payloads, queued_logger), requests)
+            drain_start = time.perf_counter()
+            shutdown_logging()
+            drain_ms = (time.perf_counter() - drain_start) * 1000.0
+        finally:
+            sys.stdout = real_stdout
+
+    base, new = _summary(baseline), _summary(queued)
+    return {
+        "config": {"requests": requests, "payload_kb": payload_kb, "level": level},
+        "print": base,
+        "queue": new,
+        "saved_per_request_us": round(base["mean_us"] - new["mean_us"], 1),
+        "queue_drain_ms": round(drain_ms, 2),
+        "dropped_records": get_dropped_records(),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Simulated requests per style")
+    parser.add_argument("--payload-kb", type=int, default=6, help="Size of the answer payload logged per request")
+    parser.add_argument("--level", default="INFO", help="LOG_LEVEL for the queued logger (DEBUG renders payloads)")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.payload_kb, args.level), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Session-memory store benchmark.
+
+Creates N sessions (100k by default), writes a short exchange into each, and
+reports RSS growth, per-operation latency and the store's eviction counters.
+With --baseline it runs the previous unbounded dict of ConversationBufferMemory
+objects for comparison.
+
+Usage:
+    python -m bench.bench_memory_store --sessions 100000 --messages 4 --max-sessions 10000
+    python -m bench.bench_memory_store --sessions 100000 --baseline
+"""
+
+import argparse
+import gc
+import json
+import resource
+import time
+from typing import Any, Dict
+
+def _rss_mb() -> float:
+    """Current RSS in MB (falls back to peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+def _run_store(sessions: int, messages: int, max_sessions: int, max_messages: int) -> Dict[str, Any]:
+    from core.memory import SessionMemoryStore
+
+    store = SessionMemoryStore(max_sessions=max_sessions, ttl_seconds=0, max_messages=max_messages)
+    gc.collect()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    for i in range(sessions):
+        memory = store.get_or_create(f"session-{i}")
+        for j in range(messages // 2):
+            memory.chat_memory.add_user_message(f"question {j} from session {i}")
+            memory.chat_memory.add_ai_message(f"answer {j} for session {i}")
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return {
+        "impl": "SessionMemoryStore",
+        "elapsed_s": round(elapsed, 3),
+        "us_per_session": round(elapsed / sessions * 1e6, 2),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(_rss_mb(), 1),
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "store": store.stats(),
+    }
+
+def _run_baseline(sessions: int, messages: int) -> Dict[str, Any]:
+    from langchain.memory import ConversationBufferMemory
+
+    session_memories: Dict[str, Any] = {}
+    gc.collect()
+    rss_before = _rss_mb()
+    start = time.perf_counter()
+    for i in range(sessions):
+        memory = session_memories.setdefault(f"session-{i}", ConversationBufferMemory(memory_key="chat_history", return_messages=True))
+        for j in range(messages // 2):
+            memory.chat_memory.add_user_message(f"question {j} from session {i}")
+            memory.chat_memory.add_ai_message(f"answer {j} for session {i}")
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    return {
+        "impl": "dict[ConversationBufferMemory] (unbounded)",
+        "elapsed_s": round(elapsed, 3),
+        "us_per_session": round(elapsed / sessions * 1e6, 2),
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(_rss_mb(), 1),
+        "rss_growth_mb": round(_rss_mb() - rss_before, 1),
+        "sessions": len(session_memories),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000, help="Distinct session ids to create")
+    parser.add_argument("--messages", type=int, default=4, help="Messages written per session")
+    parser.add_argument("--max-sessions", type=int, default=10_000, help="Store session cap")
+    parser.add_argument("--max-messages", type=int, default=20, help="Ring-buffer size per session")
+    parser.add_argument("--baseline", action="store_true", help="Run the previous unbounded dict instead")
+    args = parser.parse_args()
+    if args.baseline:
+        result = _run_baseline(args.sessions, args.messages)
+    else:
+        result = _run_store(args.sessions, args.messages, args.max_sessions, args.max_messages)
+    result["config"] = vars(args)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+OpenAPI ingest benchmark.
+
+Generates a large synthetic OpenAPI 3 spec (CRUD operations over many
+resources, shared component schemas, parameters and responses via $ref, and a
+self-referencing schema), then times the two ways /docs/process can ingest it:
+  - markdown path: pure-Python yaml.safe_load (the old attempt_parse_openapi),
+    the regex endpoint scan, header-section chunking and LLM endpoint recall
+    (a fake LLM with fixed latency behind the real map-reduce, cache cleared)
+  - openapi path: load_spec (CSafeLoader, or json for the JSON variant) and
+    build_openapi_documents, one document per operation
+and reports per-stage milliseconds, documents to embed, LLM calls and the
+ingest time saved as JSON.
+
+Usage:
+    python -m bench.bench_openapi --resources 150 --llm-ms 1500
+    python -m bench.bench_openapi --resources 400 --llm-ms 0 --out bench_openapi.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def build_spec(resources: int) -> Dict[str, Any]:
+    """Synthetic spec with 5 operations per resource and heavy $ref reuse."""
+    schemas: Dict[str, Any] = {
+        "Error": {"type": "object", "required": ["code", "message"], "properties": {"code": {"type": "integer"}, "message": {"type": "string"}}},
+        "Audit": {"type": "object", "properties": {"createdAt": {"type": "string", "format": "date-time"}, "createdBy": {"type": "string"}}},
+        "Category": {"type": "object", "properties": {"id": {"type": "string"}, "parent": {"$ref": "#/components/schemas/Category"}}},
+    }
+    paths: Dict[str, Any] = {}
+    for i in range(resources):
+        name = f"Resource{i}"
+        schemas[name] = {
+            "type": "object",
+            "required": ["id", "name"],
+            "description": f"A {name} managed by the service. " * 3,
+            "properties": {
+                "id": {"type": "string", "format": "uuid"},
+                "name": {"type": "string"},
+                "status": {"type": "string", "enum": ["active", "archived", "deleted"]},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "audit": {"$ref": "#/components/schemas/Audit"},
+                "category": {"$ref": "#/components/schemas/Category"},
+                "attributes": {"type": "object", "additionalProperties": {"type": "string"}},
+            },
+        }
+        ref = {"$ref": f"#/components/schemas/{name}"}
+        collection, item = f"/v1/resource-{i}", f"/v1/resource-{i}/{{id}}"
+        errors = {"400": {"$ref": "#/components/responses/BadRequest"}, "404": {"$ref": "#/components/responses/NotFound"}}
+        paths[collection] = {
+            "get": {"operationId": f"list{name}", "summary": f"List {name} items", "tags": [name],
+                    "parameters": [{"$ref": "#/components/parameters/Page"}, {"$ref": "#/components/parameters/Limit"}],
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": {"type": "array", "items": ref}}}}, **errors}},
+            "post": {"operationId": f"create{name}", "summary": f"Create a {name}", "tags": [name],
+                     "requestBody": {"required": True, "content": {"application/json": {"schema": ref, "example": {"name": "example"}}}},
+                     "responses": {"201": {"description": "Created", "content": {"application/json": {"schema": ref}}}, **errors}},
+        }
+        paths[item] = {
+            "parameters": [{"$ref": "#/components/parameters/Id"}],
+            "get": {"operationId": f"get{name}", "summary": f"Get a {name}", "tags": [name],
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": ref}}}, **errors}},
+            "put": {"operationId": f"update{name}", "summary": f"Update a {name}", "tags": [name],
+                    "requestBody": {"content": {"application/json": {"schema": ref}}},
+                    "responses": {"200": {"description": "OK", "content": {"application/json": {"schema": ref}}}, **errors}},
+            "delete": {"operationId": f"delete{name}", "summary": f"Delete a {name}", "tags": [name],
+                       "responses": {"204": {"description": "Deleted"}, **errors}},
+        }
+    return {
+        "openapi": "3.0.3",
+        "info": {"title": "Synthetic Bench API", "version": "1.0.0", "description": "Generated for bench_openapi."},
+        "servers": [{"url": "https://api.example.com"}],
+        "security": [{"ApiKey": []}],
+        "paths": paths,
+        "components": {
+            "schemas": schemas,
+            "securitySchemes": {"ApiKey": {"type": "apiKey", "in": "header", "name": "x-api-key"}},
+            "parameters": {
+                "Id": {"name": "id", "in": "path", "required": True, "schema": {"type": "string", "format": "uuid"}},
+                "Page": {"name": "page", "in": "query", "schema": {"type": "integer"}},
+                "Limit": {"name": "limit", "in": "query", "schema": {"type": "integer", "maximum": 100}},
+            },
+            "responses": {
+                "BadRequest": {"description": "Invalid request", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+                "NotFound": {"description": "Not found", "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Error"}}}},
+            },
+        },
+    }
+
+class _FakeLLM:
+    """Fixed-latency stand-in for the recall chat model (answers with no endpoints)."""
+
+    def __init__(self, llm_ms: float):
+        self.llm_ms = llm_ms
+        self.calls = 0
+
+    def invoke(self, prompt: str) -> Any:
+        self.calls += 1
+        time.sleep(self.llm_ms / 1000.0)
+        return json.dumps({"endpoints": []})
+
+def _timed(timings: Dict[str, float], name: str, fn: Any, *args: Any) -> Any:
+    start = time.perf_counter()
+    result = fn(*args)
+    timings[name] = round((time.perf_counter() - start) * 1000.0, 1)
+    return result
+
+def run(resources: int, llm_ms: float) -> Dict[str, Any]:
+    import yaml
+    from core.openapi import load_spec, build_openapi_documents
+    from core.endpoint_recall import recall_endpoints, recall_cache
+    from routers.docs import _split_major_sections, _chunk_document
+    from utils.parser import extract_endpoints_from_text
+
+    spec = build_spec(resources)
+    yaml_text = yaml.safe_dump(spec, sort_keys=False)
+    json_text = json.dumps(spec)
+
+    markdown: Dict[str, float] = {}
+    _timed(markdown, "yaml_safe_load", yaml.safe_load, yaml_text)
+    _timed(markdown, "regex_endpoints", extract_endpoints_from_text, yaml_text)
+    sections = _timed(markdown, "split_sections", _split_major_sections, yaml_text)
+    chunks = _timed(markdown, "chunking", _chunk_document, yaml_text, "bench", sections)
+    recall_cache.clear()
+    llm = _FakeLLM(llm_ms)
+    _timed(markdown, "llm_recall", recall_endpoints, sections, 4, llm)
+    markdown["total"] = round(sum(markdown.values()), 1)
+
+    openapi: Dict[str, float] = {}
+    loaded = _timed(openapi, "load_spec", load_spec, yaml_text)
+    built = _timed(openapi, "build_documents", build_openapi_documents, loaded[0], "bench")
+    openapi["total"] = round(openapi["load_spec"] + openapi["build_documents"], 1)
+
+    openapi_json: Dict[str, float] = {}
+    loaded_json = _timed(openapi_json, "load_spec", load_spec, json_text)
+    _timed(openapi_json, "build_documents", build_openapi_documents, loaded_json[0], "bench")
+    openapi_json["total"] = round(openapi_json["load_spec"] + openapi_json["build_documents"], 1)
+
+    return {
+        "config": {"resources": resources, "operations": built["stats"]["operations"], "yaml_chars": len(yaml_text), "llm_ms": llm_ms},
+        "markdown_path_ms": markdown,
+        "openapi_yaml_ms": {**openapi, "loader": loaded[1]},
+        "openapi_json_ms": openapi_json,
+        "documents_to_embed": {"markdown_path": len(chunks), "openapi_path": len(built["documents"])},
+        "llm_calls": {"markdown_path": llm.calls, "openapi_path": 0},
+        "ref_resolution": {"lookups": built["stats"]["ref_lookups"], "memoized": built["stats"]["ref_cache_hits"]},
+        "saved_ms": round(markdown["total"] - openapi["total"], 1),
+        "speedup": round(markdown["total"] / openapi["total"], 1) if openapi["total"] else None,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=150, help="Resources in the synthetic spec (5 operations each)")
+    parser.add_argument("--llm-ms", type=float, default=1500.0, help="Fake LLM latency per recall call in ms")
+    parser.add_argument("--out", default="", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    report = run(args.resources, args.llm_ms)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
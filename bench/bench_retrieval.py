@@ -0,0 +1,295 @@
+"""
+Offline retrieval and latency benchmark.
+
+Ingests the bundled docs/api_doc.md, docs/template.md and docs/templateservice.md
+(as one document) through the real POST /docs/process job, on the local vector
+backend with a deterministic hashing embedding model and a fake LLM with fixed
+latency, so no Weaviate, Cohere or Anthropic is needed. It then replays the
+golden question set (bench/golden_questions.json) through POST /questions/ask.
+What gets scored is recorded from the real chain while it serves each request
+(keyed by the request's trace id): the candidates it retrieved and the blocks
+it packed for the LLM. The report has:
+  - recall@k and MRR of the candidates, and recall of the packed context, where
+    a question is answered by the chunks containing any of its "expected" strings
+  - context tokens before and after packing
+  - per-stage p50/p95 latency from each response's Server-Timing header (the
+    tracing spans: intent, answer_cache, endpoint_index, embed, search, bm25,
+    pack, ...; "llm" only with a real chat model), end-to-end /questions/ask,
+    and the ingest job's timings
+Questions answered from the endpoint catalog never reach the chain; they are
+counted separately. Output is JSON so runs can be diffed; a baseline lives in
+bench/baseline_retrieval.json.
+
+Usage:
+    python -m bench.bench_retrieval --llm-ms 300 --repeat 3 --out bench/baseline_retrieval.json
+    python -m bench.bench_retrieval --k 1 3 5 8 --dim 512
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = ["docs/api_doc.md", "docs/template.md", "docs/templateservice.md"]
+GOLDEN_PATH = os.path.join(ROOT, "bench", "golden_questions.json")
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+class HashingEmbeddings:
+    """Deterministic local embeddings: signed feature hashing of words and word bigrams."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def _vector(self, text: str) -> List[float]:
+        words = _WORD.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vec = [0.0] * self.dim
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            slot = int.from_bytes(digest[:4], "little") % self.dim
+            vec[slot] += 1.0 if digest[4] & 1 else -1.0
+        vec = [math.copysign(math.log1p(abs(v)), v) for v in vec]
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+    async def aembed(self, texts: List[str], *, input_type: Optional[str] = None) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+def _fake_llm(llm_ms: float) -> Any:
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    async def _answer(prompt: Any) -> AIMessage:
+        await asyncio.sleep(llm_ms / 1000.0)
+        return AIMessage(content=json.dumps({"answer": "Benchmark answer", "description": "", "endpoints": [], "links": []}))
+
+    return RunnableLambda(_answer)
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": round(_percentile(values, 50), 3),
+        "p95_ms": round(_percentile(values, 95), 3),
+        "mean_ms": round(statistics.fmean(values), 3) if values else 0.0,
+    }
+
+def _first_relevant_rank(docs: List[Any], expected: List[str]) -> Optional[int]:
+    needles = [e.lower() for e in expected]
+    for rank, doc in enumerate(docs, start=1):
+        text = doc.page_content.lower()
+        if any(n in text for n in needles):
+            return rank
+    return None
+
+async def _ingest(client: Any, title: str) -> Dict[str, Any]:
+    content = "\n\n".join(open(os.path.join(ROOT, path), "r", encoding="utf-8").read() for path in CORPUS)
+    resp = await client.post("/docs/process", json={"title": title, "content": content})
+    resp.raise_for_status()
+    job_id = resp.json()["data"]["job_id"]
+    while True:
+        job = (await client.get(f"/docs/jobs/{job_id}")).json()
+        if job["status"] in ("completed", "failed"):
+            break
+        await asyncio.sleep(0.05)
+    if job["status"] != "completed":
+        raise RuntimeError(f"Ingest failed: {job['error']}")
+    return job
+
+class ChainRecorder:
+    """Wraps the chain's retrieval and packing steps and records their output per trace id."""
+
+    def __init__(self):
+        self.calls: Dict[str, Dict[str, Any]] = {}
+
+    def _entry(self) -> Dict[str, Any]:
+        from core.tracing import current_trace_id
+        return self.calls.setdefault(current_trace_id() or "", {})
+
+    def install(self) -> None:
+        import core.chains as chains
+        from core.context_packer import context_packer
+
+        endpoint_index_documents, retrieve, pack = chains._endpoint_index_documents, chains._retrieve, context_packer.pack
+
+        def _endpoint_index_documents(user_input: str) -> List[Any]:
+            docs = endpoint_index_documents(user_input)
+            if docs:
+                self._entry().update(retrieved=docs, source="endpoint_index")
+            return docs
+
+        async def _retrieve(user_input: str) -> List[Any]:
+            docs = await retrieve(user_input)
+            self._entry().update(retrieved=docs, source="retrieval")
+            return docs
+
+        def _pack(docs: List[Any]) -> Any:
+            packed, stats = pack(docs)
+            self._entry().update(packed=packed, pack_stats=stats)
+            return packed, stats
+
+        chains._endpoint_index_documents = _endpoint_index_documents
+        chains._retrieve = _retrieve
+        context_packer.pack = _pack
+
+def _server_timing(header: str) -> Dict[str, float]:
+    """Stage -> milliseconds from a Server-Timing header ("embed;dur=1.2, search;dur=3.4")."""
+    stages: Dict[str, float] = {}
+    for part in header.split(","):
+        name, _, rest = part.strip().partition(";dur=")
+        if name and rest:
+            stages[name] = stages.get(name, 0.0) + float(rest)
+    return stages
+
+async def run(llm_ms: float, repeat: int, ks: List[int], dim: int) -> Dict[str, Any]:
+    import httpx
+    import core.chains as chains
+    import routers.docs as docs_router
+    from app_new import app
+    from core.answer_cache import answer_cache
+    from core.config import TRACE_HEADER
+
+    embeddings = HashingEmbeddings(dim)
+    docs_router.get_query_embeddings = lambda *args, **kwargs: embeddings
+    llm = _fake_llm(llm_ms)
+    chains.create_llm = lambda *args, **kwargs: llm
+    recorder = ChainRecorder()
+    recorder.install()
+
+    with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+
+    stages: Dict[str, List[float]] = {}
+    ask_ms: List[float] = []
+    ranks: List[Optional[int]] = []
+    packed_hits = 0
+    misses: List[str] = []
+    catalog_answered: List[str] = []
+    sources: Dict[str, int] = {}
+    candidate_tokens: List[int] = []
+    packed_tokens: List[int] = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600.0) as client:
+        job = await _ingest(client, "bench-corpus")
+
+        for round_no in range(repeat):
+            answer_cache.invalidate()
+            for i, item in enumerate(golden):
+                question = item["question"]
+                trace_id = f"bench-{round_no}-{i}"
+                t0 = time.perf_counter()
+                resp = await client.post(
+                    "/questions/ask",
+                    json={"question": question, "session_id": trace_id},
+                    headers={TRACE_HEADER: trace_id},
+                )
+                resp.raise_for_status()
+                ask_ms.append((time.perf_counter() - t0) * 1000.0)
+                for stage, ms in _server_timing(resp.headers.get("server-timing", "")).items():
+                    stages.setdefault(stage, []).append(ms)
+
+                if round_no != 0:
+                    continue
+                call = recorder.calls.get(trace_id)
+                if call is None or "retrieved" not in call:
+                    catalog_answered.append(question)
+                    continue
+                sources[call["source"]] = sources.get(call["source"], 0) + 1
+                rank = _first_relevant_rank(call["retrieved"], item["expected"])
+                ranks.append(rank)
+                if rank is None:
+                    misses.append(question)
+                packed = call.get("packed", call["retrieved"])
+                if _first_relevant_rank(packed, item["expected"]) is not None:
+                    packed_hits += 1
+                if "pack_stats" in call:
+                    candidate_tokens.append(call["pack_stats"]["candidate_tokens"])
+                    packed_tokens.append(call["pack_stats"]["packed_tokens"])
+
+    n = len(ranks)
+    return {
+        "config": {"llm_ms": llm_ms, "repeat": repeat, "embedding_dim": dim, "questions": len(golden), "corpus": CORPUS},
+        "ingest": {
+            "elapsed_ms": job["elapsed_ms"],
+            "timings_ms": job["timings_ms"],
+            "counts": job["counts"],
+            "stats": (job.get("result") or {}).get("ingest"),
+        },
+        "retrieval": {
+            "scored_questions": n,
+            "sources": sources,
+            **{f"recall@{k}": round(sum(1 for r in ranks if r is not None and r <= k) / n, 4) if n else 0.0 for k in ks},
+            "mrr": round(sum(1.0 / r for r in ranks if r) / n, 4) if n else 0.0,
+            "packed_recall": round(packed_hits / n, 4) if n else 0.0,
+            "misses": misses,
+            "catalog_answered": catalog_answered,
+        },
+        "context_tokens": {
+            "candidate_mean": round(statistics.fmean(candidate_tokens), 1) if candidate_tokens else 0.0,
+            "packed_mean": round(statistics.fmean(packed_tokens), 1) if packed_tokens else 0.0,
+            "packed_p95": _percentile([float(t) for t in packed_tokens], 95),
+        },
+        "latency": {**{name: _summary(values) for name, values in sorted(stages.items())}, "ask": _summary(ask_ms)},
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="Fake LLM latency in ms")
+    parser.add_argument("--repeat", type=int, default=3, help="Replays of the golden set (latency percentiles use all rounds)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 8], help="Cutoffs for recall@k")
+    parser.add_argument("--dim", type=int, default=512, help="Hashing embedding dimension")
+    parser.add_argument("--out", default="", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Isolated, dependency-free backends; must be set before the app's config is imported
+    workdir = tempfile.mkdtemp(prefix="rag-bench-")
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "LOCAL_VECTOR_DIR": os.path.join(workdir, "vector_index"),
+        "BM25_INDEX_DIR": os.path.join(workdir, "bm25_index"),
+        "MEMORY_BACKEND": "memory",
+        "TRACING_ENABLED": "true",
+        "ANTHROPIC_API_KEY": "",
+        "COHERE_API_KEY": "",
+    })
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    report = asyncio.run(run(args.llm_ms, args.repeat, args.k, args.dim))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Answer cache for /questions/ask.
+Entries are keyed by the normalized question plus the active index name and
+state.last_updated, so any change to the corpus makes old answers unreachable;
+/docs/process and /docs/clear also drop them explicitly. An optional cosine
+threshold lets near-duplicate questions reuse an answer.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from core.config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_SIMILARITY
+from core.embedding_cache import normalize_query
+
+class AnswerCache:
+    """Thread-safe LRU + TTL answer cache with hit ratio and saved-latency counters."""
+
+    def __init__(self, max_entries: int = ANSWER_CACHE_SIZE, ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS, similarity_threshold: float = ANSWER_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_latency_ms = 0.0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return 0.0 < self.similarity_threshold <= 1.0
+
+    @staticmethod
+    def _key(question: str, index_name: Optional[str], version: Optional[str]) -> Tuple[str, str, str]:
+        return (normalize_query(question), str(index_name or ""), str(version or ""))
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry["created_at"] > self.ttl_seconds
+
+    def lookup(self, question: str, index_name: Optional[str], version: Optional[str], query_vector: Optional[List[float]] = None) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for an exact (or near-duplicate) question, if any."""
+        key = self._key(question, index_name, version)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is None and query_vector is not None and self.semantic_enabled:
+                entry = self._nearest(key, query_vector, now)
+                if entry is not None:
+                    self.semantic_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry["key"])
+            self.hits += 1
+            self.saved_latency_ms += entry["latency_ms"]
+            return entry["payload"]
+
+    def _nearest(self, key: Tuple[str, str, str], query_vector: List[float], now: float) -> Optional[Dict[str, Any]]:
+        import numpy as np
+
+        candidates = [
+            e for k, e in self._entries.items()
+            if k[1:] == key[1:] and e["vector"] is not None and not self._expired(e, now)
+        ]
+        if not candidates:
+            return None
+        q = np.asarray(query_vector, dtype=np.float32)
+        q /= (np.linalg.norm(q) or 1.0)
+        scores = np.stack([e["vector"] for e in candidates]) @ q
+        best = int(np.argmax(scores))
+        return candidates[best] if float(scores[best]) >= self.similarity_threshold else None
+
+    def store(self, question: str, index_name: Optional[str], version: Optional[str], payload: Dict[str, Any], latency_ms: float, query_vector: Optional[List[float]] = None) -> None:
+        """Cache an answer payload together with the latency it took to produce."""
+        key = self._key(question, index_name, version)
+        vector = None
+        if query_vector is not None and self.semantic_enabled:
+            import numpy as np
+            vector = np.asarray(query_vector, dtype=np.float32)
+            vector /= (np.linalg.norm(vector) or 1.0)
+        with self._lock:
+            self._entries[key] = {
+                "key": key,
+                "payload": payload,
+                "latency_ms": latency_ms,
+                "vector": vector,
+                "created_at": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> int:
+        """Drop every cached answer (called whenever the corpus changes)."""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self.invalidations += 1
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_latency_ms": round(self.saved_latency_ms, 2),
+                "invalidations": self.invalidations,
+                "similarity_threshold": self.similarity_threshold if self.semantic_enabled else None,
+            }
+
+# Process-wide answer cache
+answer_cache = AnswerCache()
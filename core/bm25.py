@@ -0,0 +1,223 @@
+"""
+In-process BM25 index over the ingested chunks.
+Built at ingest from the same documents that go to the vector store and saved
+next to them (BM25_INDEX_DIR/<index>.json.gz), so it survives restarts. Postings
+store each term's document ids with a precomputed BM25 term weight (the
+document-length norm is folded in at build time), so a search is a handful of
+numpy scatter-adds. Vector and lexical result lists are fused with reciprocal-rank
+fusion; when vector search fails the lexical results are used on their own.
+
+Tokens keep identifiers whole as well as split: "x-api-key" indexes as
+"x-api-key", "x", "api" and "key", and "/v2/templates" as "/v2/templates",
+"v2" and "templates", so exact header names and paths are always findable.
+"""
+
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from core.config import BM25_INDEX_DIR, BM25_K1, BM25_B, RRF_K
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_SPLIT = re.compile(r"[\s,;()\[\]<>\"'`=|*!?]+")
+_WORD = re.compile(r"[a-z0-9_]+")
+_EDGE_PUNCT = ".:"
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "what", "when", "which", "with", "you", "do", "does", "can",
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens: whole identifiers/paths plus their alphanumeric parts."""
+    tokens: List[str] = []
+    for raw in _SPLIT.split(text.lower()):
+        raw = raw.strip(_EDGE_PUNCT)
+        if not raw:
+            continue
+        parts = _WORD.findall(raw)
+        if len(parts) > 1 or (parts and parts[0] != raw):
+            if "://" in raw:
+                # Full URLs are also indexed by their path
+                path = "/" + raw.split("://", 1)[1].split("/", 1)[-1] if raw.count("/") > 2 else ""
+                if len(path) > 1:
+                    tokens.append(path.rstrip("/"))
+            else:
+                tokens.append(raw.rstrip("/") if len(raw) > 1 else raw)
+        tokens.extend(p for p in parts if p not in _STOPWORDS)
+    return tokens
+
+class BM25Index:
+    """Inverted index with BM25 term weights; documents are kept for returning results."""
+
+    def __init__(self, documents: List[Document], postings: Dict[str, Tuple[np.ndarray, np.ndarray]], lengths: np.ndarray, k1: float = BM25_K1, b: float = BM25_B):
+        self.documents = documents
+        self.postings = postings
+        self.lengths = lengths
+        self.k1 = k1
+        self.b = b
+        n = len(documents)
+        self._idf = {term: math.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5)) for term, (ids, _) in postings.items()}
+
+    @classmethod
+    def build(cls, documents: List[Document], k1: float = BM25_K1, b: float = BM25_B) -> "BM25Index":
+        counts: Dict[str, Dict[int, int]] = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for doc_id, doc in enumerate(documents):
+            tokens = tokenize(doc.page_content)
+            lengths[doc_id] = len(tokens)
+            for token in tokens:
+                per_doc = counts.setdefault(token, {})
+                per_doc[doc_id] = per_doc.get(doc_id, 0) + 1
+        avgdl = float(lengths.mean()) if len(documents) and lengths.mean() > 0 else 1.0
+        norms = k1 * (1.0 - b + b * lengths / avgdl)
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, per_doc in counts.items():
+            ids = np.fromiter(per_doc.keys(), dtype=np.int32, count=len(per_doc))
+            tf = np.fromiter(per_doc.values(), dtype=np.float32, count=len(per_doc))
+            postings[term] = (ids, tf * (k1 + 1.0) / (tf + norms[ids]))
+        return cls(documents, postings, lengths, k1, b)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                ids, weights = posting
+                scores[ids] += self._idf[term] * weights
+        return scores
+
+    def search(self, query: str, k: int = 10, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """Top-k (document, score) by BM25; filter is metadata equality ({key: value})."""
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores)
+        if not len(hits):
+            return []
+        if filter:
+            hits = np.array([i for i in hits if _matches(self.documents[i], filter)], dtype=np.int64)
+            if not len(hits):
+                return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(self.documents[i], float(scores[i])) for i in hits]
+
+    def save(self, path: str) -> None:
+        """Write the index (documents, postings and lengths) as gzipped JSON, atomically."""
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "documents": [[d.page_content, d.metadata] for d in self.documents],
+            "lengths": self.lengths.tolist(),
+            "postings": {t: [ids.tolist(), w.round(5).tolist()] for t, (ids, w) in self.postings.items()},
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as f:
+            json.dump(payload, f, separators=(",", ":"), default=str)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        documents = [Document(page_content=text, metadata=meta) for text, meta in payload["documents"]]
+        postings = {
+            t: (np.asarray(ids, dtype=np.int32), np.asarray(w, dtype=np.float32))
+            for t, (ids, w) in payload["postings"].items()
+        }
+        return cls(documents, postings, np.asarray(payload["lengths"], dtype=np.float32), payload["k1"], payload["b"])
+
+def _matches(doc: Document, filter: Dict[str, Any]) -> bool:
+    meta = doc.metadata or {}
+    return all(meta.get(key) == value for key, value in filter.items())
+
+def _doc_key(doc: Document) -> str:
+    return (doc.metadata or {}).get("content_hash") or doc.page_content
+
+def rrf_fuse_scored(result_lists: Iterable[List[Document]], limit: int, k: int = RRF_K) -> List[Tuple[Document, float]]:
+    """Reciprocal-rank fusion: score(d) = sum over lists of 1 / (k + rank), best first."""
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            key = _doc_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [(docs[key], scores[key]) for key in ranked[:limit]]
+
+def rrf_fuse(result_lists: Iterable[List[Document]], limit: int, k: int = RRF_K) -> List[Document]:
+    """Reciprocal-rank fusion without the scores."""
+    return [doc for doc, _ in rrf_fuse_scored(result_lists, limit, k)]
+
+def bm25_path(index_name: str) -> str:
+    return os.path.join(BM25_INDEX_DIR, f"{index_name}.json.gz")
+
+def build_and_save(documents: List[Document], index_name: str) -> BM25Index:
+    """Build the index for an ingest and persist it next to the vector index."""
+    started = time.perf_counter()
+    index = BM25Index.build(documents)
+    try:
+        index.save(bm25_path(index_name))
+    except OSError as e:
+        logger.warning(f"Could not persist BM25 index for {index_name}: {e}")
+    logger.info(f"BM25 index built: {len(documents)} chunks, {len(index.postings)} terms in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return index
+
+def load_index(index_name: str) -> Optional[BM25Index]:
+    """Load a persisted index, or None if there is none (or it is unreadable)."""
+    path = bm25_path(index_name)
+    if not os.path.exists(path):
+        return None
+    try:
+        return BM25Index.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Could not load BM25 index {path}: {e}")
+        return None
+
+def delete_index(index_name: str) -> None:
+    try:
+        os.remove(bm25_path(index_name))
+    except OSError:
+        pass
+
+_lock = threading.Lock()
+searches = 0
+fallbacks = 0
+search_ms = 0.0
+
+def lexical_search(index: BM25Index, query: str, k: int, filter: Optional[Dict[str, Any]] = None, fallback: bool = False) -> List[Document]:
+    """Timed BM25 search used by the chain and hybrid retrieval (fallback marks vector-down use)."""
+    global searches, fallbacks, search_ms
+    started = time.perf_counter()
+    docs = [doc for doc, _ in index.search(query, k=k, filter=filter)]
+    elapsed = (time.perf_counter() - started) * 1000.0
+    with _lock:
+        searches += 1
+        fallbacks += int(fallback)
+        search_ms += elapsed
+    return docs
+
+def get_bm25_stats() -> Dict[str, Any]:
+    """Get lexical search counters."""
+    import core.state as state
+
+    with _lock:
+        return {
+            "indexed_chunks": len(state.bm25_index) if state.bm25_index is not None else 0,
+            "terms": len(state.bm25_index.postings) if state.bm25_index is not None else 0,
+            "searches": searches,
+            "fallbacks": fallbacks,
+            "avg_search_ms": round(search_ms / searches, 3) if searches else 0.0,
+        }
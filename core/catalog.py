@@ -0,0 +1,169 @@
+"""
+Deterministic answers for catalog questions (list / count endpoints, base URLs).
+These intents are answered straight from the endpoint catalog extracted at ingest
+(state.extracted_endpoints / state.base_urls_detected) instead of retrieval plus
+an LLM call that only sees a handful of chunks, so the list is always complete.
+Answers are cached per state.version and intent.
+"""
+
+import json
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from utils.helpers import detect_intent
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CATALOG_INTENTS = {"list_apis", "comprehensive_list", "count_apis", "list_base_urls"}
+
+_METHOD_ORDER = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"]
+_METHODS = "|".join(_METHOD_ORDER)
+# An upper-case method always filters; any case does right before the thing listed ("post endpoints")
+_METHOD_FILTER = re.compile(rf"\b({_METHODS})\b")
+_METHOD_BEFORE_TARGET = re.compile(rf"(?i)\b({_METHODS})(?:\s+(?:http|method))?\s+(?:endpoints?|apis?|routes?|operations?|requests?|calls?)\b")
+_METHOD_WORD = re.compile(rf"(?i)\b({_METHODS})\b")
+# detect_intent's list rules also fire on "show me the endpoint for X"; a catalog
+# question asks about endpoints in the plural and does not name a path
+_PLURAL_TARGET = re.compile(r"(?i)\b(endpoints|apis|routes|operations|api list|endpoint list)\b")
+_NAMES_PATH = re.compile(r"\s/[A-Za-z0-9{:_-]")
+
+_lock = threading.Lock()
+_cache: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+_cache_version: Optional[int] = None
+hits = 0
+builds = 0
+fallthroughs = 0
+
+def classify(question: str) -> Optional[str]:
+    """Return the catalog intent for a question, or None if it should go to the LLM."""
+    intent = detect_intent(question)
+    if intent not in CATALOG_INTENTS:
+        return None
+    if intent in ("list_apis", "comprehensive_list"):
+        if not _PLURAL_TARGET.search(question) or _NAMES_PATH.search(question):
+            return None
+    return intent
+
+def method_filter(question: str) -> Optional[List[str]]:
+    """HTTP methods a catalog question is restricted to, or None when a method word
+    elsewhere in the question may be a plain verb ("endpoints to delete a file").
+    A stray lower-case "get" is always read as the verb.
+    """
+    methods = set(_METHOD_FILTER.findall(question))
+    targeted = set()
+    for m in _METHOD_BEFORE_TARGET.finditer(question):
+        methods.add(m.group(1).upper())
+        targeted.add(m.start(1))
+    for m in _METHOD_WORD.finditer(question):
+        word = m.group(1)
+        if word.isupper() or m.start(1) in targeted or word.lower() == "get":
+            continue
+        return None
+    return sorted(methods)
+
+def _unique_endpoints(endpoints: List[Dict[str, Any]], methods: List[str]) -> List[Dict[str, Any]]:
+    seen = set()
+    result = []
+    for e in endpoints:
+        method = str(e.get("http_method") or "").upper()
+        path = e.get("endpoint")
+        if not method or not path or (methods and method not in methods):
+            continue
+        if (method, path) in seen:
+            continue
+        seen.add((method, path))
+        result.append(e)
+    return result
+
+def _method_breakdown(endpoints: List[Dict[str, Any]]) -> str:
+    counts: Dict[str, int] = {}
+    for e in endpoints:
+        method = e["http_method"].upper()
+        counts[method] = counts.get(method, 0) + 1
+    ordered = sorted(counts, key=lambda m: _METHOD_ORDER.index(m) if m in _METHOD_ORDER else len(_METHOD_ORDER))
+    return ", ".join(f"{m}: {counts[m]}" for m in ordered)
+
+def _build(intent: str, methods: List[str], state: Any) -> Optional[Dict[str, Any]]:
+    base_urls = list(state.base_urls_detected or ([state.detected_base_url] if state.detected_base_url else []))
+    if intent == "list_base_urls":
+        if not base_urls:
+            return None
+        return {
+            "answer": f"The documentation uses {len(base_urls)} base URL{'s' if len(base_urls) != 1 else ''}.",
+            "description": "\n".join(f"- {url}" for url in base_urls),
+            "endpoints": [],
+            "code_examples": None,
+            "links": base_urls,
+        }
+
+    endpoints = _unique_endpoints(state.extracted_endpoints or [], methods)
+    if not endpoints:
+        return None
+    scope = f"{'/'.join(methods)} endpoint" if methods else "endpoint"
+    scope += "s" if len(endpoints) != 1 else ""
+    description = f"By method: {_method_breakdown(endpoints)}."
+    if base_urls:
+        description += f" Base URL: {base_urls[0]}."
+    if intent == "count_apis":
+        return {
+            "answer": f"The documentation defines {len(endpoints)} {scope}.",
+            "description": description,
+            "endpoints": [],
+            "code_examples": None,
+            "links": base_urls,
+        }
+    return {
+        "answer": f"The documentation defines {len(endpoints)} {scope}:",
+        "description": description,
+        "endpoints": [
+            {"method": e["http_method"].upper(), "url": e["endpoint"]}
+            for e in endpoints
+        ],
+        "code_examples": None,
+        "links": base_urls,
+    }
+
+def answer_from_catalog(question: str) -> Optional[Dict[str, Any]]:
+    """Answer catalog intents from the extracted catalog.
+    Returns StructuredResponse fields (without memory_count), or None to fall through to the LLM.
+    """
+    global _cache_version, hits, builds, fallthroughs
+    intent = classify(question)
+    if intent is None:
+        return None
+
+    import core.state as state
+    methods = [] if intent == "list_base_urls" else method_filter(question)
+    if methods is None:
+        with _lock:
+            fallthroughs += 1
+        logger.info(f"Ambiguous method word in a {intent} question; falling through to the LLM")
+        return None
+    key = (intent, tuple(methods))
+    with _lock:
+        if _cache_version != state.version:
+            _cache.clear()
+            _cache_version = state.version
+        cached = _cache.get(key)
+        if cached is not None:
+            hits += 1
+            return cached
+    built = _build(intent, methods, state)
+    with _lock:
+        if built is None:
+            fallthroughs += 1
+            logger.info(f"Catalog has nothing for intent {intent}; falling through to the LLM")
+            return None
+        builds += 1
+        _cache[key] = built
+    return built
+
+def catalog_answer_text(structured: Dict[str, Any]) -> str:
+    """Serialize a catalog answer the way LLM answers are stored in chat memory."""
+    return json.dumps({k: structured[k] for k in ("answer", "description", "endpoints", "links")})
+
+def get_catalog_stats() -> Dict[str, int]:
+    """Get fast-path hit/build/fall-through counters."""
+    with _lock:
+        return {"hits": hits, "builds": builds, "fallthroughs": fallthroughs, "cached_answers": len(_cache)}
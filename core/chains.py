@@ -1,31 +1,29 @@
-from langchain.chains import ConversationalRetrievalChain
+import contextvars
 from langchain_anthropic import ChatAnthropic
+from langchain_core.prompts import ChatPromptTemplate
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.schema.runnable import RunnableLambda, Runnable
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict, Any, Optional
-from core.config import ANTHROPIC_API_KEY, ANTHROPIC_MODEL, CHUNK_SIZE, CHUNK_OVERLAP
+from typing import Dict, Any, List, Optional
+from langchain_core.documents import Document
+from core.config import ANTHROPIC_MODEL, COHERE_API_KEY, CHUNK_SIZE, CHUNK_OVERLAP, ENDPOINT_INDEX_ENABLED, CONTEXT_PACKING_ENABLED, CONTEXT_PACK_CANDIDATES, BM25_ENABLED, BM25_TOP_K, TOP_K_RETRIEVE
+from core.clients import get_chat_model, get_cohere_client
+from core.concurrency import run_in_worker
+from core.retrieval import expand_query, aretrieve_expanded
+from core.context_packer import context_packer
+from core.bm25 import lexical_search, rrf_fuse_scored
+from core.rerank import reranker
+from core.tracing import span
+from utils.parser import parse_explicit_endpoint
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# Global variables
-rag_chain: Optional[ConversationalRetrievalChain] = None
-retriever: Optional[Any] = None  # Will be a retriever from Weaviate.as_retriever()
-raw_document_text: str = ""
-extracted_endpoints: List[Dict[str, Any]] = []
-detected_base_url: Optional[str] = None
-base_urls_detected: List[str] = []
-curl_examples_total_count: int = 0
-
-def create_llm() -> ChatAnthropic:
-    """Create the Anthropic LLM instance."""
-    if not ANTHROPIC_API_KEY:
-        raise ValueError("ANTHROPIC_API_KEY environment variable is required")
-    
-    return ChatAnthropic(
-        anthropic_api_key=ANTHROPIC_API_KEY,
-        model=ANTHROPIC_MODEL,
-        temperature=0.1
-    )
+QUESTION_PROMPT_PATH = "prompts/question_prompt.txt"
+
+def create_llm(temperature: float = 0.2, max_tokens: int = 600) -> ChatAnthropic:
+    """Get the shared Anthropic LLM instance from the client registry."""
+    return get_chat_model(temperature=temperature, max_tokens=max_tokens, model=ANTHROPIC_MODEL)
 
 def create_text_splitter() -> RecursiveCharacterTextSplitter:
     """Create the text splitter for chunking documents."""
@@ -36,5 +34,86 @@ def create_text_splitter() -> RecursiveCharacterTextSplitter:
         separators=["\n\n", "\n", " ", ""]
     )
 
+def load_question_prompt() -> ChatPromptTemplate:
+    """Load the structured-JSON question prompt from file."""
+    with open(QUESTION_PROMPT_PATH, "r", encoding="utf-8") as f:
+        return ChatPromptTemplate.from_template(f.read())
+
+def _endpoint_index_documents(user_input: str) -> List[Document]:
+    """Chunks for an explicit "METHOD /path" question resolved through the endpoint index.
+    Returns [] (so retrieval runs) when the question names no path or nothing matches.
+    """
+    import core.state as state
+
+    if not ENDPOINT_INDEX_ENABLED or state.endpoint_index is None:
+        return []
+    explicit = parse_explicit_endpoint(user_input)
+    if not explicit or not explicit.get("endpoint"):
+        return []
+    match = state.endpoint_index.lookup(explicit["http_method"], explicit["endpoint"])
+    if match is None or not match.documents:
+        return []
+    logger.info("Endpoint index hit: %s %s -> %s (%d chunks)", explicit["http_method"], explicit["endpoint"], match.template, len(match.documents))
+    return match.documents
+
+async def _rerank(user_input: str, docs: List[Document], scores: Optional[List[float]] = None) -> List[Document]:
+    """Cohere rerank of the retrieved candidates (cached, skipped when the fused scores
+    are already decisive). Keeps every candidate so the packer still sees the full set;
+    on a Cohere error the first-stage order is kept.
+    """
+    if not COHERE_API_KEY or len(docs) <= 1:
+        return docs
+    try:
+        # Run under a copy of the request context so the rerank stage lands in this request's trace
+        context = contextvars.copy_context()
+        return await run_in_worker(context.run, reranker.rerank, get_cohere_client(), user_input, docs, len(docs), scores)
+    except Exception as e:
+        logger.warning("Rerank failed, keeping fused order: %s", e)
+        return docs
+
+async def _retrieve(user_input: str) -> List[Document]:
+    """Vector retrieval over the expanded queries, fused with BM25 when a lexical index exists,
+    then reranked. If vector search fails (e.g. Weaviate is down) the lexical results are used alone.
+    """
+    import core.state as state
+
+    limit = CONTEXT_PACK_CANDIDATES if CONTEXT_PACKING_ENABLED else TOP_K_RETRIEVE
+    bm25 = state.bm25_index if BM25_ENABLED else None
+    try:
+        vector_docs = await aretrieve_expanded(state.vector_store, state.embeddings, expand_query(user_input), limit=limit)
+    except Exception as e:
+        if bm25 is None:
+            raise
+        logger.warning("Vector retrieval failed, answering from BM25 only: %s", e)
+        with span("bm25"):
+            return lexical_search(bm25, user_input, k=limit, fallback=True)
+    if bm25 is None:
+        return await _rerank(user_input, vector_docs)
+    with span("bm25"):
+        lexical_docs = lexical_search(bm25, user_input, k=BM25_TOP_K)
+    fused = rrf_fuse_scored([vector_docs, lexical_docs], limit=limit)
+    return await _rerank(user_input, [doc for doc, _ in fused], [score for _, score in fused])
+
+def build_rag_chain(llm: Optional[Any] = None) -> Runnable:
+    """Build the RAG chain used for both freshly processed and reloaded documentation.
+    Retrieval reads state.vector_store / state.embeddings at call time, so the same
+    chain serves whatever index is currently active.
+    """
+    doc_chain = create_stuff_documents_chain(llm=llm or create_llm(), prompt=load_question_prompt())
 
+    async def _map_inputs(x: Dict[str, Any]) -> Dict[str, Any]:
+        user_input = x.get("input", x.get("question", ""))
+        with span("endpoint_index"):
+            docs = _endpoint_index_documents(user_input)
+        if not docs:
+            docs = await _retrieve(user_input)
+        if CONTEXT_PACKING_ENABLED:
+            with span("pack"):
+                docs, _ = context_packer.pack(docs)
+        return {
+            "context": docs,
+            "input": user_input,
+            "chat_history": x.get("chat_history", "")
+        }
 
+    return RunnableLambda(_map_inputs) | doc_chain
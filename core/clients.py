@@ -0,0 +1,238 @@
+"""
+Shared client registry for Weaviate, Cohere and Anthropic.
+Clients are created lazily on first use and reused for the life of the process,
+so requests ride on keep-alive connection pools instead of opening (and TLS
+handshaking) new connections. Per-service counters report connections opened
+vs. requests served so reuse can be checked from /docs/status.
+"""
+
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from core.config import (
+    WEAVIATE_URL, COHERE_API_KEY, ANTHROPIC_API_KEY, ANTHROPIC_MODEL, COHERE_EMBEDDING_MODEL,
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY, HTTP_MAX_RETRIES
+)
+from core.tracing import LLMTracer
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ConnectionCounter:
+    """Counts requests and new connections for one service (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def record(self, event_name: str) -> None:
+        with self._lock:
+            if event_name == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+            elif event_name.endswith("send_request_headers.started"):
+                self.requests += 1
+
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.record(event_name)
+
+    async def atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.record(event_name)
+
+    def on_request(self, request: Any) -> None:
+        # httpx hands request.extensions to httpcore, which reports connection events to "trace"
+        request.extensions["trace"] = self.trace
+
+    async def aon_request(self, request: Any) -> None:
+        request.extensions["trace"] = self.atrace
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connections_reused": max(0, self.requests - self.connections_opened),
+                "tls_handshakes": self.tls_handshakes,
+            }
+
+_lock = threading.RLock()
+_clients: Dict[Any, Any] = {}
+_created: Dict[str, int] = {}
+_reused: Dict[str, int] = {}
+_counters: Dict[str, ConnectionCounter] = {"cohere": ConnectionCounter(), "anthropic": ConnectionCounter()}
+_instrumented: Dict[int, Any] = {}
+# httpx clients created here (closed on shutdown)
+_owned_http_clients: List[Any] = []
+
+def _get_or_create(service: str, key: Any, factory: Callable[[], Any]) -> Any:
+    """Return the cached client for key, creating it on first use."""
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _reused[service] = _reused.get(service, 0) + 1
+            return client
+        client = factory()
+        _clients[key] = client
+        _created[service] = _created.get(service, 0) + 1
+        logger.info(f"Created shared {service} client {key}")
+        return client
+
+def _httpx_limits() -> Any:
+    import httpx
+    return httpx.Limits(
+        max_connections=HTTP_POOL_MAXSIZE,
+        max_keepalive_connections=HTTP_POOL_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+def _httpx_timeout() -> Any:
+    import httpx
+    return httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+def _instrument_httpx(http_client: Any, counter: ConnectionCounter, is_async: bool) -> None:
+    """Attach the connection counter to an httpx client once."""
+    if http_client is None or id(http_client) in _instrumented:
+        return
+    hooks = http_client.event_hooks
+    hooks["request"] = list(hooks.get("request", [])) + [counter.aon_request if is_async else counter.on_request]
+    http_client.event_hooks = hooks
+    _instrumented[id(http_client)] = http_client
+
+def get_weaviate_client(url: str = WEAVIATE_URL) -> Any:
+    """Get the shared Weaviate v3 client (requests session with a sized keep-alive pool)."""
+    def _create() -> Any:
+        import weaviate
+        from weaviate.config import Config, ConnectionConfig
+        return weaviate.Client(
+            url=url,
+            timeout_config=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+            additional_config=Config(connection_config=ConnectionConfig(
+                session_pool_connections=HTTP_POOL_CONNECTIONS,
+                session_pool_maxsize=HTTP_POOL_MAXSIZE,
+                session_pool_max_retries=HTTP_MAX_RETRIES
+            ))
+        )
+    return _get_or_create("weaviate", ("weaviate", url), _create)
+
+def get_cohere_client() -> Any:
+    """Get the shared synchronous Cohere client."""
+    def _create() -> Any:
+        import cohere
+        import httpx
+        http_client = httpx.Client(timeout=_httpx_timeout(), limits=_httpx_limits())
+        _owned_http_clients.append(http_client)
+        _instrument_httpx(http_client, _counters["cohere"], is_async=False)
+        return cohere.Client(api_key=COHERE_API_KEY, timeout=HTTP_READ_TIMEOUT, httpx_client=http_client)
+    return _get_or_create("cohere", ("cohere", "sync"), _create)
+
+def get_cohere_async_client() -> Any:
+    """Get the shared asynchronous Cohere client."""
+    def _create() -> Any:
+        import cohere
+        import httpx
+        http_client = httpx.AsyncClient(timeout=_httpx_timeout(), limits=_httpx_limits())
+        _owned_http_clients.append(http_client)
+        _instrument_httpx(http_client, _counters["cohere"], is_async=True)
+        return cohere.AsyncClient(api_key=COHERE_API_KEY, timeout=HTTP_READ_TIMEOUT, httpx_client=http_client)
+    return _get_or_create("cohere", ("cohere", "async"), _create)
+
+def get_cohere_embeddings(model: str = COHERE_EMBEDDING_MODEL) -> Any:
+    """Get LangChain Cohere embeddings for a model, backed by the shared Cohere clients."""
+    def _create() -> Any:
+        from langchain_cohere import CohereEmbeddings
+        embeddings = CohereEmbeddings(model=model, max_retries=HTTP_MAX_RETRIES, request_timeout=HTTP_READ_TIMEOUT)
+        # The constructor builds private clients; swap in the pooled ones
+        embeddings.client = get_cohere_client()
+        embeddings.async_client = get_cohere_async_client()
+        return embeddings
+    return _get_or_create("cohere", ("cohere_embeddings", model), _create)
+
+def get_chat_model(temperature: Optional[float] = 0.2, max_tokens: int = 600, model: str = ANTHROPIC_MODEL) -> Any:
+    """Get a shared ChatAnthropic per (model, temperature, max_tokens).
+    langchain_anthropic keeps one keep-alive httpx client per base URL and timeout,
+    so every instance built here shares the same connection pool.
+    """
+    if not ANTHROPIC_API_KEY:
+        raise ValueError("ANTHROPIC_API_KEY environment variable is required")
+
+    def _create() -> Any:
+        from langchain_anthropic import ChatAnthropic
+        llm = ChatAnthropic(
+            anthropic_api_key=ANTHROPIC_API_KEY,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            default_request_timeout=HTTP_READ_TIMEOUT,
+            max_retries=HTTP_MAX_RETRIES,
+            callbacks=[LLMTracer(model)]
+        )
+        try:
+            _instrument_httpx(llm._client._client, _counters["anthropic"], is_async=False)
+            _instrument_httpx(llm._async_client._client, _counters["anthropic"], is_async=True)
+        except Exception as e:
+            logger.debug(f"Anthropic connection counters unavailable: {e}")
+        return llm
+    return _get_or_create("anthropic", ("anthropic", model, temperature, max_tokens), _create)
+
+def _weaviate_pool_stats(client: Any) -> Dict[str, int]:
+    # The v3 client talks HTTP through a requests.Session; urllib3 pools count their own connections
+    requests_served = opened = 0
+    session = getattr(getattr(client, "_connection", None), "_session", None)
+    for adapter in (getattr(session, "adapters", None) or {}).values():
+        pool_manager = getattr(adapter, "poolmanager", None)
+        for key in list(getattr(pool_manager, "pools", {}).keys()) if pool_manager else []:
+            pool = pool_manager.pools.get(key)
+            requests_served += getattr(pool, "num_requests", 0)
+            opened += getattr(pool, "num_connections", 0)
+    return {
+        "requests": requests_served,
+        "connections_opened": opened,
+        "connections_reused": max(0, requests_served - opened),
+    }
+
+def client_stats() -> Dict[str, Any]:
+    """Get client creation/reuse counts and connection counters per service."""
+    with _lock:
+        services: Dict[str, Any] = {
+            service: {"clients_created": _created.get(service, 0), "client_lookups_reused": _reused.get(service, 0)}
+            for service in ("weaviate", "cohere", "anthropic")
+        }
+        weaviate_clients = [c for k, c in _clients.items() if k[0] == "weaviate"]
+    for service, counter in _counters.items():
+        services[service]["connections"] = counter.stats()
+    weaviate_totals = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+    for client in weaviate_clients:
+        for name, value in _weaviate_pool_stats(client).items():
+            weaviate_totals[name] += value
+    services["weaviate"]["connections"] = weaviate_totals
+    services["pool"] = {
+        "max_keepalive_connections": HTTP_POOL_CONNECTIONS,
+        "max_connections": HTTP_POOL_MAXSIZE,
+        "connect_timeout_s": HTTP_CONNECT_TIMEOUT,
+        "read_timeout_s": HTTP_READ_TIMEOUT,
+    }
+    return services
+
+async def close_clients() -> None:
+    """Close pooled connections (used on application shutdown)."""
+    with _lock:
+        weaviate_clients = [c for k, c in _clients.items() if k[0] == "weaviate"]
+        http_clients = list(_owned_http_clients)
+        _clients.clear()
+        _instrumented.clear()
+        _owned_http_clients.clear()
+    for client in weaviate_clients:
+        session = getattr(getattr(client, "_connection", None), "_session", None)
+        if session is not None:
+            session.close()
+    for http_client in http_clients:
+        try:
+            if hasattr(http_client, "aclose"):
+                await http_client.aclose()
+            else:
+                http_client.close()
+        except Exception as e:
+            logger.debug(f"Failed to close HTTP client: {e}")
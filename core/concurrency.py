@@ -0,0 +1,39 @@
+"""
+Bounded worker pool for blocking work started from async request handlers.
+Synchronous SDK calls (Weaviate v3 client, LangChain sync fallbacks) run here
+so they never stall the event loop.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from core.config import WORKER_POOL_SIZE
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get (or lazily create) the shared bounded worker pool."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKER_POOL_SIZE, thread_name_prefix="rag-worker")
+    return _executor
+
+def install_default_executor() -> None:
+    """Make the bounded pool the event loop's default executor.
+    LangChain runs sync-only components (e.g. the Weaviate retriever) through
+    loop.run_in_executor(None, ...), so this bounds those calls as well.
+    """
+    asyncio.get_running_loop().set_default_executor(get_executor())
+
+async def run_in_worker(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking callable in the worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown_executor() -> None:
+    """Shut down the worker pool (used on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
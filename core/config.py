@@ -11,6 +11,11 @@ COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://127.0.0.1:8080")
 WEAVIATE_INDEX_NAME = os.getenv("WEAVIATE_INDEX_NAME", "RAGDocs")
 
+# Vector Backend Configuration
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate")          # "weaviate" or "local" (in-process NumPy index)
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR", "vector_index")  # Root directory of local indexes
+LOCAL_VECTOR_DTYPE = os.getenv("LOCAL_VECTOR_DTYPE", "float32")   # Stored embedding dtype: "float32" or "float16"
+
 # Model Configuration
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-20241022")
 COHERE_EMBEDDING_MODEL = os.getenv("COHERE_EMBEDDING_MODEL", "embed-english-v3.0")
@@ -23,6 +28,13 @@ APP_DESCRIPTION = "AI-powered API documentation assistant with RAG capabilities"
 
 # Memory Configuration
 MEMORY_K = 10  # Number of messages to keep in memory
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "10000"))                  # Sessions kept (LRU beyond this)
+MEMORY_SESSION_TTL_SECONDS = float(os.getenv("MEMORY_SESSION_TTL_SECONDS", "86400"))  # Idle seconds before a session expires; 0 disables
+MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "20"))                     # Ring-buffer size per session
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "sqlite")                                  # "sqlite" (persistent) or "memory"
+MEMORY_DB_PATH = os.getenv("MEMORY_DB_PATH", "memory.sqlite3")                          # SQLite file for the sqlite backend
+MEMORY_FLUSH_INTERVAL_SECONDS = float(os.getenv("MEMORY_FLUSH_INTERVAL_SECONDS", "0.5"))  # Max delay before queued writes are committed
+MEMORY_WRITE_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "200"))              # Queued writes committed per transaction
 
 # Chunking Configuration
 CHUNK_SIZE = 1500                    # Optimal for API documentation
@@ -35,7 +47,88 @@ TOP_K_FETCH = 20                     # Documents to fetch before MMR
 MMR_LAMBDA = 0.7                     # MMR diversity vs relevance balance
 TOP_K_RERANK = 5                     # Documents after reranking
 
+# Context Packing Configuration
+CONTEXT_PACKING_ENABLED = os.getenv("CONTEXT_PACKING_ENABLED", "true").lower() == "true"  # Merge/dedupe retrieved chunks before the LLM call
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))                     # Max estimated input tokens of packed context
+CONTEXT_PACK_CANDIDATES = int(os.getenv("CONTEXT_PACK_CANDIDATES", "16"))                 # Unique retrieved chunks offered to the packer
+CONTEXT_MIN_OVERLAP_CHARS = 40                                                            # Shorter suffix/prefix matches are not treated as overlap
+
+# Lexical Search Configuration
+BM25_ENABLED = os.getenv("BM25_ENABLED", "true").lower() == "true"   # Fuse BM25 with vector results; lexical fallback when vector search fails
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "bm25_index")          # Persisted BM25 indexes (<index>.json.gz)
+BM25_TOP_K = int(os.getenv("BM25_TOP_K", "16"))                     # Lexical candidates per question
+BM25_K1 = 1.2                                                       # BM25 term-frequency saturation
+BM25_B = 0.75                                                       # BM25 document-length normalization
+RRF_K = 60                                                          # Reciprocal-rank fusion constant
+
+# Rerank Configuration
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "1024"))                    # Cached (query, candidate set) rerank results (LRU)
+RERANK_CACHE_TTL_SECONDS = float(os.getenv("RERANK_CACHE_TTL_SECONDS", "600"))     # 0 disables expiry
+RERANK_SKIP_MARGIN = float(os.getenv("RERANK_SKIP_MARGIN", "0.35"))                # Skip rerank when top hybrid score leads #2 by this fraction; 0 = always rerank
+RERANK_MAX_CHARS = int(os.getenv("RERANK_MAX_CHARS", "1200"))                      # Candidate text sent to rerank is cut to this length; 0 = no limit
+
+# Endpoint Index Configuration
+ENDPOINT_INDEX_ENABLED = os.getenv("ENDPOINT_INDEX_ENABLED", "true").lower() == "true"   # Answer "METHOD /path" questions from the endpoint index
+ENDPOINT_INDEX_MAX_CHUNKS = int(os.getenv("ENDPOINT_INDEX_MAX_CHUNKS", "6"))            # Chunks kept per endpoint (endpoint doc first)
+
 # Query Expansion Configuration
 MAX_EXPANDED_QUERIES = 3             # Maximum query variations
 ENABLE_QUERY_EXPANSION = True        # Enable query expansion
 
+# Concurrency Configuration
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", "8"))   # Threads for blocking SDK calls
+
+# Client Pool Configuration (shared Weaviate / Cohere / Anthropic clients)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))     # Keep-alive connections kept per pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "50"))             # Max concurrent connections per pool
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))      # Seconds
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))           # Seconds
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))   # Idle seconds before a pooled connection is dropped
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))                # SDK-level retries per call
+
+# Query Embedding Cache Configuration
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))                    # Max cached query vectors (LRU)
+QUERY_EMBED_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBED_CACHE_TTL_SECONDS", "86400"))   # 0 disables expiry
+QUERY_EMBED_CACHE_PATH = os.getenv("QUERY_EMBED_CACHE_PATH", "")                             # SQLite file; empty = memory only
+
+# Answer Cache Configuration
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))                           # Max cached answers (LRU)
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))          # 0 disables expiry
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))               # Cosine threshold for near-duplicates; 0 = exact only
+
+# Ingest Pipeline Configuration
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "96"))             # Texts per embedding request (Cohere max 96)
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))            # Embedding requests in flight
+INGEST_WRITE_BATCH_SIZE = int(os.getenv("INGEST_WRITE_BATCH_SIZE", "100"))            # Objects per Weaviate batch
+INGEST_WRITE_WORKERS = int(os.getenv("INGEST_WRITE_WORKERS", "2"))                    # Weaviate batch worker threads
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "3"))                        # Retries per failed embedding batch
+INGEST_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "1.0"))  # Base for exponential backoff
+
+# Endpoint Recall Configuration (LLM pass over header sections during ingest)
+ENDPOINT_RECALL_ENABLED = os.getenv("ENDPOINT_RECALL_ENABLED", "true").lower() == "true"
+ENDPOINT_RECALL_CONCURRENCY = int(os.getenv("ENDPOINT_RECALL_CONCURRENCY", "4"))       # LLM calls in flight
+ENDPOINT_RECALL_MIN_CHARS = int(os.getenv("ENDPOINT_RECALL_MIN_CHARS", "2000"))        # Adjacent short sections are grouped up to this size
+ENDPOINT_RECALL_MAX_CHARS = int(os.getenv("ENDPOINT_RECALL_MAX_CHARS", "12000"))       # Longer sections are cut at line boundaries
+ENDPOINT_RECALL_MAX_TOKENS = int(os.getenv("ENDPOINT_RECALL_MAX_TOKENS", "2000"))      # Output budget per section call
+ENDPOINT_RECALL_CACHE_SIZE = int(os.getenv("ENDPOINT_RECALL_CACHE_SIZE", "4096"))      # Cached section answers (LRU)
+ENDPOINT_RECALL_CACHE_PATH = os.getenv("ENDPOINT_RECALL_CACHE_PATH", "")               # SQLite file; empty = memory only
+
+# OpenAPI Ingest Configuration
+OPENAPI_INGEST_ENABLED = os.getenv("OPENAPI_INGEST_ENABLED", "true").lower() == "true"   # Ingest OpenAPI/Swagger specs as one document per operation
+OPENAPI_SCHEMA_DEPTH = int(os.getenv("OPENAPI_SCHEMA_DEPTH", "3"))                        # Nesting rendered in schema signatures
+OPENAPI_MAX_PROPERTIES = int(os.getenv("OPENAPI_MAX_PROPERTIES", "30"))                   # Properties rendered per object schema
+OPENAPI_MAX_DESCRIPTION_CHARS = int(os.getenv("OPENAPI_MAX_DESCRIPTION_CHARS", "600"))    # Operation descriptions are trimmed to this
+
+# Logging Configuration
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")                            # DEBUG renders full answers and chain payloads
+LOG_FILE = os.getenv("LOG_FILE", "rag_assistant.log")                 # File handler target (written by the listener thread)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))            # Queued records before new ones are dropped
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))          # Fraction of requests whose DEBUG/INFO lines are kept
+
+# Tracing Configuration
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"   # Per-stage spans, trace-id header and /metrics histograms
+TRACE_HEADER = os.getenv("TRACE_HEADER", "X-Trace-Id")                     # Request/response header carrying the trace id
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # Histogram bounds in seconds
+
+# Background Job Configuration
+MAX_JOB_HISTORY = int(os.getenv("MAX_JOB_HISTORY", "50"))    # Finished ingest jobs kept for /docs/jobs
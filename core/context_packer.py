@@ -0,0 +1,204 @@
+"""
+Token-budgeted context packing between retrieval and the stuff-documents chain.
+Chunks are cut with CHUNK_OVERLAP characters of overlap, so neighbouring chunks
+retrieved together repeat up to 20% of their text. The packer merges chunks from
+the same section into contiguous blocks where their texts really overlap at
+neighbouring chunk indexes (stripping the shared overlap), drops chunks already
+contained in another block, and then fills CONTEXT_TOKEN_BUDGET with blocks in
+relevance order.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+from langchain_core.documents import Document
+from core.config import CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_OVERLAP_CHARS, CHUNK_OVERLAP, TOP_K_RETRIEVE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def estimate_tokens(text: str) -> int:
+    """Rough Claude token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+def overlap_length(left: str, right: str, max_overlap: int = CHUNK_OVERLAP * 2, min_overlap: int = CONTEXT_MIN_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of left that is a prefix of right (0 if under min_overlap)."""
+    limit = min(len(left), len(right), max_overlap)
+    if limit < min_overlap:
+        return 0
+    probe = right[:min_overlap]
+    tail_start = len(left) - limit
+    pos = left.find(probe, tail_start)
+    while pos != -1:
+        length = len(left) - pos
+        if right.startswith(left[pos:]) and length >= min_overlap:
+            return length
+        pos = left.find(probe, pos + 1)
+    return 0
+
+class _Block:
+    __slots__ = ("text", "rank", "indexes", "metadata", "members")
+
+    def __init__(self, doc: Document, rank: int, index: Optional[int]):
+        self.text = doc.page_content
+        self.rank = rank
+        # Chunk indexes the text spans; always a contiguous run
+        self.indexes: Set[int] = {index} if index is not None else set()
+        self.metadata = dict(doc.metadata or {})
+        self.members = 1
+
+def _chunk_index(doc: Document) -> Optional[int]:
+    value = (doc.metadata or {}).get("chunk_index")
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+def _section_key(doc: Document) -> Tuple[str, str]:
+    meta = doc.metadata or {}
+    return (str(meta.get("source") or ""), str(meta.get("section_path") or meta.get("title") or ""))
+
+def _follows(left: Set[int], right: Set[int]) -> bool:
+    """True if the chunks in right start right after those in left (unknown indexes do not veto)."""
+    return not left or not right or min(right) == max(left) + 1
+
+def _try_merge(block: _Block, text: str, indexes: Set[int]) -> Tuple[bool, int]:
+    """Merge text (spanning chunk indexes) into block if one contains the other or they
+    share real overlap text at touching indexes. Returns (merged, characters already in the block).
+    """
+    if text in block.text:
+        return True, len(text)
+    if block.text in text:
+        saved = len(block.text)
+        block.text = text
+        block.indexes = set(indexes) or block.indexes
+        return True, saved
+    overlap = overlap_length(block.text, text)
+    if overlap and _follows(block.indexes, indexes):
+        block.text = block.text + text[overlap:]
+        block.indexes |= indexes
+        return True, overlap
+    overlap = overlap_length(text, block.text)
+    if overlap and _follows(indexes, block.indexes):
+        block.text = text[:-overlap] + block.text
+        block.indexes |= indexes
+        return True, overlap
+    return False, 0
+
+def _coalesce(section_blocks: List[_Block]) -> Tuple[List[_Block], int]:
+    """Merge blocks that became contiguous once later chunks bridged them."""
+    saved_chars = 0
+    merged_any = True
+    while merged_any and len(section_blocks) > 1:
+        merged_any = False
+        for i, keep in enumerate(section_blocks):
+            for other in section_blocks[i + 1:]:
+                merged, saved = _try_merge(keep, other.text, other.indexes)
+                if merged:
+                    keep.rank = min(keep.rank, other.rank)
+                    keep.members += other.members
+                    saved_chars += saved
+                    section_blocks.remove(other)
+                    merged_any = True
+                    break
+            if merged_any:
+                break
+    return section_blocks, saved_chars
+
+class ContextPacker:
+    """Packs ranked chunks into at most token_budget tokens; keeps running savings counters."""
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET):
+        self.token_budget = token_budget
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.candidate_tokens = 0
+        self.packed_tokens = 0
+        self.overlap_tokens_removed = 0
+        self.dropped_tokens = 0
+        self.last: Dict[str, Any] = {}
+
+    def pack(self, docs: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+        """Return packed documents (relevance order) and per-request token stats."""
+        by_section: Dict[Tuple[str, str], List[_Block]] = {}
+        saved_chars = 0
+        for rank, doc in enumerate(docs):
+            if not doc.page_content:
+                continue
+            index = _chunk_index(doc)
+            section_blocks = by_section.setdefault(_section_key(doc), [])
+            merged = False
+            for block in section_blocks:
+                merged, saved = _try_merge(block, doc.page_content, {index} if index is not None else set())
+                if merged:
+                    block.members += 1
+                    saved_chars += saved
+                    break
+            if not merged:
+                section_blocks.append(_Block(doc, rank, index))
+        blocks: List[_Block] = []
+        for section_blocks in by_section.values():
+            section_blocks, saved = _coalesce(section_blocks)
+            saved_chars += saved
+            blocks.extend(section_blocks)
+
+        # Fill the budget by relevance (a block ranks as its best member); always keep the top one
+        packed: List[Document] = []
+        used = dropped = 0
+        for block in sorted(blocks, key=lambda b: b.rank):
+            tokens = estimate_tokens(block.text)
+            if packed and used + tokens > self.token_budget:
+                dropped += tokens
+                continue
+            text = block.text
+            if not packed and tokens > self.token_budget:
+                text = text[:self.token_budget * 4]
+                dropped += tokens - estimate_tokens(text)
+                tokens = estimate_tokens(text)
+            packed.append(Document(page_content=text, metadata={**block.metadata, "packed_chunks": block.members}))
+            used += tokens
+
+        candidate_tokens = sum(estimate_tokens(d.page_content) for d in docs)
+        # What the unpacked path would have sent: the first TOP_K_RETRIEVE unique chunks
+        baseline_tokens = sum(estimate_tokens(d.page_content) for d in docs[:TOP_K_RETRIEVE])
+        stats = {
+            "candidates": len(docs),
+            "blocks": len(packed),
+            "candidate_tokens": candidate_tokens,
+            "baseline_tokens": baseline_tokens,
+            "packed_tokens": used,
+            "overlap_tokens_removed": saved_chars // 4,
+            "dropped_tokens": dropped,
+            "token_budget": self.token_budget,
+        }
+        with self._lock:
+            self.requests += 1
+            self.candidate_tokens += candidate_tokens
+            self.packed_tokens += used
+            self.overlap_tokens_removed += stats["overlap_tokens_removed"]
+            self.dropped_tokens += dropped
+            self.last = stats
+        logger.info(
+            f"Context packed: {len(docs)} chunks -> {len(packed)} blocks, {used}/{self.token_budget} tokens, "
+            f"{stats['overlap_tokens_removed']} overlap tokens removed, {dropped} over budget"
+        )
+        return packed, stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "token_budget": self.token_budget,
+                "candidate_tokens": self.candidate_tokens,
+                "packed_tokens": self.packed_tokens,
+                "overlap_tokens_removed": self.overlap_tokens_removed,
+                "dropped_tokens": self.dropped_tokens,
+                "avg_tokens_saved_per_request": round(self.overlap_tokens_removed / self.requests, 1) if self.requests else 0.0,
+                "last": self.last,
+            }
+
+# Global packer used by the RAG chain
+context_packer = ContextPacker()
+
+def get_packer_stats() -> Dict[str, Any]:
+    """Get token counters for the context packer."""
+    return context_packer.stats()
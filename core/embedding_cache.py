@@ -0,0 +1,223 @@
+"""
+Process-wide query-embedding cache.
+Query vectors are keyed by (model, normalized text) and kept in a size-bounded
+LRU with TTL expiry. An optional SQLite file lets the cache survive restarts.
+"""
+
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.embeddings import Embeddings
+from core.config import QUERY_EMBED_CACHE_SIZE, QUERY_EMBED_CACHE_TTL_SECONDS, QUERY_EMBED_CACHE_PATH, COHERE_EMBEDDING_MODEL
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache keys (case and whitespace insensitive)."""
+    return " ".join(text.split()).casefold()
+
+class _DiskBackend:
+    """SQLite persistence for cached query vectors (float32 blobs)."""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "model TEXT NOT NULL, text TEXT NOT NULL, vector BLOB NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (model, text))"
+        )
+        self._conn.commit()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[List[float], float]]:
+        row = self._conn.execute(
+            "SELECT vector, created_at FROM query_embeddings WHERE model = ? AND text = ?", key
+        ).fetchone()
+        if row is None:
+            return None
+        return array("f", row[0]).tolist(), row[1]
+
+    def put(self, key: Tuple[str, str], vector: List[float], created_at: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO query_embeddings (model, text, vector, created_at) VALUES (?, ?, ?, ?)",
+            (key[0], key[1], array("f", vector).tobytes(), created_at)
+        )
+        self._conn.commit()
+
+    def delete(self, key: Tuple[str, str]) -> None:
+        self._conn.execute("DELETE FROM query_embeddings WHERE model = ? AND text = ?", key)
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM query_embeddings")
+        self._conn.commit()
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU + TTL cache of query vectors with hit/miss counters."""
+
+    def __init__(self, max_entries: int = QUERY_EMBED_CACHE_SIZE, ttl_seconds: float = QUERY_EMBED_CACHE_TTL_SECONDS, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[_DiskBackend] = None
+        if disk_path:
+            try:
+                self._disk = _DiskBackend(disk_path)
+            except Exception as e:
+                logger.warning(f"Query embedding disk cache disabled ({disk_path}): {e}")
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, normalize_query(text))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self.expirations += 1
+            if self._disk is not None:
+                stored = self._disk.get(key)
+                if stored is not None and not self._expired(stored[1], now):
+                    self._store(key, stored[0], stored[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return stored[0]
+                if stored is not None:
+                    self._disk.delete(key)
+                    self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        key = (model, normalize_query(text))
+        now = time.time()
+        with self._lock:
+            self._store(key, vector, now)
+            if self._disk is not None:
+                self._disk.put(key, vector, now)
+
+    def _store(self, key: Tuple[str, str], vector: List[float], created_at: float) -> None:
+        self._entries[key] = (vector, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._disk is not None:
+                self._disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "persistent": self._disk is not None,
+            }
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings wrapper that serves query vectors from the process-wide cache.
+    Document embedding (ingest) is passed straight through.
+    """
+
+    def __init__(self, embeddings: Any, model: str, cache: QueryEmbeddingCache):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text], input_type="search_query")[0]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed([text], input_type="search_query"))[0]
+
+    def _lookup(self, texts: List[str]) -> Tuple[List[Optional[List[float]]], List[int]]:
+        vectors = [self.cache.get(self.model, t) for t in texts]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        return vectors, missing
+
+    def _fill(self, texts: List[str], vectors: List[Optional[List[float]]], missing: List[int], fetched: List[List[float]]) -> List[List[float]]:
+        for i, vector in zip(missing, fetched):
+            vectors[i] = vector
+            self.cache.put(self.model, texts[i], vector)
+        return vectors  # type: ignore[return-value]
+
+    def embed(self, texts: List[str], *, input_type: Optional[str] = None) -> List[List[float]]:
+        """Batch-embed texts; query-type batches only send cache misses upstream."""
+        if input_type != "search_query":
+            if hasattr(self.embeddings, "embed"):
+                return self.embeddings.embed(texts, input_type=input_type)
+            return self.embeddings.embed_documents(texts)
+        vectors, missing = self._lookup(texts)
+        if missing:
+            fetched = self._embed_queries_upstream([texts[i] for i in missing])
+            self._fill(texts, vectors, missing, fetched)
+        return vectors  # type: ignore[return-value]
+
+    async def aembed(self, texts: List[str], *, input_type: Optional[str] = None) -> List[List[float]]:
+        """Async variant of embed()."""
+        if input_type != "search_query":
+            if hasattr(self.embeddings, "aembed"):
+                return await self.embeddings.aembed(texts, input_type=input_type)
+            return await self.embeddings.aembed_documents(texts)
+        vectors, missing = self._lookup(texts)
+        if missing:
+            fetched = await self._aembed_queries_upstream([texts[i] for i in missing])
+            self._fill(texts, vectors, missing, fetched)
+        return vectors  # type: ignore[return-value]
+
+    def _embed_queries_upstream(self, texts: List[str]) -> List[List[float]]:
+        if hasattr(self.embeddings, "embed"):
+            return self.embeddings.embed(texts, input_type="search_query")
+        return [self.embeddings.embed_query(t) for t in texts]
+
+    async def _aembed_queries_upstream(self, texts: List[str]) -> List[List[float]]:
+        if hasattr(self.embeddings, "aembed"):
+            return await self.embeddings.aembed(texts, input_type="search_query")
+        return [await self.embeddings.aembed_query(t) for t in texts]
+
+# Process-wide cache and wrapped embeddings (one per model)
+query_embedding_cache = QueryEmbeddingCache(disk_path=QUERY_EMBED_CACHE_PATH or None)
+_cached_embeddings: Dict[str, CachedQueryEmbeddings] = {}
+
+def get_query_embeddings(model: str = COHERE_EMBEDDING_MODEL) -> CachedQueryEmbeddings:
+    """Get the shared, cache-backed Cohere embeddings for a model."""
+    if model not in _cached_embeddings:
+        from core.clients import get_cohere_embeddings
+        _cached_embeddings[model] = CachedQueryEmbeddings(get_cohere_embeddings(model), model, query_embedding_cache)
+    return _cached_embeddings[model]
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Get hit/miss counters for the query-embedding cache."""
+    return query_embedding_cache.stats()
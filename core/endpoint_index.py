@@ -0,0 +1,146 @@
+"""
+In-memory endpoint index built at ingest.
+Path templates are stored in a segment trie (one node per path segment, with a
+single wildcard child for template parameters such as {id}, :id or <id>), and
+each terminal node maps HTTP methods to the endpoint and its chunks. Resolving a
+concrete path like /users/123 or a templated one like /users/{userId} walks the
+trie once, so explicit "METHOD /path" questions can skip vector search.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from core.config import ENDPOINT_INDEX_MAX_CHUNKS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_PARAM_SEGMENT = re.compile(r"^(\{[^}]*\}|:[A-Za-z_]\w*|<[^>]*>)$")
+# Path-like tokens in chunk text, with an optional scheme/host in front (cURL URLs)
+_PATH_TOKEN = re.compile(r"(?:https?://[^/\s`'\"]+)?(/[A-Za-z0-9_\-{}:<>.~%/]+)")
+
+def split_path(path: str) -> List[str]:
+    """Normalize a path (drop scheme/host, query, fragment, trailing slash) into segments."""
+    path = re.sub(r"^[a-zA-Z]+://[^/]+", "", path.strip().strip("`'\""))
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    return [segment for segment in path.split("/") if segment]
+
+def is_param(segment: str) -> bool:
+    return bool(_PARAM_SEGMENT.match(segment))
+
+class EndpointMatch:
+    """A resolved endpoint: its template, method, catalog entry and related chunks."""
+    __slots__ = ("method", "template", "endpoint", "documents")
+
+    def __init__(self, method: str, template: str, endpoint: Dict[str, Any], documents: List[Document]):
+        self.method = method
+        self.template = template
+        self.endpoint = endpoint
+        self.documents = documents
+
+class _Node:
+    __slots__ = ("children", "param", "methods")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        self.methods: Dict[str, EndpointMatch] = {}
+
+class EndpointIndex:
+    """Segment trie over endpoint path templates, keyed by method at the leaves."""
+
+    def __init__(self, base_paths: Optional[Iterable[str]] = None):
+        self._root = _Node()
+        self.endpoint_count = 0
+        # Path prefixes of the detected base URLs (e.g. /v1), tried when a full path misses
+        self._base_prefixes = sorted(
+            {tuple(split_path(p)) for p in (base_paths or []) if split_path(p)}, key=len, reverse=True
+        )
+
+    def add(self, method: str, template: str, endpoint: Dict[str, Any]) -> EndpointMatch:
+        node = self._root
+        for segment in split_path(template):
+            if is_param(segment):
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        method = method.upper()
+        match = node.methods.get(method)
+        if match is None:
+            match = EndpointMatch(method, template, endpoint, [])
+            node.methods[method] = match
+            self.endpoint_count += 1
+        return match
+
+    def _walk(self, segments: List[str]) -> Optional[_Node]:
+        # Literal segments win over parameters; backtrack only when a literal branch dead-ends
+        stack: List[Tuple[_Node, int]] = [(self._root, 0)]
+        while stack:
+            node, i = stack.pop()
+            if i == len(segments):
+                if node.methods:
+                    return node
+                continue
+            segment = segments[i]
+            if node.param is not None:
+                stack.append((node.param, i + 1))
+            if not is_param(segment) and segment in node.children:
+                stack.append((node.children[segment], i + 1))
+        return None
+
+    def _find_node(self, path: str) -> Optional[_Node]:
+        segments = split_path(path)
+        if not segments:
+            return None
+        node = self._walk(segments)
+        if node is None:
+            for prefix in self._base_prefixes:
+                if tuple(segments[:len(prefix)]) == prefix and len(segments) > len(prefix):
+                    node = self._walk(segments[len(prefix):])
+                    if node is not None:
+                        break
+        return node
+
+    def lookup(self, method: Optional[str], path: str) -> Optional[EndpointMatch]:
+        """Resolve a concrete or templated path for a method (any method if None)."""
+        node = self._find_node(path)
+        if node is None:
+            return None
+        if method:
+            return node.methods.get(method.upper())
+        return next(iter(node.methods.values()))
+
+    def lookup_all(self, path: str) -> List[EndpointMatch]:
+        node = self._find_node(path)
+        return list(node.methods.values()) if node is not None else []
+
+    def attach_documents(self, documents: List[Document], max_chunks: int = ENDPOINT_INDEX_MAX_CHUNKS) -> None:
+        """Link each document to the endpoints whose paths it mentions (endpoint docs first)."""
+        for doc in documents:
+            meta = doc.metadata or {}
+            if meta.get("section") == "endpoint" and meta.get("endpoint"):
+                match = self.lookup(meta.get("http_method"), meta["endpoint"])
+                if match is not None and doc not in match.documents:
+                    match.documents.insert(0, doc)
+                continue
+            seen = set()
+            for token in _PATH_TOKEN.finditer(doc.page_content):
+                path = token.group(1).rstrip(".,;:)")
+                if path in seen:
+                    continue
+                seen.add(path)
+                for match in self.lookup_all(path):
+                    if len(match.documents) < max_chunks and doc not in match.documents:
+                        match.documents.append(doc)
+
+def build_endpoint_index(endpoints: List[Dict[str, Any]], documents: Optional[List[Document]] = None, base_urls: Optional[List[str]] = None) -> EndpointIndex:
+    """Build the index from the extracted endpoint catalog and the ingested documents."""
+    index = EndpointIndex(base_urls)
+    for e in endpoints:
+        if e.get("http_method") and e.get("endpoint"):
+            index.add(e["http_method"], e["endpoint"], e)
+    if documents:
+        index.attach_documents(documents)
+    logger.info(f"Endpoint index built: {index.endpoint_count} endpoints")
+    return index
@@ -0,0 +1,243 @@
+"""
+LLM endpoint recall for /docs/process.
+The document is split along its markdown header sections (the same h1/h2 split
+used for chunking); adjacent short sections are grouped and long ones cut at
+line boundaries so every LLM call sees a bounded slice. Slices are sent to the
+chat model in parallel with bounded concurrency, each answer is checked
+against the slice it came from (the path must appear in that text), and the
+results are merged by (method, path). Answers are cached by slice hash, so
+re-ingesting an unchanged document makes no LLM calls and an edited document
+only re-asks about the sections that changed.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from core.config import (
+    ANTHROPIC_API_KEY, ANTHROPIC_MODEL, ENDPOINT_RECALL_ENABLED, ENDPOINT_RECALL_CONCURRENCY,
+    ENDPOINT_RECALL_MIN_CHARS, ENDPOINT_RECALL_MAX_CHARS, ENDPOINT_RECALL_MAX_TOKENS,
+    ENDPOINT_RECALL_CACHE_SIZE, ENDPOINT_RECALL_CACHE_PATH
+)
+from utils.helpers import build_section_path
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HTTP_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"}
+
+# Bump when the prompt or parsing changes so cached answers are not reused
+PROMPT_VERSION = "1"
+
+PROMPT = (
+    "You are reading one section of API docs. Extract unique endpoints explicitly mentioned.\n"
+    "Return STRICT JSON: {\n  \"endpoints\": [ { \"method\": \"GET|POST|...\", \"path\": \"/path\", \"summary\": \"...\" } ]\n}\n"
+    "Do not invent. Only include items that actually appear in the text. "
+    "Return {\"endpoints\": []} if there are none.\n\nSECTION:\n"
+)
+
+def section_slices(sections: List[Document], min_chars: int = ENDPOINT_RECALL_MIN_CHARS, max_chars: int = ENDPOINT_RECALL_MAX_CHARS) -> List[str]:
+    """Turn header sections into LLM-sized slices.
+    Each section is prefixed with its header path (the splitter strips headers);
+    adjacent sections are grouped until min_chars, and sections over max_chars
+    are cut at line boundaries.
+    """
+    pieces: List[str] = []
+    for section in sections:
+        path = build_section_path(section.metadata)
+        text = (f"# {path}\n" if path else "") + section.page_content.strip()
+        if len(text) <= max_chars:
+            pieces.append(text)
+            continue
+        current = ""
+        for line in text.splitlines(keepends=True):
+            while len(line) > max_chars:
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(line[:max_chars])
+                line = line[max_chars:]
+            if len(current) + len(line) > max_chars:
+                pieces.append(current)
+                current = ""
+            current += line
+        if current.strip():
+            pieces.append(current)
+
+    slices: List[str] = []
+    group = ""
+    for piece in pieces:
+        if group and len(group) + len(piece) + 2 > max_chars:
+            slices.append(group)
+            group = ""
+        group = f"{group}\n\n{piece}" if group else piece
+        if len(group) >= min_chars:
+            slices.append(group)
+            group = ""
+    if group.strip():
+        slices.append(group)
+    return slices
+
+def slice_hash(text: str, model: str = ANTHROPIC_MODEL) -> str:
+    return hashlib.sha256(f"{PROMPT_VERSION}\x1f{model}\x1f{text}".encode("utf-8")).hexdigest()
+
+def parse_recall_response(text_response: str) -> List[Dict[str, Any]]:
+    """Endpoints from the model's JSON answer, normalized to extract_endpoints_from_text's shape."""
+    m = re.search(r"\{[\s\S]*\}", text_response)
+    data = json.loads(m.group(0)) if m else json.loads(text_response)
+    items = data.get("endpoints") if isinstance(data, dict) else None
+    out: List[Dict[str, Any]] = []
+    if isinstance(items, list):
+        for it in items:
+            if not isinstance(it, dict):
+                continue
+            method = str(it.get("method", "")).upper().strip()
+            path = str(it.get("path", "")).strip()
+            summary = str(it.get("summary", "")).strip() if it.get("summary") else ""
+            if method in HTTP_METHODS and path:
+                if not path.startswith('/') and not re.match(r"(?i)^https?://", path):
+                    path = "/" + path
+                out.append({"http_method": method, "endpoint": path, "summary": summary})
+    return out
+
+def _present_in(text: str, path: str) -> bool:
+    """The model may only report paths that literally occur in its slice."""
+    return path in text or path.lstrip("/") in text
+
+class RecallCache:
+    """Thread-safe LRU of per-slice recall answers, optionally persisted to SQLite."""
+
+    def __init__(self, max_entries: int = ENDPOINT_RECALL_CACHE_SIZE, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if disk_path:
+            try:
+                self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS endpoint_recall (hash TEXT PRIMARY KEY, endpoints TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._conn.commit()
+            except Exception as e:
+                logger.warning(f"Endpoint recall disk cache disabled ({disk_path}): {e}")
+                self._conn = None
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT endpoints FROM endpoint_recall WHERE hash = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value = json.loads(row[0])
+            self._store(key, value)
+            return value
+
+    def put(self, key: str, endpoints: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._store(key, endpoints)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO endpoint_recall (hash, endpoints, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(endpoints), time.time())
+                )
+                self._conn.commit()
+
+    def _store(self, key: str, endpoints: List[Dict[str, Any]]) -> None:
+        self._entries[key] = endpoints
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM endpoint_recall")
+                self._conn.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+recall_cache = RecallCache(disk_path=ENDPOINT_RECALL_CACHE_PATH or None)
+
+def _ask(llm: Any, text: str) -> Tuple[List[Dict[str, Any]], int]:
+    """(endpoints found in the slice, number of answers rejected as not present in it)."""
+    resp = llm.invoke(PROMPT + text)
+    text_response = getattr(resp, 'content', None) or (resp if isinstance(resp, str) else str(resp))
+    proposed = parse_recall_response(text_response)
+    kept = [e for e in proposed if _present_in(text, e["endpoint"])]
+    return kept, len(proposed) - len(kept)
+
+def recall_endpoints(sections: List[Document], concurrency: int = ENDPOINT_RECALL_CONCURRENCY, llm: Any = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Map the LLM over the document's header sections and reduce to unique endpoints.
+    Returns (endpoints, stats). Failed slices are logged, skipped and not cached.
+    """
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {"slices": 0, "llm_calls": 0, "cache_hits": 0, "failed": 0, "rejected": 0, "endpoints": 0, "elapsed_ms": 0.0}
+    if not ENDPOINT_RECALL_ENABLED or (llm is None and not ANTHROPIC_API_KEY):
+        return [], stats
+
+    slices = section_slices(sections)
+    keys = [slice_hash(text) for text in slices]
+    stats["slices"] = len(slices)
+    answers: Dict[str, List[Dict[str, Any]]] = {}
+    pending: Dict[str, str] = {}
+    for key, text in zip(keys, slices):
+        cached = recall_cache.get(key)
+        if cached is not None:
+            answers[key] = cached
+            stats["cache_hits"] += 1
+        else:
+            pending.setdefault(key, text)
+
+    if pending:
+        if llm is None:
+            from core.clients import get_chat_model
+            llm = get_chat_model(temperature=0, max_tokens=ENDPOINT_RECALL_MAX_TOKENS, model=ANTHROPIC_MODEL)
+
+        def _map(item: Tuple[str, str]) -> Tuple[str, Optional[Tuple[List[Dict[str, Any]], int]]]:
+            key, text = item
+            try:
+                return key, _ask(llm, text)
+            except Exception as e:
+                logger.warning(f"Endpoint recall failed for a {len(text)}-char section: {e}")
+                return key, None
+
+        stats["llm_calls"] = len(pending)
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending))), thread_name_prefix="rag-recall") as pool:
+            for key, result in pool.map(_map, pending.items()):
+                if result is None:
+                    stats["failed"] += 1
+                    continue
+                found, rejected = result
+                stats["rejected"] += rejected
+                recall_cache.put(key, found)
+                answers[key] = found
+
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for key in keys:
+        for e in answers.get(key, []):
+            ep = (e["http_method"], e["endpoint"])
+            if ep not in merged:
+                merged[ep] = dict(e)
+            elif e.get("summary") and not merged[ep].get("summary"):
+                merged[ep]["summary"] = e["summary"]
+
+    stats["endpoints"] = len(merged)
+    stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    logger.info(
+        f"Endpoint recall: {stats['endpoints']} endpoints from {stats['slices']} sections "
+        f"({stats['llm_calls']} LLM calls, {stats['cache_hits']} cached, {stats['failed']} failed) in {stats['elapsed_ms']} ms"
+    )
+    return list(merged.values()), stats
@@ -0,0 +1,293 @@
+"""
+Ingest pipeline for /docs/process.
+Every chunk carries a stable content hash (also its Weaviate object id), so a
+re-upload only embeds chunks that are new. Each ingest builds a new generation
+of the class (<index>_G<ns>; Weaviate cannot rename classes): unchanged chunks
+are copied from the live generation with their stored vectors and current
+metadata, new ones are embedded and written, and the live class is never
+touched. The caller swaps the new class into state and then retires the older
+generations. Embedding cost scales with the diff, but the copy scales with the
+document: every unchanged object is read with its vector and rewritten, which
+the stats report as copied_chunks / copy_ms. Embedding runs in fixed-size
+batches with bounded concurrency and
+retry/backoff; writes use the Weaviate batch API. Per-stage timings and
+throughput are returned alongside the vector store.
+"""
+
+import hashlib
+import json
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+from langchain_community.vectorstores import Weaviate as WeaviateStore
+from core.config import (
+    INGEST_EMBED_BATCH_SIZE, INGEST_EMBED_CONCURRENCY, INGEST_WRITE_BATCH_SIZE,
+    INGEST_WRITE_WORKERS, INGEST_MAX_RETRIES, INGEST_RETRY_BACKOFF_SECONDS
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TEXT_KEY = "page_content"
+HASH_KEY = "content_hash"
+INDEX_KEY = "chunk_index"
+
+# Metadata that changes when neighbouring chunks change; excluded from the hash
+_UNHASHED_KEYS = {INDEX_KEY, HASH_KEY}
+
+# <index>_G<time_ns>: one generation of an index's class
+_GENERATION = re.compile(r"^(?P<base>.+)_G(?P<gen>\d{16,})$")
+
+# Called with (embedded_so_far, total) as embedding batches complete
+ProgressCallback = Callable[[int, int], None]
+
+def _with_retry(func: Any, *args: Any, max_retries: int = INGEST_MAX_RETRIES, backoff: float = INGEST_RETRY_BACKOFF_SECONDS) -> Any:
+    """Call func, retrying with exponential backoff and jitter on failure."""
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            logger.warning(f"Ingest call failed (attempt {attempt + 1}/{max_retries + 1}), retrying in {delay:.2f}s: {e}")
+            time.sleep(delay)
+
+def embed_in_batches(embeddings: Any, texts: List[str], batch_size: int = INGEST_EMBED_BATCH_SIZE, concurrency: int = INGEST_EMBED_CONCURRENCY, on_progress: Optional[ProgressCallback] = None) -> List[List[float]]:
+    """Embed texts in batches of batch_size with at most `concurrency` requests in flight."""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    if not batches:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(batches))), thread_name_prefix="rag-embed") as pool:
+        results = pool.map(lambda batch: _with_retry(embeddings.embed_documents, batch), batches)
+        vectors: List[List[float]] = []
+        for batch_vectors in results:
+            vectors.extend(batch_vectors)
+            if on_progress:
+                on_progress(len(vectors), len(texts))
+    return vectors
+
+def content_hash(doc: Document) -> str:
+    """Stable hash of a chunk's text and the metadata that describes it."""
+    meta = {k: v for k, v in doc.metadata.items() if k not in _UNHASHED_KEYS and v is not None}
+    payload = doc.page_content + "\x1f" + json.dumps(meta, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _class_properties(client: Any, index_name: str) -> List[str]:
+    return [p.get("name") for p in client.schema.get(index_name).get("properties", [])]
+
+def new_class_name(index_name: str) -> str:
+    """Class name for a new generation of index_name."""
+    return f"{index_name}_G{time.time_ns()}"
+
+def class_generations(client: Any, index_name: str) -> List[str]:
+    """Existing classes holding generations of index_name, newest first (a bare index_name counts as oldest)."""
+    found: List[Tuple[int, str]] = []
+    for cls in client.schema.get().get("classes", []):
+        name = cls.get("class") or ""
+        m = _GENERATION.match(name)
+        if name == index_name:
+            found.append((0, name))
+        elif m and m.group("base") == index_name:
+            found.append((int(m.group("gen")), name))
+    return [name for _, name in sorted(found, reverse=True)]
+
+def generation_of(class_name: str) -> int:
+    """Generation number of a class name (0 for a bare, pre-generation class)."""
+    m = _GENERATION.match(class_name)
+    return int(m.group("gen")) if m else 0
+
+def drop_class(client: Any, class_name: str) -> bool:
+    """Delete a class if it exists. Failures are logged, not raised. Returns whether it was deleted."""
+    try:
+        if client.schema.exists(class_name):
+            client.schema.delete_class(class_name)
+            return True
+    except Exception as e:
+        logger.warning(f"Could not delete class {class_name}: {e}")
+    return False
+
+def retire_classes(client: Any, index_name: str, keep: str) -> List[str]:
+    """Delete every generation of index_name except keep. Returns the deleted class names."""
+    retired = [name for name in class_generations(client, index_name) if name != keep]
+    for name in retired:
+        try:
+            client.schema.delete_class(name)
+        except Exception as e:
+            logger.warning(f"Could not delete retired class {name}: {e}")
+    if retired:
+        logger.info(f"Retired {len(retired)} old generation(s) of {index_name}: {retired}")
+    return retired
+
+def ensure_class(client: Any, index_name: str) -> None:
+    """Create the Weaviate class (bring-your-own vectors) if it does not exist yet.
+    Classes written before content hashing existed cannot be diffed and are rebuilt.
+    """
+    if client.schema.exists(index_name):
+        if HASH_KEY in _class_properties(client, index_name):
+            return
+        logger.info(f"Class {index_name} has no {HASH_KEY} property, rebuilding it")
+        client.schema.delete_class(index_name)
+    client.schema.create_class({
+        "class": index_name,
+        "vectorizer": "none",
+        "properties": [
+            {"name": TEXT_KEY, "dataType": ["text"]},
+            {"name": HASH_KEY, "dataType": ["text"], "tokenization": "field"},
+        ],
+    })
+
+def iter_stored_vectors(client: Any, index_name: str, page_size: int = 500) -> Iterator[Tuple[str, List[float], Optional[int]]]:
+    """Yield (content hash, vector, stored chunk_index) for every object in the class (cursor pagination).
+    Classes without a content hash property yield nothing.
+    """
+    properties = _class_properties(client, index_name)
+    if HASH_KEY not in properties:
+        return
+    fields = [HASH_KEY] + ([INDEX_KEY] if INDEX_KEY in properties else [])
+    after: Optional[str] = None
+    while True:
+        query = client.query.get(index_name, fields).with_additional(["id", "vector"]).with_limit(page_size)
+        if after:
+            query = query.with_after(after)
+        objects = query.do().get("data", {}).get("Get", {}).get(index_name, []) or []
+        if not objects:
+            break
+        for obj in objects:
+            vector = obj.get("_additional", {}).get("vector")
+            if obj.get(HASH_KEY) and vector:
+                yield obj[HASH_KEY], vector, obj.get(INDEX_KEY)
+        after = objects[-1].get("_additional", {}).get("id")
+        if len(objects) < page_size:
+            break
+
+def _object_properties(doc: Document) -> Dict[str, Any]:
+    props = {k: v for k, v in doc.metadata.items() if v is not None}
+    props[TEXT_KEY] = doc.page_content
+    return props
+
+def write_objects(client: Any, index_name: str, objects: Iterable[Tuple[Document, List[float], Optional[str]]], batch_size: int = INGEST_WRITE_BATCH_SIZE, num_workers: int = INGEST_WRITE_WORKERS) -> int:
+    """Write (document, vector, uuid) triples using the Weaviate batch API. Returns error count.
+    objects may be a generator; it is consumed inside one batch context.
+    """
+    errors: List[Any] = []
+
+    def _collect_errors(results: Optional[List[Dict[str, Any]]]) -> None:
+        for result in results or []:
+            err = result.get("result", {}).get("errors")
+            if err:
+                errors.append(err)
+
+    client.batch.configure(batch_size=batch_size, num_workers=num_workers, callback=_collect_errors)
+    with client.batch as batch:
+        for doc, vector, uuid in objects:
+            batch.add_data_object(_object_properties(doc), index_name, uuid=uuid, vector=vector)
+    if errors:
+        logger.error(f"Weaviate batch write reported {len(errors)} errors, first: {errors[0]}")
+    return len(errors)
+
+def write_to_weaviate(client: Any, index_name: str, docs: List[Document], vectors: List[List[float]], uuids: Optional[List[str]] = None, batch_size: int = INGEST_WRITE_BATCH_SIZE, num_workers: int = INGEST_WRITE_WORKERS) -> int:
+    """Write documents with precomputed vectors using the Weaviate batch API. Returns error count."""
+    return write_objects(client, index_name, zip(docs, vectors, uuids or [None] * len(docs)), batch_size, num_workers)
+
+def count_objects(client: Any, index_name: str) -> int:
+    """Count objects in a Weaviate class via the aggregate API."""
+    result = client.query.aggregate(index_name).with_meta_count().do()
+    return result.get("data", {}).get("Aggregate", {}).get(index_name, [{}])[0].get("meta", {}).get("count", 0)
+
+def open_vector_store(client: Any, index_name: str, embeddings: Any, attributes: List[str]) -> WeaviateStore:
+    """Open a LangChain Weaviate store over an existing class."""
+    return WeaviateStore(
+        client=client,
+        index_name=index_name,
+        text_key=TEXT_KEY,
+        embedding=embeddings,
+        attributes=attributes,
+        by_text=False
+    )
+
+def ingest_documents(client: Any, embeddings: Any, index_name: str, class_name: str, docs: List[Document], on_progress: Optional[ProgressCallback] = None) -> Tuple[WeaviateStore, Dict[str, Any]]:
+    """Build class_name as the next generation of index_name, returning its vector store and per-stage stats.
+    Chunks already stored in the live generation are copied with their vectors (and
+    current chunk_index); only chunks whose content hash is new are embedded. The
+    live generation is left untouched; on failure the new class is deleted.
+    """
+    import weaviate
+
+    started = time.perf_counter()
+
+    # Hash every chunk; identical chunks collapse into one object
+    unique: Dict[str, Document] = {}
+    for doc in docs:
+        h = content_hash(doc)
+        doc.metadata[HASH_KEY] = h
+        unique.setdefault(h, doc)
+
+    generations = [name for name in class_generations(client, index_name) if name != class_name]
+    live = generations[0] if generations else None
+    ensure_class(client, class_name)
+    try:
+        # Copy unchanged chunks from the live generation, streaming page by page
+        copy_start = time.perf_counter()
+        kept: Dict[str, bool] = {}
+        vanished = 0
+
+        def _unchanged() -> Iterator[Tuple[Document, List[float], Optional[str]]]:
+            nonlocal vanished
+            for h, vector, stored_index in iter_stored_vectors(client, live):
+                if h not in unique:
+                    vanished += 1
+                elif h not in kept:
+                    kept[h] = stored_index != unique[h].metadata.get(INDEX_KEY)
+                    yield unique[h], vector, weaviate.util.generate_uuid5(h, index_name)
+
+        copy_errors = write_objects(client, class_name, _unchanged()) if live else 0
+        copy_ms = (time.perf_counter() - copy_start) * 1000.0
+        new_hashes = [h for h in unique if h not in kept]
+        new_docs = [unique[h] for h in new_hashes]
+
+        embed_start = time.perf_counter()
+        vectors = embed_in_batches(embeddings, [d.page_content for d in new_docs], on_progress=on_progress)
+        embed_ms = (time.perf_counter() - embed_start) * 1000.0
+
+        write_start = time.perf_counter()
+        uuids = [weaviate.util.generate_uuid5(h, index_name) for h in new_hashes]
+        write_errors = write_to_weaviate(client, class_name, new_docs, vectors, uuids=uuids) if new_docs else 0
+        write_ms = (time.perf_counter() - write_start) * 1000.0
+
+        stored_count = count_objects(client, class_name)
+    except Exception:
+        drop_class(client, class_name)
+        raise
+    total_ms = (time.perf_counter() - started) * 1000.0
+
+    attributes = sorted({k for d in docs for k in d.metadata.keys()})
+    vector_store = open_vector_store(client, class_name, embeddings, attributes)
+
+    stats = {
+        "class_name": class_name,
+        "previous_class": live,
+        "chunks": len(docs),
+        "new_chunks": len(new_docs),
+        "unchanged_chunks": len(kept),
+        "deleted_chunks": vanished,
+        "reindexed_chunks": sum(kept.values()),
+        "copied_chunks": len(kept),
+        "stored_count": stored_count,
+        "write_errors": copy_errors + write_errors,
+        "copy_ms": round(copy_ms, 2),
+        "embed_ms": round(embed_ms, 2),
+        "write_ms": round(write_ms, 2),
+        "total_ms": round(total_ms, 2),
+        "embed_chunks_per_s": round(len(new_docs) / (embed_ms / 1000.0), 2) if embed_ms else 0.0,
+        "copy_chunks_per_s": round(len(kept) / (copy_ms / 1000.0), 2) if copy_ms else 0.0,
+        "write_chunks_per_s": round(len(new_docs) / (write_ms / 1000.0), 2) if write_ms else 0.0,
+        "chunks_per_s": round(len(docs) / (total_ms / 1000.0), 2) if total_ms else 0.0,
+        "embed_batch_size": INGEST_EMBED_BATCH_SIZE,
+        "embed_concurrency": INGEST_EMBED_CONCURRENCY,
+    }
+    logger.info(f"Ingested {len(docs)} chunks into {class_name}: {stats}")
+    return vector_store, stats
@@ -0,0 +1,96 @@
+"""
+Background ingestion jobs.
+/docs/process registers a job and returns its id immediately; the ingest
+coroutine reports stage, progress, chunk counts and per-stage timings here so
+/docs/jobs/{id} can be polled.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from core.config import MAX_JOB_HISTORY
+
+class IngestJob:
+    """Progress record for one /docs/process run."""
+
+    def __init__(self, title: str):
+        self.id = uuid.uuid4().hex
+        self.title = title
+        self.status = "queued"          # queued | running | completed | failed
+        self.stage = "queued"
+        self.percent = 0
+        self.counts: Dict[str, int] = {}
+        self.timings_ms: Dict[str, float] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._stage_started: Optional[float] = None
+
+    def _close_stage(self) -> None:
+        if self._stage_started is not None and self.stage not in ("queued", "completed", "failed"):
+            self.timings_ms[self.stage] = round((time.perf_counter() - self._stage_started) * 1000.0, 2)
+        self._stage_started = None
+
+    def set_stage(self, stage: str, percent: int) -> None:
+        """Enter a new stage, recording how long the previous one took."""
+        if self.started_at is None:
+            self.started_at = time.time()
+            self.status = "running"
+        self._close_stage()
+        self.stage = stage
+        self.percent = percent
+        self._stage_started = time.perf_counter()
+
+    def set_counts(self, **counts: int) -> None:
+        self.counts.update(counts)
+
+    def complete(self, result: Dict[str, Any]) -> None:
+        self._close_stage()
+        self.status = self.stage = "completed"
+        self.percent = 100
+        self.result = result
+        self.finished_at = time.time()
+
+    def fail(self, error: str) -> None:
+        self._close_stage()
+        self.status = "failed"
+        self.error = error
+        self.finished_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "title": self.title,
+            "status": self.status,
+            "stage": self.stage,
+            "percent": self.percent,
+            "counts": dict(self.counts),
+            "timings_ms": dict(self.timings_ms),
+            "elapsed_ms": round((end - (self.started_at or self.created_at)) * 1000.0, 2),
+            "result": self.result,
+            "error": self.error,
+        }
+
+# Recent jobs, oldest first
+jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+
+def create_job(title: str) -> IngestJob:
+    """Register a new job, dropping the oldest finished ones beyond MAX_JOB_HISTORY."""
+    job = IngestJob(title)
+    jobs[job.id] = job
+    for job_id in list(jobs.keys()):
+        if len(jobs) <= MAX_JOB_HISTORY:
+            break
+        if jobs[job_id].status in ("completed", "failed"):
+            del jobs[job_id]
+    return job
+
+def get_job(job_id: str) -> Optional[IngestJob]:
+    return jobs.get(job_id)
+
+def list_jobs() -> List[Dict[str, Any]]:
+    return [job.to_dict() for job in reversed(jobs.values())]
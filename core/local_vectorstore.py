@@ -0,0 +1,382 @@
+"""
+In-process vector store: a drop-in for Weaviate on small and medium deployments.
+Each index is a directory under LOCAL_VECTOR_DIR holding generations of
+  vectors.npy    - unit-normalized float32 (or float16) embeddings, memory-mapped
+  meta.sqlite3   - one row per vector: content hash, text and JSON metadata
+and a CURRENT file naming the live generation. Opening an index maps the file
+instead of loading it, so startup is near-instant. Search is brute-force cosine
+(a block-wise matrix-vector product) with top-k via argpartition, optional
+metadata filtering through the side table, and MMR. Re-ingest writes a new
+generation and flips CURRENT, so stores already serving keep a consistent view.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from core.config import LOCAL_VECTOR_DIR, LOCAL_VECTOR_DTYPE
+from core.ingest import HASH_KEY, INDEX_KEY, content_hash, embed_in_batches, ProgressCallback
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+META_FILE = "meta.sqlite3"
+CURRENT_FILE = "CURRENT"
+SCAN_BLOCK_ROWS = 65536  # Rows multiplied per block (bounds float16 upcast memory)
+
+_SAFE_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+def _mmr(query_scores: np.ndarray, candidates: np.ndarray, k: int, lambda_mult: float) -> List[int]:
+    """Maximal marginal relevance over unit vectors; returns candidate positions."""
+    if len(candidates) == 0:
+        return []
+    selected = [int(np.argmax(query_scores))]
+    max_sim = candidates @ candidates[selected[0]]
+    while len(selected) < min(k, len(candidates)):
+        scores = lambda_mult * query_scores - (1.0 - lambda_mult) * max_sim
+        scores[selected] = -np.inf
+        nxt = int(np.argmax(scores))
+        selected.append(nxt)
+        max_sim = np.maximum(max_sim, candidates @ candidates[nxt])
+    return selected
+
+def index_dir(index_name: str, root: str = LOCAL_VECTOR_DIR) -> str:
+    return os.path.join(root, index_name)
+
+def _current_generation(path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    gen = os.path.join(path, name)
+    return gen if os.path.isdir(gen) else None
+
+class LocalVectorStore(VectorStore):
+    """LangChain VectorStore over a memory-mapped embedding matrix and a SQLite side table."""
+
+    def __init__(self, path: str, embedding: Any, dtype: str = LOCAL_VECTOR_DTYPE):
+        self.path = path
+        self._embedding = embedding
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._reopen()
+
+    def _reopen(self) -> None:
+        """Map the current generation (an empty store if the index has none yet)."""
+        self.close()
+        self.generation = _current_generation(self.path)
+        self._vectors = np.zeros((0, 0), dtype=self.dtype)
+        if self.generation is not None:
+            self._vectors = np.load(os.path.join(self.generation, VECTORS_FILE), mmap_mode="r")
+            self._conn = sqlite3.connect(os.path.join(self.generation, META_FILE), check_same_thread=False)
+
+    @property
+    def embeddings(self) -> Any:
+        return self._embedding
+
+    @property
+    def dim(self) -> int:
+        return int(self._vectors.shape[1]) if self._vectors.ndim == 2 else 0
+
+    def __len__(self) -> int:
+        return int(self._vectors.shape[0])
+
+    # Side table
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            if self._conn is None:
+                return []
+            return self._conn.execute(sql, list(params)).fetchall()
+
+    def _where(self, filter: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for key, value in (filter or {}).items():
+            if not _SAFE_KEY.match(key):
+                raise ValueError(f"Invalid metadata filter key: {key}")
+            if isinstance(value, (list, tuple, set)):
+                values = list(value)
+                clauses.append(f"json_extract(metadata, '$.{key}') IN ({','.join('?' * len(values))})")
+                params.extend(values)
+            else:
+                clauses.append(f"json_extract(metadata, '$.{key}') = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _candidate_rows(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Row ids matching an equality filter ({key: value or [values]}); None means all rows."""
+        if not filter:
+            return None
+        where, params = self._where(filter)
+        rows = self._query(f"SELECT row FROM chunks{where} ORDER BY row", params)
+        return np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+
+    def _fetch(self, rows: Iterable[int]) -> List[Document]:
+        rows = [int(r) for r in rows]
+        if not rows:
+            return []
+        found: Dict[int, Document] = {}
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            for row, text, metadata in self._query(
+                f"SELECT row, page_content, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch
+            ):
+                found[row] = Document(page_content=text, metadata=json.loads(metadata))
+        return [found[r] for r in rows if r in found]
+
+    def hashes(self) -> Dict[str, int]:
+        """Map content hash -> row for every stored chunk."""
+        return {h: row for row, h in self._query("SELECT row, content_hash FROM chunks")}
+
+    def documents(self, filter: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Document]:
+        """Stored documents in row order, optionally filtered by metadata equality."""
+        where, params = self._where(filter)
+        rows = self._query(f"SELECT page_content, metadata FROM chunks{where} ORDER BY row LIMIT ?", params + [-1 if limit is None else limit])
+        return [Document(page_content=text, metadata=json.loads(metadata)) for text, metadata in rows]
+
+    # Search
+
+    def _scores(self, vectors: np.ndarray, embedding: List[float], rows: Optional[np.ndarray]) -> np.ndarray:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        query = query / norm if norm else query
+        count = len(vectors) if rows is None else len(rows)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCAN_BLOCK_ROWS):
+            stop = min(count, start + SCAN_BLOCK_ROWS)
+            block = vectors[start:stop] if rows is None else vectors[rows[start:stop]]
+            scores[start:stop] = block.astype(np.float32, copy=False) @ query
+        return scores
+
+    def _search(self, embedding: List[float], k: int, filter: Optional[Dict[str, Any]], vectors: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row ids, scores) of the top-k matches, best first.
+        Holds its own reference to the vectors, so a concurrent close() cannot pull them away mid-scan.
+        """
+        vectors = self._vectors if vectors is None else vectors
+        if not len(vectors) or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        rows = self._candidate_rows(filter)
+        scores = self._scores(vectors, embedding, rows)
+        if not len(scores):
+            return np.zeros(0, dtype=np.int64), scores
+        idx = _top_k(scores, k)
+        return (idx if rows is None else rows[idx]), scores[idx]
+
+    def similarity_search_with_score_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        rows, scores = self._search(embedding, k, filter)
+        return list(zip(self._fetch(rows), scores.tolist()))
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        rows, _ = self._search(embedding, k, filter)
+        return self._fetch(rows)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def _similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        # Cosine in [-1, 1] -> relevance in [0, 1]
+        return [(doc, (score + 1.0) / 2.0) for doc, score in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        vectors = self._vectors
+        rows, scores = self._search(embedding, max(k, fetch_k), filter, vectors)
+        if not len(rows):
+            return []
+        candidates = np.asarray(vectors[rows], dtype=np.float32)
+        selected = _mmr(scores, candidates, k, lambda_mult)
+        return self._fetch(rows[selected])
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20, lambda_mult: float = 0.5, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(self._embedding.embed_query(query), k, fetch_k, lambda_mult, filter)
+
+    # Writes
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict[str, Any]]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        docs = [Document(page_content=t, metadata=dict(metadatas[i]) if metadatas else {}) for i, t in enumerate(texts)]
+        hashes = [content_hash(d) for d in docs]
+        for doc, h in zip(docs, hashes):
+            doc.metadata[HASH_KEY] = h
+        vectors = self._embedding.embed_documents(texts)
+        os.makedirs(self.path, exist_ok=True)
+        write_generation(self.path, self, np.arange(len(self), dtype=np.int64), docs, hashes, vectors, self.dtype)
+        self._reopen()
+        return hashes
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Any, metadatas: Optional[List[Dict[str, Any]]] = None, index_name: str = "default", **kwargs: Any) -> "LocalVectorStore":
+        store = cls(index_dir(index_name), embedding)
+        store.add_texts(texts, metadatas)
+        return store
+
+    def close(self) -> None:
+        """Release the SQLite connection and the vector mapping (the store reads as empty afterwards).
+        Searches already scanning keep the mapping they started with until they finish.
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._vectors = np.zeros((0, 0), dtype=self.dtype)
+
+def write_generation(path: str, previous: Optional[LocalVectorStore], keep_rows: np.ndarray, docs: List[Document], hashes: List[str], vectors: List[List[float]], dtype: Any = LOCAL_VECTOR_DTYPE, metadata: Optional[Dict[int, Dict[str, Any]]] = None) -> str:
+    """Write previous[keep_rows] + docs as a new generation and make it current.
+    metadata replaces the stored metadata of kept rows (keyed by previous row).
+    """
+    metadata = metadata or {}
+    dtype = np.dtype(dtype)
+    new_vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32)) if len(vectors) else None
+    dim = new_vectors.shape[1] if new_vectors is not None else (previous.dim if previous is not None else 0)
+    total = len(keep_rows) + len(docs)
+    gen_name = f"gen-{time.time_ns()}"
+    gen = os.path.join(path, gen_name)
+    os.makedirs(gen, exist_ok=True)
+
+    vectors_path = os.path.join(gen, VECTORS_FILE)
+    if total == 0:
+        np.save(vectors_path, np.zeros((0, dim), dtype=dtype))
+    else:
+        matrix = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=dtype, shape=(total, dim))
+        for start in range(0, len(keep_rows), SCAN_BLOCK_ROWS):
+            sel = keep_rows[start:start + SCAN_BLOCK_ROWS]
+            matrix[start:start + len(sel)] = previous._vectors[sel]
+        if new_vectors is not None:
+            matrix[len(keep_rows):] = new_vectors.astype(dtype)
+        matrix.flush()
+        del matrix
+
+    conn = sqlite3.connect(os.path.join(gen, META_FILE))
+    conn.execute("CREATE TABLE chunks (row INTEGER PRIMARY KEY, content_hash TEXT NOT NULL, page_content TEXT NOT NULL, metadata TEXT NOT NULL)")
+    keep_list = [int(r) for r in keep_rows]
+    for start in range(0, len(keep_list), 500):
+        batch = keep_list[start:start + 500]
+        old = {row: rest for row, *rest in previous._query(
+            f"SELECT row, content_hash, page_content, metadata FROM chunks WHERE row IN ({','.join('?' * len(batch))})", batch
+        )}
+        conn.executemany(
+            "INSERT INTO chunks (row, content_hash, page_content, metadata) VALUES (?, ?, ?, ?)",
+            [
+                (start + i, old[row][0], old[row][1], json.dumps(metadata[row], default=str) if row in metadata else old[row][2])
+                for i, row in enumerate(batch)
+            ]
+        )
+    offset = len(keep_list)
+    conn.executemany(
+        "INSERT INTO chunks (row, content_hash, page_content, metadata) VALUES (?, ?, ?, ?)",
+        [(offset + i, h, d.page_content, json.dumps(d.metadata, default=str)) for i, (d, h) in enumerate(zip(docs, hashes))]
+    )
+    conn.execute("CREATE INDEX idx_chunks_hash ON chunks (content_hash)")
+    conn.commit()
+    conn.close()
+
+    # Point CURRENT at the new generation, then drop older ones (open maps stay valid on POSIX)
+    tmp = os.path.join(path, CURRENT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(gen_name)
+    os.replace(tmp, os.path.join(path, CURRENT_FILE))
+    for name in os.listdir(path):
+        if name.startswith("gen-") and name != gen_name:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+    return gen
+
+def ingest_documents_local(embeddings: Any, index_name: str, docs: List[Document], on_progress: Optional[ProgressCallback] = None) -> Tuple[LocalVectorStore, Dict[str, Any]]:
+    """Local counterpart of core.ingest.ingest_documents (same hashing, diffing and stats)."""
+    started = time.perf_counter()
+    path = index_dir(index_name)
+    os.makedirs(path, exist_ok=True)
+    previous = LocalVectorStore(path, embeddings)
+
+    unique: Dict[str, Document] = {}
+    for doc in docs:
+        h = content_hash(doc)
+        doc.metadata[HASH_KEY] = h
+        unique.setdefault(h, doc)
+
+    diff_start = time.perf_counter()
+    existing = previous.hashes()
+    new_hashes = [h for h in unique if h not in existing]
+    keep_rows = np.array(sorted(row for h, row in existing.items() if h in unique), dtype=np.int64)
+    deleted = len(existing) - len(keep_rows)
+    # chunk_index is not hashed, so a kept chunk may sit at a new position
+    kept = {row: unique[h] for h, row in existing.items() if h in unique}
+    stored = previous._query(f"SELECT row, json_extract(metadata, '$.{INDEX_KEY}') FROM chunks") if kept else []
+    moved = {
+        row: kept[row].metadata for row, index in stored
+        if row in kept and index != kept[row].metadata.get(INDEX_KEY)
+    }
+    diff_ms = (time.perf_counter() - diff_start) * 1000.0
+    new_docs = [unique[h] for h in new_hashes]
+
+    embed_start = time.perf_counter()
+    vectors = embed_in_batches(embeddings, [d.page_content for d in new_docs], on_progress=on_progress)
+    embed_ms = (time.perf_counter() - embed_start) * 1000.0
+
+    # A new generation rewrites every kept row next to the new ones, so write time
+    # scales with the document, not the diff (copied_chunks counts the kept rows)
+    write_start = time.perf_counter()
+    copied = 0
+    if new_docs or deleted or moved or previous.generation is None:
+        write_generation(path, previous, keep_rows, new_docs, new_hashes, vectors, metadata=moved)
+        copied = len(keep_rows)
+    write_ms = (time.perf_counter() - write_start) * 1000.0
+    previous.close()
+
+    vector_store = LocalVectorStore(path, embeddings)
+    total_ms = (time.perf_counter() - started) * 1000.0
+    stats = {
+        "backend": "local",
+        "chunks": len(docs),
+        "new_chunks": len(new_docs),
+        "unchanged_chunks": len(unique) - len(new_docs),
+        "deleted_chunks": deleted,
+        "reindexed_chunks": len(moved),
+        "copied_chunks": copied,
+        "stored_count": len(vector_store),
+        "write_errors": 0,
+        "diff_ms": round(diff_ms, 2),
+        "embed_ms": round(embed_ms, 2),
+        "write_ms": round(write_ms, 2),
+        "total_ms": round(total_ms, 2),
+        "embed_chunks_per_s": round(len(new_docs) / (embed_ms / 1000.0), 2) if embed_ms else 0.0,
+        "write_chunks_per_s": round((copied + len(new_docs)) / (write_ms / 1000.0), 2) if write_ms else 0.0,
+        "chunks_per_s": round(len(docs) / (total_ms / 1000.0), 2) if total_ms else 0.0,
+        "dtype": str(vector_store.dtype),
+    }
+    logger.info(f"Ingested {len(docs)} chunks into local index {index_name}: {stats}")
+    return vector_store, stats
+
+def list_local_indexes(root: str = LOCAL_VECTOR_DIR) -> List[str]:
+    """Index names with a live generation, most recently written first."""
+    if not os.path.isdir(root):
+        return []
+    names = [n for n in os.listdir(root) if _current_generation(os.path.join(root, n)) is not None]
+    return sorted(names, key=lambda n: os.path.getmtime(os.path.join(root, n, CURRENT_FILE)), reverse=True)
+
+def delete_local_index(index_name: str) -> None:
+    shutil.rmtree(index_dir(index_name), ignore_errors=True)
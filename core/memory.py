@@ -1,58 +1,620 @@
-from langchain.memory import ConversationBufferMemory
-from typing import Dict, Optional, Any, List
+"""
+Bounded session-memory store with a pluggable persistence backend.
+Sessions live in an LRU capped at MEMORY_MAX_SESSIONS and expire after
+MEMORY_SESSION_TTL_SECONDS without access. Each session keeps its chat history
+in a ring buffer of MEMORY_MAX_MESSAGES, so appending and trimming are O(1).
+
+With MEMORY_BACKEND=sqlite (the default) the LRU is a hot cache in front of a
+SQLite file: writes are queued and committed in batches by a background thread
+(write-behind), and a session missing from the cache is loaded with one indexed
+query for its last MEMORY_MAX_MESSAGES messages. Reads never wait for the
+writer: queued writes are kept in a per-session overlay that is applied on top
+of the committed rows until the writer has committed them. MEMORY_BACKEND=memory
+keeps everything in process memory.
+"""
+
 import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Dict, Optional, Any, List, Tuple
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from core.concurrency import run_in_worker
+from core.config import (
+    MEMORY_MAX_SESSIONS, MEMORY_SESSION_TTL_SECONDS, MEMORY_MAX_MESSAGES,
+    MEMORY_BACKEND, MEMORY_DB_PATH, MEMORY_FLUSH_INTERVAL_SECONDS, MEMORY_WRITE_BATCH_SIZE
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class MemoryCounters:
+    """Running session/message totals, updated on every write so polling never scans sessions.
+    version changes on every update and is used as the status ETag key.
+    """
+
+    def __init__(self, sessions: int = 0, messages: int = 0):
+        self._lock = threading.Lock()
+        self.sessions = sessions
+        self.messages = messages
+        self.version = 0
+
+    def update(self, sessions: int = 0, messages: int = 0) -> None:
+        with self._lock:
+            self.sessions += sessions
+            self.messages += messages
+            self.version += 1
+
+    def reset(self, sessions: int = 0, messages: int = 0) -> None:
+        with self._lock:
+            self.sessions = sessions
+            self.messages = messages
+            self.version += 1
+
+    def totals(self) -> Tuple[int, int]:
+        with self._lock:
+            return self.sessions, self.messages
+
+class InMemoryBackend:
+    """No persistence: the session LRU is the only copy."""
+    persistent = False
+
+    def load(self, session_id: str, limit: int) -> Optional[List[BaseMessage]]:
+        return None
+
+    def load_page(self, session_id: str, offset: int, limit: Optional[int]) -> Tuple[int, List[BaseMessage]]:
+        return 0, []
+
+    def append(self, session_id: str, message: BaseMessage) -> None:
+        pass
+
+    def touch(self, session_id: str, last_access: float) -> None:
+        pass
+
+    def delete(self, session_id: str) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def list_sessions(self, offset: int, limit: Optional[int]) -> List[str]:
+        return []
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+class _PendingSession:
+    """Queued-but-uncommitted writes for one session (each tagged with its queue sequence number)."""
+    __slots__ = ("reset", "messages", "last_access")
+
+    def __init__(self):
+        # Sequence number of a queued delete: committed rows are stale until it lands
+        self.reset: Optional[int] = None
+        self.messages: List[Tuple[int, str]] = []
+        self.last_access: Optional[Tuple[int, float]] = None
+
+class SQLiteBackend:
+    """SQLite persistence with a write-behind queue drained by a background thread."""
+    persistent = True
+
+    def __init__(self, path: str, max_messages: int = MEMORY_MAX_MESSAGES, ttl_seconds: float = MEMORY_SESSION_TTL_SECONDS, flush_interval: float = MEMORY_FLUSH_INTERVAL_SECONDS, batch_size: int = MEMORY_WRITE_BATCH_SIZE):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn_lock = threading.Lock()
+        with self._conn_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory_messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, data TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_messages_session ON memory_messages (session_id, id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory_sessions ("
+                "session_id TEXT PRIMARY KEY, last_access REAL NOT NULL, message_count INTEGER NOT NULL DEFAULT 0)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_sessions_access ON memory_sessions (last_access)")
+            self._conn.commit()
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM memory_sessions").fetchone()
+        # Totals of what is on disk; the writer thread applies each batch's deltas
+        self.counters = MemoryCounters(row[0], row[1])
+        self._queue: "queue.Queue[Tuple[Any, ...]]" = queue.Queue()
+        # Overlay of queued writes; lock order is _conn_lock then _pending_lock
+        self._pending_lock = threading.Lock()
+        self._pending: Dict[str, _PendingSession] = {}
+        self._pending_clear: Optional[int] = None
+        self._seq = 0
+        self._last_purge = time.time()
+        self.batches_written = 0
+        self.ops_written = 0
+        self._writer = threading.Thread(target=self._write_loop, name="rag-memory-writer", daemon=True)
+        self._writer.start()
+
+    # Writes (queued, applied in order by the writer thread)
+
+    def _enqueue(self, op: Tuple[Any, ...]) -> None:
+        """Record op in the overlay and queue it (in one step, so queue order matches sequence order)."""
+        with self._pending_lock:
+            self._seq += 1
+            seq = self._seq
+            kind = op[0]
+            if kind == "clear":
+                self._pending.clear()
+                self._pending_clear = seq
+            elif kind in ("append", "touch", "delete"):
+                pending = self._pending.setdefault(op[1], _PendingSession())
+                if kind == "append":
+                    pending.messages.append((seq, op[2]))
+                    pending.last_access = (seq, op[3])
+                elif kind == "touch":
+                    pending.last_access = (seq, op[2])
+                else:
+                    pending.reset = seq
+                    pending.messages.clear()
+                    pending.last_access = None
+            self._queue.put((seq,) + op)
+
+    def _settle(self, committed: int) -> None:
+        """Drop overlay entries the writer has committed (called with _conn_lock held)."""
+        with self._pending_lock:
+            if self._pending_clear is not None and self._pending_clear <= committed:
+                self._pending_clear = None
+            for session_id in list(self._pending):
+                pending = self._pending[session_id]
+                if pending.reset is not None and pending.reset <= committed:
+                    pending.reset = None
+                pending.messages = [m for m in pending.messages if m[0] > committed]
+                if pending.last_access is not None and pending.last_access[0] <= committed:
+                    pending.last_access = None
+                if pending.reset is None and not pending.messages and pending.last_access is None:
+                    del self._pending[session_id]
+
+    def append(self, session_id: str, message: BaseMessage) -> None:
+        self._enqueue(("append", session_id, json.dumps(message_to_dict(message)), time.time()))
+
+    def touch(self, session_id: str, last_access: float) -> None:
+        self._enqueue(("touch", session_id, last_access))
+
+    def delete(self, session_id: str) -> None:
+        self._enqueue(("delete", session_id))
+
+    def clear(self) -> None:
+        self._enqueue(("clear",))
+
+    def flush(self) -> None:
+        """Block until every queued write is committed."""
+        done = threading.Event()
+        self._queue.put((0, "flush", done))
+        done.wait()
+
+    def close(self) -> None:
+        self._queue.put((0, "stop"))
+        self._writer.join()
+        with self._conn_lock:
+            self._conn.close()
+
+    def _write_loop(self) -> None:
+        running = True
+        while running:
+            try:
+                ops = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                ops = []
+            while ops and len(ops) < self.batch_size:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = [op[2] for op in ops if op[1] == "flush"]
+            running = not any(op[1] == "stop" for op in ops)
+            writes = [op[1:] for op in ops if op[1] not in ("flush", "stop")]
+            committed = max((op[0] for op in ops), default=0)
+            try:
+                if writes:
+                    self._apply(writes, committed)
+                self._purge_idle()
+            except Exception as e:
+                logger.error(f"Session memory write-behind failed ({len(writes)} ops dropped): {e}")
+                with self._conn_lock:
+                    self._settle(committed)
+            for done in waiters:
+                done.set()
+
+    def _apply(self, ops: List[Tuple[Any, ...]], committed: int) -> None:
+        touched: Dict[str, float] = {}
+        cleared = False
+        session_delta = message_delta = 0
+        with self._conn_lock:
+            cur = self._conn.cursor()
+            for op in ops:
+                kind = op[0]
+                if kind == "append":
+                    cur.execute(
+                        "INSERT INTO memory_messages (session_id, data, created_at) VALUES (?, ?, ?)",
+                        (op[1], op[2], op[3])
+                    )
+                    touched[op[1]] = max(touched.get(op[1], 0.0), op[3])
+                elif kind == "touch":
+                    touched[op[1]] = max(touched.get(op[1], 0.0), op[2])
+                elif kind == "delete":
+                    touched.pop(op[1], None)
+                    row = cur.execute("SELECT message_count FROM memory_sessions WHERE session_id = ?", (op[1],)).fetchone()
+                    if row is not None:
+                        session_delta -= 1
+                        message_delta -= row[0]
+                    cur.execute("DELETE FROM memory_messages WHERE session_id = ?", (op[1],))
+                    cur.execute("DELETE FROM memory_sessions WHERE session_id = ?", (op[1],))
+                elif kind == "clear":
+                    touched.clear()
+                    cleared = True
+                    session_delta = message_delta = 0
+                    cur.execute("DELETE FROM memory_messages")
+                    cur.execute("DELETE FROM memory_sessions")
+            for session_id, last_access in touched.items():
+                row = cur.execute("SELECT message_count FROM memory_sessions WHERE session_id = ?", (session_id,)).fetchone()
+                # Keep only the newest max_messages rows, mirroring the in-memory ring buffer
+                cur.execute(
+                    "DELETE FROM memory_messages WHERE session_id = ? AND id <= "
+                    "(SELECT id FROM memory_messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, self.max_messages)
+                )
+                count = cur.execute("SELECT COUNT(*) FROM memory_messages WHERE session_id = ?", (session_id,)).fetchone()[0]
+                cur.execute(
+                    "INSERT INTO memory_sessions (session_id, last_access, message_count) VALUES (?, ?, ?) "
+                    "ON CONFLICT(session_id) DO UPDATE SET last_access = MAX(last_access, excluded.last_access), "
+                    "message_count = excluded.message_count",
+                    (session_id, last_access, count)
+                )
+                session_delta += row is None
+                message_delta += count - (row[0] if row else 0)
+            self._conn.commit()
+            # Still under _conn_lock, so readers never see a row both committed and in the overlay
+            self._settle(committed)
+        if cleared:
+            self.counters.reset(session_delta, message_delta)
+        else:
+            self.counters.update(session_delta, message_delta)
+        self.batches_written += 1
+        self.ops_written += len(ops)
+
+    def _purge_idle(self) -> None:
+        now = time.time()
+        if self.ttl_seconds <= 0 or now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        cutoff = now - self.ttl_seconds
+        with self._conn_lock:
+            purged = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(message_count), 0) FROM memory_sessions WHERE last_access < ?", (cutoff,)
+            ).fetchone()
+            if not purged[0]:
+                return
+            self._conn.execute(
+                "DELETE FROM memory_messages WHERE session_id IN (SELECT session_id FROM memory_sessions WHERE last_access < ?)",
+                (cutoff,)
+            )
+            self._conn.execute("DELETE FROM memory_sessions WHERE last_access < ?", (cutoff,))
+            self._conn.commit()
+        self.counters.update(-purged[0], -purged[1])
+
+    # Reads (committed rows with the queued writes overlaid; never wait for the writer)
+
+    def _read(self, session_id: str) -> Optional[List[str]]:
+        """A session's newest max_messages serialized messages, oldest first; None if unknown."""
+        with self._conn_lock:
+            with self._pending_lock:
+                pending = self._pending.get(session_id)
+                stale = self._pending_clear is not None or (pending is not None and pending.reset is not None)
+                overlay = [data for _, data in pending.messages] if pending is not None else []
+                pending_exists = pending is not None and (bool(pending.messages) or pending.last_access is not None)
+            if stale:
+                rows: List[Tuple[str]] = []
+                exists = False
+            else:
+                rows = self._conn.execute(
+                    "SELECT data FROM memory_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (session_id, self.max_messages)
+                ).fetchall()
+                exists = bool(rows) or self._conn.execute(
+                    "SELECT 1 FROM memory_sessions WHERE session_id = ?", (session_id,)
+                ).fetchone() is not None
+        if not exists and not pending_exists:
+            return None
+        data = [r[0] for r in reversed(rows)] + overlay
+        return data[-self.max_messages:]
+
+    def load(self, session_id: str, limit: int) -> Optional[List[BaseMessage]]:
+        """Load a session's newest `limit` messages, oldest first; None if unknown."""
+        data = self._read(session_id)
+        if data is None:
+            return None
+        return messages_from_dict([json.loads(d) for d in data[-limit:]]) if limit > 0 else []
+
+    def load_page(self, session_id: str, offset: int, limit: Optional[int]) -> Tuple[int, List[BaseMessage]]:
+        data = self._read(session_id) or []
+        end = None if limit is None else offset + limit
+        return len(data), messages_from_dict([json.loads(d) for d in data[offset:end]])
+
+    def list_sessions(self, offset: int, limit: Optional[int]) -> List[str]:
+        with self._conn_lock:
+            with self._pending_lock:
+                cleared = self._pending_clear is not None
+                deleted = {sid for sid, p in self._pending.items() if p.reset is not None}
+                recent = {sid: p.last_access[1] for sid, p in self._pending.items() if p.last_access is not None}
+            rows: List[Tuple[str, float]] = []
+            if not cleared:
+                # Enough committed rows to fill the page after overlay sessions are merged in
+                fetch = -1 if limit is None else offset + limit + len(deleted) + len(recent)
+                rows = self._conn.execute(
+                    "SELECT session_id, last_access FROM memory_sessions ORDER BY last_access DESC LIMIT ?", (fetch,)
+                ).fetchall()
+        merged = {sid: access for sid, access in rows if sid not in deleted}
+        for sid, access in recent.items():
+            merged[sid] = max(merged.get(sid, 0.0), access)
+        ordered = sorted(merged, key=merged.__getitem__, reverse=True)
+        return ordered[offset:None if limit is None else offset + limit]
+
+def create_memory_backend(kind: str = MEMORY_BACKEND) -> Any:
+    """Build the configured backend, falling back to in-memory if SQLite cannot be opened."""
+    if kind == "sqlite":
+        try:
+            return SQLiteBackend(MEMORY_DB_PATH)
+        except Exception as e:
+            logger.warning(f"SQLite session memory disabled ({MEMORY_DB_PATH}), using in-memory store: {e}")
+    return InMemoryBackend()
+
+class RingBufferChatHistory(BaseChatMessageHistory):
+    """Chat history that keeps only the last max_messages (oldest dropped on append).
+    Appends and clears are forwarded to the session store's backend and counters.
+    """
+
+    def __init__(self, max_messages: int = MEMORY_MAX_MESSAGES, session_id: Optional[str] = None, backend: Optional[Any] = None, counters: Optional[MemoryCounters] = None):
+        self._buffer: "deque[BaseMessage]" = deque(maxlen=max_messages)
+        self._session_id = session_id
+        self._backend = backend
+        self._counters = counters
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore[override]
+        return list(self._buffer)
+
+    def add_message(self, message: BaseMessage) -> None:
+        full = len(self._buffer) == self._buffer.maxlen
+        self._buffer.append(message)
+        if self._counters is not None:
+            self._counters.update(messages=0 if full else 1)
+        if self._backend is not None:
+            self._backend.append(self._session_id, message)
+
+    def clear(self) -> None:
+        dropped = len(self._buffer)
+        self._buffer.clear()
+        if self._counters is not None:
+            self._counters.update(messages=-dropped)
+        if self._backend is not None:
+            self._backend.delete(self._session_id)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+class SessionMemory:
+    """Per-session memory; exposes chat_memory like ConversationBufferMemory."""
+    __slots__ = ("session_id", "chat_memory", "last_access")
+
+    def __init__(self, session_id: str, max_messages: int = MEMORY_MAX_MESSAGES, backend: Optional[Any] = None, counters: Optional[MemoryCounters] = None):
+        self.session_id = session_id
+        self.chat_memory = RingBufferChatHistory(max_messages, session_id, backend, counters)
+        self.last_access = time.time()
+
+class SessionMemoryStore:
+    """Thread-safe LRU + idle-TTL store of session memories with eviction counters.
+    With a persistent backend the LRU is a hot cache and evicted sessions stay on disk.
+    """
+
+    def __init__(self, max_sessions: int = MEMORY_MAX_SESSIONS, ttl_seconds: float = MEMORY_SESSION_TTL_SECONDS, max_messages: int = MEMORY_MAX_MESSAGES, backend: Optional[Any] = None):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.backend = backend if backend is not None else InMemoryBackend()
+        # Least recently used first, so idle sessions are always at the front
+        self._sessions: "OrderedDict[str, SessionMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Totals for the sessions held here (the persistent backend keeps its own for disk)
+        self.counters = MemoryCounters()
+        self.created = 0
+        self.loaded = 0
+        self.evicted_lru = 0
+        self.evicted_ttl = 0
+
+    def _drop(self, memory: SessionMemory) -> None:
+        # Detach so a caller still holding the evicted session cannot skew the totals
+        self.counters.update(-1, -len(memory.chat_memory))
+        memory.chat_memory._counters = None
+
+    def _expire_idle(self, now: float) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self._drop(oldest)
+            self.evicted_ttl += 1
+
+    def _cache(self, memory: SessionMemory) -> None:
+        self._sessions[memory.session_id] = memory
+        self.counters.update(1, len(memory.chat_memory))
+        while len(self._sessions) > self.max_sessions:
+            _, evicted = self._sessions.popitem(last=False)
+            self._drop(evicted)
+            self.evicted_lru += 1
+
+    def _load(self, session_id: str) -> Optional[SessionMemory]:
+        messages = self.backend.load(session_id, self.max_messages) if self.backend.persistent else None
+        if messages is None:
+            return None
+        memory = SessionMemory(session_id, self.max_messages, self.backend, self.counters)
+        memory.chat_memory._buffer.extend(messages)
+        return memory
+
+    def get_or_create(self, session_id: str) -> SessionMemory:
+        """Cached session, else loaded from the backend, else a new one.
+        The backend read runs without the store lock; use aget_or_create from async code.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire_idle(now)
+            memory = self._sessions.get(session_id)
+            if memory is not None:
+                self._sessions.move_to_end(session_id)
+                # Recency order is part of the session listing
+                self.counters.update()
+                memory.last_access = now
+        if memory is None:
+            loaded = self._load(session_id)
+            with self._lock:
+                # Another caller may have cached the session while we were reading
+                memory = self._sessions.get(session_id)
+                if memory is not None:
+                    self._sessions.move_to_end(session_id)
+                    self.counters.update()
+                elif loaded is not None:
+                    memory = loaded
+                    self.loaded += 1
+                    self._cache(memory)
+                else:
+                    memory = SessionMemory(session_id, self.max_messages, self.backend, self.counters)
+                    self.created += 1
+                    self._cache(memory)
+                memory.last_access = now
+        self.backend.touch(session_id, now)
+        return memory
+
+    async def aget_or_create(self, session_id: str) -> SessionMemory:
+        """get_or_create for request handlers: a cache miss on a persistent backend reads in the worker pool."""
+        if not self.backend.persistent or self.get(session_id) is not None:
+            return self.get_or_create(session_id)
+        return await run_in_worker(self.get_or_create, session_id)
+
+    def get(self, session_id: str) -> Optional[SessionMemory]:
+        """Look up a cached session without creating it or refreshing its idle timer."""
+        with self._lock:
+            self._expire_idle(time.time())
+            return self._sessions.get(session_id)
+
+    def page(self, session_id: str, offset: int = 0, limit: Optional[int] = None) -> Optional[Tuple[int, List[BaseMessage]]]:
+        """(message_count, messages[offset:offset+limit]) for a session, or None if unknown."""
+        memory = self.get(session_id)
+        if memory is not None:
+            messages = memory.chat_memory.messages
+            end = None if limit is None else offset + limit
+            return len(messages), messages[offset:end]
+        if not self.backend.persistent:
+            return None
+        total, messages = self.backend.load_page(session_id, offset, limit)
+        return (total, messages) if total else None
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            memory = self._sessions.pop(session_id, None)
+            if memory is not None:
+                self._drop(memory)
+        existed = memory is not None
+        if self.backend.persistent:
+            existed = existed or self.backend.load(session_id, 1) is not None
+            self.backend.delete(session_id)
+        return existed
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._sessions)
+            for memory in self._sessions.values():
+                memory.chat_memory._counters = None
+            self._sessions.clear()
+            self.counters.reset()
+        if self.backend.persistent:
+            count = max(count, len(self.backend.list_sessions(0, None)))
+            self.backend.clear()
+        return count
+
+    def session_ids(self, offset: int = 0, limit: Optional[int] = None) -> List[str]:
+        """Session ids, most recently used first."""
+        if self.backend.persistent:
+            return self.backend.list_sessions(offset, limit)
+        with self._lock:
+            self._expire_idle(time.time())
+            stop = None if limit is None else offset + limit
+            return list(islice(reversed(self._sessions), offset, stop))
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_idle(time.time())
+            stats = {
+                "backend": type(self.backend).__name__,
+                "cached_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_messages_per_session": self.max_messages,
+                "sessions_created": self.created,
+                "sessions_loaded": self.loaded,
+                "evicted_lru": self.evicted_lru,
+                "evicted_ttl": self.evicted_ttl,
+            }
+        if isinstance(self.backend, SQLiteBackend):
+            stats["write_behind"] = {
+                "pending_ops": self.backend._queue.qsize(),
+                "batches_written": self.backend.batches_written,
+                "ops_written": self.backend.ops_written,
+            }
+        return stats
 
 # Global memory storage
-session_memories: Dict[str, ConversationBufferMemory] = {}
+session_store = SessionMemoryStore(backend=create_memory_backend())
 
-def get_memory_for_session(session_id: str) -> ConversationBufferMemory:
+def get_memory_for_session(session_id: str) -> SessionMemory:
     """Get or create memory for a specific session."""
-    if session_id not in session_memories:
-        session_memories[session_id] = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            k=10  # Keep last 10 messages
-        )
-    else:
-        # TOKEN MANAGEMENT: Clean up old messages if memory gets too large
-        memory = session_memories[session_id]
-        if len(memory.chat_memory.messages) > 20:  # If more than 20 messages
-            print(f"DEBUG: Memory cleanup for session {session_id}: trimming from {len(memory.chat_memory.messages)} to 10 messages")
-            # Keep only the last 10 messages
-            messages = memory.chat_memory.messages[-10:]
-            memory.chat_memory.clear()
-            for msg in messages:
-                if msg.type == "human":
-                    memory.chat_memory.add_user_message(msg.content)
-                elif msg.type == "ai":
-                    memory.chat_memory.add_ai_message(msg.content)
-    
-    return session_memories[session_id]
+    return session_store.get_or_create(session_id)
+
+async def aget_memory_for_session(session_id: str) -> SessionMemory:
+    """Get or create memory for a session without blocking the event loop on a backend read."""
+    return await session_store.aget_or_create(session_id)
 
 def clear_memory_for_session(session_id: str) -> bool:
     """Clear memory for a specific session."""
-    if session_id in session_memories:
-        del session_memories[session_id]
-        return True
-    return False
-
-def get_memory_status(session_id: str) -> Dict[str, Any]:
-    """Get memory status for a session."""
-    if session_id not in session_memories:
+    return session_store.delete(session_id)
+
+def get_memory_status(session_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """Get memory status for a session (messages paged by offset/limit)."""
+    page = session_store.page(session_id, offset, limit)
+    if page is None:
         return {
             "session_id": session_id,
             "exists": False,
             "message_count": 0,
             "messages": []
         }
-    
-    memory = session_memories[session_id]
-    messages = memory.chat_memory.messages
-    
+
+    message_count, messages = page
+
     return {
         "session_id": session_id,
         "exists": True,
-        "message_count": len(messages),
+        "message_count": message_count,
         "messages": [
             {
                 "type": msg.type,
@@ -64,10 +626,28 @@ def get_memory_status(session_id: str) -> Dict[str, Any]:
 
 def clear_all_memories() -> int:
     """Clear all session memories. Returns number of cleared sessions."""
-    count = len(session_memories)
-    session_memories.clear()
-    return count
+    return session_store.clear()
+
+def get_all_memory_sessions(offset: int = 0, limit: Optional[int] = None) -> List[str]:
+    """Get a page of session IDs, most recently used first."""
+    return session_store.session_ids(offset, limit)
+
+def get_memory_totals() -> Tuple[int, int]:
+    """(sessions, messages) across the store, from running counters (O(1))."""
+    if session_store.backend.persistent:
+        return session_store.backend.counters.totals()
+    return session_store.counters.totals()
+
+def get_memory_version() -> Tuple[int, ...]:
+    """Changes whenever anything reported by /memory/health may have changed."""
+    if session_store.backend.persistent:
+        return session_store.counters.version, session_store.backend.counters.version
+    return (session_store.counters.version,)
+
+def get_memory_store_stats() -> Dict[str, Any]:
+    """Get session count and eviction counters for the memory store."""
+    return session_store.stats()
 
-def get_all_memory_sessions() -> List[str]:
-    """Get list of all active session IDs."""
-    return list(session_memories.keys())
+def close_memory_store() -> None:
+    """Flush pending writes and close the backend (used on application shutdown)."""
+    session_store.backend.close()
@@ -0,0 +1,349 @@
+"""
+OpenAPI / Swagger ingest mode.
+Specs (OpenAPI 3.x or Swagger 2.0, YAML or JSON) are parsed with the C YAML
+loader when PyYAML was built with libyaml, and turned directly into one
+compact document per operation (parameters, request body and responses with
+$refs resolved and schemas rendered as short type signatures) plus an API
+overview document. The endpoint catalog and base URLs come from the spec, so
+the markdown chunking, regex endpoint scan and LLM endpoint recall are skipped.
+"""
+
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from core.config import OPENAPI_SCHEMA_DEPTH, OPENAPI_MAX_PROPERTIES, OPENAPI_MAX_DESCRIPTION_CHARS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+HTTP_METHODS = ("get", "post", "put", "patch", "delete", "options", "head")
+
+_YAML_MARKER = re.compile(r"(?m)^[\"']?(openapi|swagger)[\"']?\s*:")
+_JSON_MARKER = re.compile(r"\"(openapi|swagger)\"\s*:")
+
+def looks_like_openapi(raw: str) -> bool:
+    """Cheap check for a top-level openapi/swagger key before paying for a full parse."""
+    if raw.lstrip().startswith("{"):
+        return bool(_JSON_MARKER.search(raw))
+    return bool(_YAML_MARKER.search(raw))
+
+def load_spec(raw: str) -> Optional[Tuple[Dict[str, Any], str]]:
+    """Parse an OpenAPI/Swagger spec. Returns (spec, loader name), or None if raw is not one."""
+    if not looks_like_openapi(raw):
+        return None
+    try:
+        if raw.lstrip().startswith("{"):
+            spec, loader = json.loads(raw), "json"
+        else:
+            import yaml
+            yaml_loader = getattr(yaml, "CSafeLoader", None) or yaml.SafeLoader
+            spec, loader = yaml.load(raw, Loader=yaml_loader), yaml_loader.__name__
+    except Exception as e:
+        logger.warning(f"Document looks like an OpenAPI spec but could not be parsed: {e}")
+        return None
+    if not isinstance(spec, dict) or not isinstance(spec.get("paths"), dict):
+        return None
+    if "openapi" not in spec and "swagger" not in spec:
+        return None
+    return spec, loader
+
+class RefResolver:
+    """Resolves local $refs (#/components/..., #/definitions/...) with memoization.
+    Each ref is resolved once and the result shared; a ref that refers back to
+    itself while being resolved is left as {"$ref": ...} to cut the cycle.
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self._resolved: Dict[str, Any] = {}
+        self._in_progress: set = set()
+        self.lookups = 0
+        self.hits = 0
+
+    def _pointer(self, ref: str) -> Any:
+        node: Any = self.spec
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            node = node[int(part)] if isinstance(node, list) else node[part]
+        return node
+
+    def resolve(self, node: Any) -> Any:
+        if isinstance(node, list):
+            return [self.resolve(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            self.lookups += 1
+            if ref in self._resolved:
+                self.hits += 1
+                return self._resolved[ref]
+            if not ref.startswith("#/") or ref in self._in_progress:
+                return {"$ref": ref}
+            self._in_progress.add(ref)
+            try:
+                resolved = self.resolve(self._pointer(ref))
+            except (KeyError, IndexError, ValueError, TypeError):
+                resolved = {"$ref": ref}
+            finally:
+                self._in_progress.discard(ref)
+            self._resolved[ref] = resolved
+            return resolved
+        return {key: self.resolve(value) for key, value in node.items()}
+
+def _ref_name(ref: str) -> str:
+    return ref.rsplit("/", 1)[-1]
+
+def schema_signature(schema: Any, depth: int = OPENAPI_SCHEMA_DEPTH) -> str:
+    """Render a resolved schema as a short type signature, e.g. {id*: integer, tags: [string]}."""
+    if not isinstance(schema, dict):
+        return "any"
+    if "$ref" in schema:
+        return _ref_name(schema["$ref"])
+    for combinator, joiner in (("oneOf", " | "), ("anyOf", " | ")):
+        if isinstance(schema.get(combinator), list):
+            return joiner.join(schema_signature(s, depth) for s in schema[combinator])
+    if isinstance(schema.get("allOf"), list):
+        merged: Dict[str, Any] = {"type": "object", "properties": {}, "required": []}
+        for part in schema["allOf"]:
+            if isinstance(part, dict):
+                merged["properties"].update(part.get("properties") or {})
+                merged["required"].extend(part.get("required") or [])
+        return schema_signature(merged, depth)
+    if "enum" in schema and isinstance(schema["enum"], list):
+        return " | ".join(json.dumps(v) for v in schema["enum"][:10]) + (" | ..." if len(schema["enum"]) > 10 else "")
+    kind = schema.get("type")
+    if kind == "array" or "items" in schema:
+        return f"[{schema_signature(schema.get('items'), depth - 1)}]"
+    if kind == "object" or "properties" in schema:
+        props = schema.get("properties") or {}
+        if not props:
+            extra = schema.get("additionalProperties")
+            return f"{{string: {schema_signature(extra, depth - 1)}}}" if isinstance(extra, dict) else "object"
+        if depth <= 0:
+            return "{...}"
+        required = set(schema.get("required") or [])
+        fields = [
+            f"{name}{'*' if name in required else ''}: {schema_signature(prop, depth - 1)}"
+            for name, prop in list(props.items())[:OPENAPI_MAX_PROPERTIES]
+        ]
+        if len(props) > OPENAPI_MAX_PROPERTIES:
+            fields.append(f"... {len(props) - OPENAPI_MAX_PROPERTIES} more")
+        return "{" + ", ".join(fields) + "}"
+    if kind:
+        return f"{kind}<{schema['format']}>" if schema.get("format") else str(kind)
+    return "any"
+
+def _trim(text: Any, limit: int = OPENAPI_MAX_DESCRIPTION_CHARS) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[:limit].rstrip() + "..."
+
+def base_urls(spec: Dict[str, Any]) -> List[str]:
+    """Server URLs (OpenAPI 3, variables filled with their defaults) or scheme://host/basePath (Swagger 2)."""
+    urls: List[str] = []
+    for server in spec.get("servers") or []:
+        url = str((server or {}).get("url") or "")
+        for name, var in ((server or {}).get("variables") or {}).items():
+            url = url.replace("{" + name + "}", str((var or {}).get("default", "")))
+        if url:
+            urls.append(url.rstrip("/"))
+    if not urls and spec.get("swagger"):
+        base_path = str(spec.get("basePath") or "").rstrip("/")
+        if spec.get("host"):
+            scheme = (spec.get("schemes") or ["https"])[0]
+            urls.append(f"{scheme}://{spec['host']}{base_path}")
+        elif base_path:
+            urls.append(base_path)
+    return urls
+
+def _security_names(spec: Dict[str, Any], operation: Dict[str, Any]) -> List[str]:
+    requirements = operation["security"] if "security" in operation else spec.get("security") or []
+    names: List[str] = []
+    for requirement in requirements or []:
+        for name in (requirement or {}):
+            if name not in names:
+                names.append(name)
+    return names
+
+def _security_schemes(spec: Dict[str, Any]) -> Dict[str, Any]:
+    return (spec.get("components") or {}).get("securitySchemes") or spec.get("securityDefinitions") or {}
+
+def _parameters(path_item: Dict[str, Any], operation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Path-level and operation-level parameters; the operation's win on (name, in)."""
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for param in list(path_item.get("parameters") or []) + list(operation.get("parameters") or []):
+        if isinstance(param, dict) and param.get("name"):
+            merged[(param["name"], param.get("in", ""))] = param
+    return list(merged.values())
+
+def _media_schema(content: Any) -> Tuple[Optional[str], Any, Any]:
+    """(media type, schema, example) of the preferred (JSON first) media type in a content map."""
+    if not isinstance(content, dict) or not content:
+        return None, None, None
+    media_type = next((m for m in content if "json" in m), next(iter(content)))
+    media = content.get(media_type) or {}
+    example = media.get("example")
+    if example is None and isinstance(media.get("examples"), dict) and media["examples"]:
+        example = (next(iter(media["examples"].values())) or {}).get("value")
+    return media_type, media.get("schema"), example
+
+def _example_curl(method: str, url: str, params: List[Dict[str, Any]], auth_headers: List[str], body_media: Optional[str], example: Any) -> str:
+    parts = [f"curl -X {method} '{url}'"]
+    for header in auth_headers:
+        parts.append(f"-H '{header}: <{header.upper().replace('-', '_')}>'")
+    for param in params:
+        if param.get("in") == "header" and param.get("required"):
+            parts.append(f"-H '{param['name']}: <{param['name']}>'")
+    if body_media:
+        parts.append(f"-H 'Content-Type: {body_media}'")
+        if example is not None:
+            body = json.dumps(example, separators=(",", ":"), default=str)
+            if len(body) <= 600:
+                parts.append(f"-d '{body}'")
+    return " \\\n  ".join(parts)
+
+def build_openapi_documents(spec: Dict[str, Any], title: str) -> Dict[str, Any]:
+    """One document per operation plus an overview, and the endpoint catalog for state.
+    Returns {"documents", "catalog", "stats"}.
+    """
+    started = time.perf_counter()
+    resolver = RefResolver(spec)
+    info = spec.get("info") or {}
+    urls = base_urls(spec)
+    base_url = urls[0] if urls else None
+    schemes = _security_schemes(spec)
+    api_title = str(info.get("title") or title)
+    documents: List[Document] = []
+    endpoints: List[Dict[str, Any]] = []
+
+    for path, path_item in (spec.get("paths") or {}).items():
+        # Resolved once per path; the memoized component schemas are shared, not copied
+        path_item = resolver.resolve(path_item)
+        if not isinstance(path_item, dict):
+            continue
+        for method in HTTP_METHODS:
+            operation = path_item.get(method)
+            if not isinstance(operation, dict):
+                continue
+            method_upper = method.upper()
+            params = _parameters(path_item, operation)
+            summary = _trim(operation.get("summary") or str(operation.get("description") or "").split("\n", 1)[0], 200)
+            tags = [str(t) for t in operation.get("tags") or []]
+            auth = _security_names(spec, operation)
+            auth_headers = [
+                str(s.get("name")) for s in (schemes.get(n) or {} for n in auth)
+                if isinstance(s, dict) and s.get("in") == "header" and s.get("name")
+            ]
+            if any(((schemes.get(n) or {}).get("scheme") == "bearer" or (schemes.get(n) or {}).get("type") == "oauth2") for n in auth):
+                auth_headers.insert(0, "Authorization")
+
+            lines = [f"### {method_upper} {path}", summary]
+            meta_line = [f"Operation: {operation['operationId']}"] if operation.get("operationId") else []
+            if tags:
+                meta_line.append(f"Tags: {', '.join(tags)}")
+            meta_line.append(f"Auth: {', '.join(auth) if auth else 'none'}")
+            if operation.get("deprecated"):
+                meta_line.append("DEPRECATED")
+            lines.append(" | ".join(meta_line))
+            description = _trim(operation.get("description"))
+            if description and description != summary:
+                lines.append(description)
+
+            # Swagger 2 body parameters are rendered as the request body below
+            listed = [p for p in params if p.get("in") != "body"]
+            if listed:
+                lines.append("Parameters (* = required):")
+                for p in listed:
+                    schema = p.get("schema") or {k: p[k] for k in ("type", "format", "items", "enum") if k in p}
+                    desc = _trim(p.get("description"), 160)
+                    lines.append(f"- {p['name']}{'*' if p.get('required') else ''} ({p.get('in', '')}): {schema_signature(schema)}{' - ' + desc if desc else ''}")
+
+            body_media, example = None, None
+            request_body = operation.get("requestBody")
+            body_param = next((p for p in params if p.get("in") == "body"), None)
+            if isinstance(request_body, dict):
+                body_media, body_schema, example = _media_schema(request_body.get("content"))
+                required = "*" if request_body.get("required") else ""
+                lines.append(f"Request body{required} ({body_media or 'unspecified'}): {schema_signature(body_schema)}")
+            elif body_param is not None:
+                body_media = ((operation.get("consumes") or spec.get("consumes") or ["application/json"])[0])
+                lines.append(f"Request body{'*' if body_param.get('required') else ''} ({body_media}): {schema_signature(body_param.get('schema'))}")
+
+            responses = operation.get("responses") or {}
+            if isinstance(responses, dict) and responses:
+                lines.append("Responses:")
+                for status, response in responses.items():
+                    if not isinstance(response, dict):
+                        continue
+                    media_type, schema, _ = _media_schema(response.get("content"))
+                    if schema is None and "schema" in response:
+                        schema, media_type = response["schema"], None
+                    desc = _trim(response.get("description"), 160)
+                    signature = f": {schema_signature(schema)}" if schema is not None else ""
+                    lines.append(f"- {status}{f' ({media_type})' if media_type else ''}{signature}{' - ' + desc if desc else ''}")
+
+            lines.append("Example request (generated from the spec):")
+            lines.append(_example_curl(method_upper, f"{base_url or '<BASE_URL>'}{path}", params, auth_headers, body_media, example))
+
+            section_path = " > ".join([api_title] + tags[:1] + [f"{method_upper} {path}"])
+            documents.append(Document(
+                page_content="\n".join(lines),
+                metadata={
+                    "source": title,
+                    "title": f"{method_upper} {path}",
+                    "endpoint": path,
+                    "http_method": method_upper,
+                    "base_url": base_url,
+                    "section": "endpoint",
+                    "section_path": section_path,
+                    "operation_id": operation.get("operationId"),
+                    "tags": ", ".join(tags) if tags else None,
+                }
+            ))
+            endpoints.append({
+                "http_method": method_upper,
+                "endpoint": path,
+                "summary": summary,
+                "auth": ", ".join(auth) if auth else "none",
+                "has_curl": False,
+                "tags": tags,
+                "parameters": [{"name": p["name"], "in": p.get("in"), "required": bool(p.get("required"))} for p in params],
+            })
+
+    overview = [f"# {api_title}" + (f" (version {info['version']})" if info.get("version") else "")]
+    if info.get("description"):
+        overview.append(_trim(info["description"], OPENAPI_MAX_DESCRIPTION_CHARS * 2))
+    if urls:
+        overview.append("Base URLs: " + ", ".join(urls))
+    for name, scheme in schemes.items():
+        if isinstance(scheme, dict):
+            where = f" ({scheme.get('in')} {scheme.get('name')})" if scheme.get("in") else (f" ({scheme['scheme']})" if scheme.get("scheme") else "")
+            overview.append(f"Auth {name}: {scheme.get('type', '')}{where}")
+    overview.append(f"Operations ({len(endpoints)}):")
+    overview.extend(f"- {e['http_method']} {e['endpoint']}: {e['summary']}" for e in endpoints)
+    documents.insert(0, Document(
+        page_content="\n".join(overview),
+        metadata={"source": title, "title": f"{api_title} - API overview", "section": "overview", "section_path": api_title, "base_url": base_url}
+    ))
+
+    stats = {
+        "spec_version": str(spec.get("openapi") or spec.get("swagger")),
+        "operations": len(endpoints),
+        "documents": len(documents),
+        "ref_lookups": resolver.lookups,
+        "ref_cache_hits": resolver.hits,
+        "build_ms": round((time.perf_counter() - started) * 1000.0, 1),
+    }
+    logger.info(f"OpenAPI spec: {stats['operations']} operations, {stats['ref_lookups']} $ref lookups ({stats['ref_cache_hits']} memoized) in {stats['build_ms']} ms")
+    return {
+        "documents": documents,
+        "catalog": {
+            "extracted_endpoints": endpoints,
+            "detected_base_url": base_url,
+            "base_urls_detected": urls,
+            "curl_examples_total_count": 0,
+        },
+        "stats": stats,
+    }
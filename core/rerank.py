@@ -0,0 +1,133 @@
+"""
+Cohere rerank layer for hybrid retrieval.
+Results are cached by (query hash, candidate-id set), so the same question over
+the same candidates is only sent once per RERANK_CACHE_TTL_SECONDS. Reranking is
+skipped when the hybrid scores are already decisive (the best candidate leads
+the runner-up by RERANK_SKIP_MARGIN of its score), and candidate texts are cut
+to RERANK_MAX_CHARS before sending, which bounds request size and latency.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from core.config import COHERE_RERANK_MODEL, RERANK_CACHE_SIZE, RERANK_CACHE_TTL_SECONDS, RERANK_SKIP_MARGIN, RERANK_MAX_CHARS
+from core.embedding_cache import normalize_query
+from core.tracing import record_stage
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _candidate_id(doc: Document) -> str:
+    meta = doc.metadata or {}
+    return meta.get("content_hash") or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+
+def is_decisive(scores: Optional[List[float]], margin: float = RERANK_SKIP_MARGIN) -> bool:
+    """True when the top score leads the second by at least margin (relative to the top)."""
+    if margin <= 0 or not scores or len(scores) < 2:
+        return False
+    ranked = sorted(scores, reverse=True)
+    return ranked[0] > 0 and (ranked[0] - ranked[1]) / ranked[0] >= margin
+
+class Reranker:
+    """Cached, skip-aware wrapper around cohere.Client.rerank with call/skip counters."""
+
+    def __init__(self, max_entries: int = RERANK_CACHE_SIZE, ttl_seconds: float = RERANK_CACHE_TTL_SECONDS, margin: float = RERANK_SKIP_MARGIN, max_chars: int = RERANK_MAX_CHARS, model: str = COHERE_RERANK_MODEL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.margin = margin
+        self.max_chars = max_chars
+        self.model = model
+        self._entries: "OrderedDict[Tuple[str, frozenset], Tuple[Dict[str, float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.calls = 0
+        self.cache_hits = 0
+        self.skips = 0
+        self.call_ms = 0.0
+        self.chars_trimmed = 0
+
+    def _key(self, query: str, docs: List[Document]) -> Tuple[str, frozenset]:
+        query_hash = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+        return (query_hash, frozenset(_candidate_id(d) for d in docs))
+
+    def _cached(self, key: Tuple[str, frozenset]) -> Optional[Dict[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            scores, created_at = entry
+            if self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.cache_hits += 1
+            return scores
+
+    def _store(self, key: Tuple[str, frozenset], scores: Dict[str, float]) -> None:
+        with self._lock:
+            self._entries[key] = (scores, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def rerank(self, client: Any, query: str, docs: List[Document], k_final: int, scores: Optional[List[float]] = None) -> List[Document]:
+        """Return the top k_final docs, reranked unless cached or already decisive.
+        scores are the first-stage (hybrid) scores aligned with docs, best first.
+        """
+        with self._lock:
+            self.requests += 1
+        if len(docs) <= 1:
+            return docs[:k_final]
+        if is_decisive(scores, self.margin):
+            with self._lock:
+                self.skips += 1
+            return docs[:k_final]
+
+        key = self._key(query, docs)
+        by_id = self._cached(key)
+        if by_id is None:
+            texts = [d.page_content[:self.max_chars] if self.max_chars > 0 else d.page_content for d in docs]
+            trimmed = sum(len(d.page_content) for d in docs) - sum(len(t) for t in texts)
+            started = time.perf_counter()
+            result = client.rerank(model=self.model, query=query, documents=texts, top_n=k_final)
+            elapsed = (time.perf_counter() - started) * 1000.0
+            record_stage("rerank", elapsed / 1000.0)
+            by_id = {_candidate_id(docs[r.index]): float(getattr(r, "relevance_score", 0.0)) for r in result.results}
+            with self._lock:
+                self.calls += 1
+                self.call_ms += elapsed
+                self.chars_trimmed += trimmed
+            self._store(key, by_id)
+        ranked = sorted(docs, key=lambda d: by_id.get(_candidate_id(d), -1.0), reverse=True)
+        return ranked[:k_final]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "skips": self.skips,
+                "call_rate": round(self.calls / self.requests, 4) if self.requests else 0.0,
+                "skip_rate": round(self.skips / self.requests, 4) if self.requests else 0.0,
+                "cache_hit_rate": round(self.cache_hits / self.requests, 4) if self.requests else 0.0,
+                "avg_call_ms": round(self.call_ms / self.calls, 2) if self.calls else 0.0,
+                "chars_trimmed": self.chars_trimmed,
+                "entries": len(self._entries),
+                "skip_margin": self.margin,
+                "max_chars": self.max_chars,
+            }
+
+# Process-wide reranker used by hybrid retrieval
+reranker = Reranker()
+
+def get_rerank_stats() -> Dict[str, Any]:
+    """Get rerank call, cache-hit and skip rates."""
+    return reranker.stats()
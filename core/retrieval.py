@@ -0,0 +1,86 @@
+"""
+Retrieval pipeline shared by the RAG chains.
+Expands the question into a few query variations, embeds them in one batched
+call and runs the MMR searches concurrently before merging the results.
+"""
+
+import asyncio
+from typing import Any, List, Optional
+from langchain_core.documents import Document
+from core.concurrency import run_in_worker
+from core.tracing import span
+from core.config import MAX_EXPANDED_QUERIES, ENABLE_QUERY_EXPANSION, TOP_K_RETRIEVE, TOP_K_FETCH, MMR_LAMBDA
+
+def create_mmr_retriever(vector_store: Any) -> Any:
+    """Create the MMR retriever exposed through state.retriever."""
+    return vector_store.as_retriever(
+        search_type="mmr",
+        search_kwargs={
+            "k": TOP_K_RETRIEVE,           # Final number of documents
+            "fetch_k": TOP_K_FETCH,        # Number of documents to fetch before MMR
+            "lambda_mult": MMR_LAMBDA      # Balance between relevance and diversity
+        }
+    )
+
+def expand_query(user_input: str) -> List[str]:
+    """Build API-specific query variations, capped at MAX_EXPANDED_QUERIES."""
+    expanded_queries = [user_input]
+    if not ENABLE_QUERY_EXPANSION:
+        return expanded_queries
+
+    # Add API-specific query variations
+    if any(word in user_input.lower() for word in ["api", "endpoint", "request"]):
+        expanded_queries.extend([
+            f"REST API {user_input}",
+            f"HTTP {user_input}",
+            f"API documentation {user_input}"
+        ])
+
+    # Add method-specific queries
+    if "get" in user_input.lower():
+        expanded_queries.append(user_input.replace("get", "retrieve fetch"))
+    if "post" in user_input.lower():
+        expanded_queries.append(user_input.replace("post", "create add"))
+    if "put" in user_input.lower():
+        expanded_queries.append(user_input.replace("put", "update modify"))
+    if "delete" in user_input.lower():
+        expanded_queries.append(user_input.replace("delete", "remove"))
+
+    return expanded_queries[:MAX_EXPANDED_QUERIES]
+
+async def aembed_queries(embeddings: Any, queries: List[str]) -> List[List[float]]:
+    """Embed all queries in a single batched request.
+    Cohere v3 models distinguish query and document vectors, so the batch is sent
+    with input_type="search_query" when the embeddings object supports it.
+    """
+    aembed = getattr(embeddings, "aembed", None)
+    if aembed is not None:
+        return await aembed(queries, input_type="search_query")
+    return await embeddings.aembed_documents(queries)
+
+def merge_unique(result_lists: List[List[Document]], limit: int = TOP_K_RETRIEVE) -> List[Document]:
+    """Merge per-query results in query order, dropping duplicate chunks."""
+    seen = set()
+    unique_docs: List[Document] = []
+    for docs in result_lists:
+        for doc in docs:
+            doc_id = hash(doc.page_content)
+            if doc_id not in seen:
+                seen.add(doc_id)
+                unique_docs.append(doc)
+    return unique_docs[:limit]
+
+async def aretrieve_expanded(vector_store: Any, embeddings: Any, queries: List[str], k: int = TOP_K_RETRIEVE, fetch_k: int = TOP_K_FETCH, lambda_mult: float = MMR_LAMBDA, limit: Optional[int] = None) -> List[Document]:
+    """Retrieve documents for all expanded queries with one embedding round trip
+    and concurrent MMR searches. limit caps the merged list (defaults to k)."""
+    with span("embed"):
+        vectors = await aembed_queries(embeddings, queries)
+    with span("search"):
+        result_lists = await asyncio.gather(*[
+            run_in_worker(
+                vector_store.max_marginal_relevance_search_by_vector,
+                vector, k=k, fetch_k=fetch_k, lambda_mult=lambda_mult
+            )
+            for vector in vectors
+        ])
+    return merge_unique(list(result_lists), limit=limit or k)
@@ -13,6 +13,7 @@ detected_base_url: Optional[str] = None
 base_urls_detected: List[str] = []
 curl_examples_total_count: int = 0
 vector_store = None
+embeddings = None
 rag_chain = None
 retriever = None
 documents_count = 0
@@ -20,6 +21,11 @@ db_size_mb = 0.0
 last_updated = None
 weaviate_client_instance = None
 weaviate_index_name = None
+last_ingest_stats = None
+endpoint_index = None
+bm25_index = None
+# Bumped on every state change; keys the cached /docs/status body
+version = 0
 
 def get_state() -> Dict[str, Any]:
     """Get current state as a dictionary."""
@@ -30,6 +36,7 @@ def get_state() -> Dict[str, Any]:
         "base_urls_detected": base_urls_detected,
         "curl_examples_total_count": curl_examples_total_count,
         "vector_store": vector_store,
+        "embeddings": embeddings,
         "rag_chain": rag_chain,
         "retriever": retriever,
         "documents_count": documents_count,
@@ -37,8 +44,28 @@ def get_state() -> Dict[str, Any]:
         "last_updated": last_updated,
         "weaviate_client_instance": weaviate_client_instance,
         "weaviate_index_name": weaviate_index_name,
+        "last_ingest_stats": last_ingest_stats,
+        "endpoint_index": endpoint_index,
+        "bm25_index": bm25_index,
     }
 
+def swap(values: Dict[str, Any]) -> None:
+    """Replace several state variables in one step.
+    Callers run this on the event loop without awaiting in between, so request
+    handlers see either the old index or the new one, never a mix.
+    """
+    module_vars = globals()
+    for key in values:
+        if key not in module_vars:
+            raise KeyError(f"Unknown state variable: {key}")
+    module_vars.update(values)
+    bump_version()
+
+def bump_version() -> None:
+    """Mark the state as changed (call after assigning variables directly)."""
+    global version
+    version += 1
+
 def is_ready() -> bool:
     """Check if the RAG system is ready."""
     return rag_chain is not None and retriever is not None
@@ -0,0 +1,238 @@
+"""
+Request tracing and Prometheus metrics.
+Every HTTP request gets a trace (id from the X-Trace-Id request header, or a new
+one) held in a contextvar; span("embed") / span("search") / ... time pipeline
+stages into it and into the rag_stage_duration_seconds histogram. LLM calls are
+timed and their token usage recorded by a LangChain callback attached to the
+chat model. TraceMiddleware returns the trace id (plus a Server-Timing summary)
+in the response headers and logs one line per request; render_metrics() emits
+everything in the Prometheus text format for GET /metrics.
+"""
+
+import contextvars
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from core.config import TRACING_ENABLED, TRACE_HEADER, METRICS_BUCKETS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_VALID_TRACE_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = METRICS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                base = _labels(self.label_names, labels)
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{{{base}{',' if base else ''}le=\"{bound:g}\"}} {cumulative:g}")
+                lines.append(f"{self.name}_bucket{{{base}{',' if base else ''}le=\"+Inf\"}} {series[-1]:g}")
+                lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+                lines.append(f"{self.name}_count{{{base}}} {series[-1]:g}")
+        return lines
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    def _escape(v: str) -> str:
+        return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return ",".join(f"{n}=\"{_escape(v)}\"" for n, v in zip(names, values))
+
+STAGE_SECONDS = Histogram("rag_stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+REQUEST_SECONDS = Histogram("rag_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"))
+LLM_TOKENS = Counter("rag_llm_tokens_total", "LLM tokens reported by the Anthropic response metadata.", ("model", "type"))
+LLM_CALLS = Counter("rag_llm_calls_total", "LLM calls by outcome.", ("model", "outcome"))
+
+class Trace:
+    """Per-request stage timings and token usage."""
+    __slots__ = ("trace_id", "started", "stages", "input_tokens", "output_tokens")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{stage};dur={seconds * 1000.0:.1f}" for stage, seconds in self.stages.items())
+
+_current: "contextvars.ContextVar[Optional[Trace]]" = contextvars.ContextVar("rag_trace", default=None)
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+def current_trace_id() -> Optional[str]:
+    trace = _current.get()
+    return trace.trace_id if trace is not None else None
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record an already-measured stage duration."""
+    if not TRACING_ENABLED:
+        return
+    STAGE_SECONDS.observe((stage,), seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.add(stage, seconds)
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block as one pipeline stage (works in sync and async code)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+def _token_usage(response: Any) -> Tuple[int, int]:
+    """(input, output) tokens from an LLMResult: message usage_metadata, else llm_output usage."""
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return int(usage.get("input_tokens", 0)), int(usage.get("output_tokens", 0))
+    usage = (getattr(response, "llm_output", None) or {}).get("usage") or {}
+    if not isinstance(usage, dict):
+        usage = {"input_tokens": getattr(usage, "input_tokens", 0), "output_tokens": getattr(usage, "output_tokens", 0)}
+    return int(usage.get("input_tokens", 0) or 0), int(usage.get("output_tokens", 0) or 0)
+
+class LLMTracer(BaseCallbackHandler):
+    """Times chat-model calls as the "llm" stage and records their token usage."""
+
+    # Run in the caller's context so the request's trace is visible
+    run_inline = True
+
+    def __init__(self, model: str):
+        self.model = model
+        self._starts: Dict[Any, Tuple[float, Optional[Trace]]] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: Any, **kwargs: Any) -> None:
+        self._starts[run_id] = (time.perf_counter(), _current.get())
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: Any, **kwargs: Any) -> None:
+        self._starts[run_id] = (time.perf_counter(), _current.get())
+
+    def _finish(self, run_id: Any, outcome: str) -> Optional[Trace]:
+        started, trace = self._starts.pop(run_id, (None, None))
+        if started is not None and TRACING_ENABLED:
+            seconds = time.perf_counter() - started
+            STAGE_SECONDS.observe(("llm",), seconds)
+            if trace is not None:
+                trace.add("llm", seconds)
+        LLM_CALLS.inc((self.model, outcome))
+        return trace
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+        trace = self._finish(run_id, "ok")
+        input_tokens, output_tokens = _token_usage(response)
+        LLM_TOKENS.inc((self.model, "input"), input_tokens)
+        LLM_TOKENS.inc((self.model, "output"), output_tokens)
+        if trace is not None:
+            trace.input_tokens += input_tokens
+            trace.output_tokens += output_tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        self._finish(run_id, "error")
+
+class TraceMiddleware:
+    """ASGI middleware: opens a trace per HTTP request and reports it on the way out."""
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.header = TRACE_HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope.get("headers") or []).get(self.header, b"").decode("latin-1")
+        trace = Trace(incoming if _VALID_TRACE_ID.match(incoming) else None)
+        token = _current.set(trace)
+        status = [500]
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((self.header, trace.trace_id.encode("latin-1")))
+                # Complete for regular responses; streamed ones only carry the stages before the first byte
+                if trace.stages:
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            # Route templates (not raw paths) keep label cardinality bounded
+            route_label = getattr(route, "path", None) or "unmatched"
+            elapsed = time.perf_counter() - trace.started
+            REQUEST_SECONDS.observe((scope.get("method", ""), route_label, str(status[0])), elapsed)
+            if trace.stages or trace.input_tokens:
+                stages = " ".join(f"{stage}={seconds * 1000.0:.1f}ms" for stage, seconds in trace.stages.items())
+                logger.info(
+                    f"trace={trace.trace_id} {scope.get('method')} {route_label} {status[0]} {elapsed * 1000.0:.1f}ms "
+                    f"{stages} tokens_in={trace.input_tokens} tokens_out={trace.output_tokens}"
+                )
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in (STAGE_SECONDS, REQUEST_SECONDS, LLM_TOKENS, LLM_CALLS):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
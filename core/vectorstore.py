@@ -1,9 +1,10 @@
 import weaviate
 from langchain_community.vectorstores import Weaviate
-from langchain_community.embeddings import CohereEmbeddings
+from langchain_cohere import CohereEmbeddings
 from langchain_core.documents import Document
 from typing import List, Dict, Any, Optional
 from core.config import WEAVIATE_URL, WEAVIATE_INDEX_NAME, COHERE_API_KEY , COHERE_EMBEDDING_MODEL, COHERE_RERANK_MODEL
+from core.clients import get_weaviate_client as get_shared_weaviate_client, get_cohere_embeddings
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -15,12 +16,12 @@ rag_chain = None
 retriever = None
 
 def initialize_weaviate() -> weaviate.Client:
-    """Initialize Weaviate client."""
+    """Initialize Weaviate client (the shared one from the client registry)."""
     global weaviate_client_instance
     
     if weaviate_client_instance is None:
         try:
-            weaviate_client_instance = weaviate.Client(WEAVIATE_URL)
+            weaviate_client_instance = get_shared_weaviate_client(WEAVIATE_URL)
             logger.info(f"Connected to Weaviate at {WEAVIATE_URL}")
         except Exception as e:
             logger.error(f"Failed to connect to Weaviate: {e}")
@@ -128,14 +129,11 @@ def create_weaviate_schema() -> None:
         raise
 
 def get_embeddings() -> CohereEmbeddings:
-    """Get Cohere embeddings instance."""
+    """Get the shared Cohere embeddings instance."""
     if not COHERE_API_KEY:
         raise ValueError("COHERE_API_KEY environment variable is required")
     
-    return CohereEmbeddings(
-        model=COHERE_EMBEDDING_MODEL,
-        cohere_api_key=COHERE_API_KEY
-    )
+    return get_cohere_embeddings(COHERE_EMBEDDING_MODEL)
 
 def create_vectorstore(documents: List[Document]) -> Weaviate:
     """Create a Weaviate vector store from documents."""
@@ -347,6 +347,8 @@ function Chat() {
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
       let streamedResponse = "";
+      let structured = null;
+      let buffered = "";
 
       const readStream = () => {
         return reader.read().then(({ done, value }) => {
@@ -374,9 +376,10 @@ function Chat() {
             return;
           }
 
-          // Decode the chunk
-          const chunk = decoder.decode(value, { stream: true });
-          const lines = chunk.split('\n');
+          // Decode the chunk; keep a trailing partial line for the next read
+          buffered += decoder.decode(value, { stream: true });
+          const lines = buffered.split('\n');
+          buffered = lines.pop();
           
           for (const line of lines) {
             if (line.startsWith('data: ')) {
@@ -393,18 +396,24 @@ function Chat() {
                     ...h,
                     {
                       role: "bot",
-                      data: { 
+                      data: structured || { 
                         answer: streamedResponse,
                         description: "",
                         endpoints: [],
                         code_examples: null,
                         links: []
                       },
-                      content: streamedResponse,
+                      content: structured ? structured.answer : streamedResponse,
                       sources: [],
                     },
                   ]);
                   return;
+                } else if (data.structured) {
+                  // Final structured fields (endpoints, code examples, links)
+                  structured = data.structured;
+                } else if (data.error) {
+                  streamedResponse += `\n\n${data.error}`;
+                  setStreamMsg(streamedResponse);
                 } else if (data.memory_count) {
                   // Memory count received
                   console.log("Memory count:", data.memory_count);
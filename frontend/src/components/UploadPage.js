@@ -109,9 +109,6 @@ function UploadPage() {
       duration: Infinity,
     });
     
-    // Start progress simulation
-    const progressInterval = simulateProgress();
-
     try {
       const response = await axios.post(`${API_BASE_URL}/docs/process`, {
         content: documentation,
@@ -119,8 +116,11 @@ function UploadPage() {
         session_id: "default"
       });
 
+      // Processing runs as a background job; poll it until it finishes
+      const job = await waitForJob(response.data.data.job_id);
+
       setProcessingProgress(100);
-      setResult(response.data.data);
+      setResult(job.result);
       await checkVectorDBStatus();
       
       // Dismiss loading toast and show success
@@ -140,7 +140,6 @@ function UploadPage() {
       toast.error(error.response?.data?.detail || 'Failed to process documentation.');
       setError(error.response?.data?.detail || 'Failed to process documentation.');
     } finally {
-      clearInterval(progressInterval);
       setIsProcessing(false);
       setProcessingProgress(0);
     }
@@ -170,19 +169,22 @@ function UploadPage() {
   };
 
 
-  // Simulate processing progress
-  const simulateProgress = () => {
+  // Poll an ingestion job until it completes, mirroring its progress
+  const waitForJob = async (jobId) => {
     setProcessingProgress(0);
-    const interval = setInterval(() => {
-      setProcessingProgress(prev => {
-        if (prev >= 90) {
-          clearInterval(interval);
-          return 90;
-        }
-        return prev + Math.random() * 15;
-      });
-    }, 200);
-    return interval;
+    while (true) {
+      const { data: job } = await axios.get(`${API_BASE_URL}/docs/jobs/${jobId}`);
+      setProcessingProgress(job.percent || 0);
+      if (job.status === 'completed') {
+        return job;
+      }
+      if (job.status === 'failed') {
+        const err = new Error(job.error || 'Failed to process documentation.');
+        err.response = { data: { detail: job.error } };
+        throw err;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
   };
 
   return (
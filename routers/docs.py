@@ -1,22 +1,36 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from models.requests import DocumentationRequest
 from models.responses import SuccessResponse, ErrorResponse
-from utils.parser import extract_endpoints_from_text, detect_base_url_from_text, extract_all_base_urls, _extract_curl_blocks_from_text
-from utils.helpers import detect_intent, determine_response_type, parse_structured_response, build_section_path, build_structured_endpoint_json, build_catalog_text, attempt_parse_openapi, _llm_recall_endpoints_full, sanitize_index_name, _validate_endpoint_presence
+from utils.parser import extract_endpoints_from_text, detect_base_url_from_text, extract_all_base_urls, _extract_curl_blocks_from_text, parse_explicit_endpoint
+from utils.helpers import detect_intent, determine_response_type, parse_structured_response, build_section_path, build_structured_endpoint_json, build_catalog_text, attempt_parse_openapi, sanitize_index_name, _validate_endpoint_presence
 from langchain_core.documents import Document
 from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Weaviate as WeaviateStore
-from langchain_cohere import CohereEmbeddings
-from langchain_anthropic import ChatAnthropic
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.schema.runnable import RunnableLambda
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+import asyncio
 import json
 import re
 import time
-import weaviate as weaviate_client
 import os
+from core.retrieval import create_mmr_retriever
+from core.concurrency import run_in_worker
+from core.ingest import ingest_documents, open_vector_store, new_class_name, retire_classes, drop_class, generation_of
+from core.local_vectorstore import LocalVectorStore, ingest_documents_local, delete_local_index, list_local_indexes, index_dir
+from core.config import VECTOR_BACKEND, BM25_ENABLED, OPENAPI_INGEST_ENABLED
+from core.rerank import reranker
+from core.tracing import span
+from core.bm25 import build_and_save, load_index, delete_index, lexical_search, rrf_fuse
+from core.endpoint_index import build_endpoint_index
+from core.endpoint_recall import recall_endpoints
+from core.openapi import looks_like_openapi, load_spec, build_openapi_documents
+from core.jobs import IngestJob, create_job, get_job, list_jobs
+from core.chains import build_rag_chain
+from core.embedding_cache import get_query_embeddings, get_cache_stats
+from core.answer_cache import answer_cache
+from core.clients import get_weaviate_client, get_cohere_client, get_chat_model, client_stats
+from utils.http_cache import VersionedJSON
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # SMART & FLEXIBLE cURL GENERATION FUNCTION
 def generate_perfect_curl(user_input: str, context_docs: List[Document], detected_base_url: str = None) -> Dict[str, Any]:
@@ -27,18 +41,14 @@ def generate_perfect_curl(user_input: str, context_docs: List[Document], detecte
     try:
         # Check if user wants to create cURL
         if "create" in user_input.lower() and "curl" in user_input.lower():
-            print(f"DEBUG: Smart cURL generation requested: {user_input}")
-            print(f"DEBUG: Context docs available: {len(context_docs)}")
+            logger.debug("Smart cURL generation requested: %s", user_input)
+            logger.debug("Context docs available: %d", len(context_docs))
             
             # Import required modules
             import re
-            from langchain_anthropic import ChatAnthropic
             
-            # Initialize Claude
-            claude = ChatAnthropic(
-                model="claude-3-5-haiku-20241022",
-                anthropic_api_key=os.getenv("ANTHROPIC_API_KEY")
-            )
+            # Shared Claude client (keeps its connection pool across requests)
+            claude = get_chat_model(temperature=None, max_tokens=1024, model=ANTHROPIC_MODEL)
             
             # SMART INTENT DETECTION - Understand what the user wants
             user_request = user_input.lower()
@@ -55,7 +65,7 @@ def generate_perfect_curl(user_input: str, context_docs: List[Document], detecte
                 if endpoint_match:
                     specific_endpoint = endpoint_match.group(0)
             
-            print(f"DEBUG: Intent detected - All request: {is_all_request}, Method specific: {is_method_specific}, Specific endpoint: {specific_endpoint}")
+            logger.debug("Intent detected - All request: %s, Method specific: %s, Specific endpoint: %s", is_all_request, is_method_specific, specific_endpoint)
             
             # DYNAMIC DOCUMENT SEARCH - Find relevant documentation
             relevant_docs = []
@@ -101,9 +111,9 @@ def generate_perfect_curl(user_input: str, context_docs: List[Document], detecte
                 
                 if is_relevant:
                     relevant_docs.append(doc)
-                    print(f"DEBUG: Found relevant doc: {doc_metadata.get('title', 'No title')[:50]}")
+                    logger.debug("Found relevant doc: %.50s", doc_metadata.get('title', 'No title'))
             
-            print(f"DEBUG: Found {len(relevant_docs)} relevant documents")
+            logger.debug("Found %d relevant documents", len(relevant_docs))
             
             if relevant_docs:
                 # Combine relevant documentation for Claude
@@ -151,11 +161,11 @@ User Request: {user_input}
 Generate the appropriate cURL commands based on what the user is asking for."""
                 
                 # GENERATE PERFECT cURL USING CLAUDE
-                print(f"DEBUG: Sending intelligent prompt to Claude")
+                logger.debug("Sending intelligent prompt to Claude")
                 curl_response = claude.invoke(prompt)
                 curl_content = curl_response.content.strip()
                 
-                print(f"DEBUG: Claude response received, length: {len(curl_content)}")
+                logger.debug("Claude response received, length: %d", len(curl_content))
                 
                 # CLEAN UP AND FORMAT THE RESPONSE
                 if curl_content.startswith("```bash"):
@@ -200,7 +210,7 @@ Generate the appropriate cURL commands based on what the user is asking for."""
                     }
             
             else:
-                print(f"DEBUG: No relevant documentation found")
+                logger.debug("No relevant documentation found")
                 # Fallback response
                 return {
                     "short_answers": ["No relevant documentation found for cURL generation"],
@@ -212,7 +222,7 @@ Generate the appropriate cURL commands based on what the user is asking for."""
                 }
                 
     except Exception as e:
-        print(f"ERROR: Smart cURL generation failed: {e}")
+        logger.error(f"Smart cURL generation failed: {e}")
         return {
             "short_answers": ["cURL generation failed"],
             "descriptions": [f"Failed to generate cURL commands: {str(e)}"],
@@ -236,47 +246,43 @@ WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://127.0.0.1:8080")
 WEAVIATE_INDEX_NAME = os.getenv("WEAVIATE_INDEX_NAME", "RAGDocs")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-20241022")
+RELOAD_ENDPOINT_LIMIT = 10000  # Endpoint documents read per class on reload (Weaviate's default query cap)
 
 # Add missing helper functions
 
-def parse_explicit_endpoint(question: str) -> Optional[Dict[str, str]]:
-    """Parse patterns like 'GET /users/{id}' from the question."""
-    # First try explicit method + path pattern
-    m = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+(/[^\s#]+)", question)
-    if m:
-        return {"http_method": m.group(1).upper(), "endpoint": m.group(2)}
-    
-    # Then try to extract just the method if no path is specified
-    # This helps with queries like "generate curl for PUT endpoints"
-    method_match = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\b", question)
-    if method_match:
-        return {"http_method": method_match.group(1).upper(), "endpoint": None}
-    
-    return None
-
 def hybrid_retrieve_documents(user_input: str, method: Optional[str], endpoint: Optional[str], k_candidates: int = 24, k_final: int = 8, alpha: float = 0.5) -> List[Document]:
     """Hybrid retrieval (BM25 + vector) with optional endpoint/method filter, plus reranking.
     Returns a list of langchain Documents.
     """
     try:
         import core.state as state
+        # Stored endpoints are templates; resolve concrete paths like /users/123 to /users/{id}
+        if endpoint and state.endpoint_index is not None:
+            match = state.endpoint_index.lookup(method, endpoint)
+            if match is not None:
+                endpoint = match.template
+        if isinstance(state.vector_store, LocalVectorStore):
+            return _local_filtered_retrieve(state.vector_store, user_input, method, endpoint, k_final)
         if not state.weaviate_client_instance:
-            return []
+            return _lexical_filtered_retrieve(user_input, method, endpoint, k_final)
         # Embed query
-        query_vector = CohereEmbeddings(model="embed-english-v3.0").embed_query(user_input)
+        with span("embed"):
+            query_vector = get_query_embeddings().embed_query(user_input)
         cls = state.weaviate_index_name or WEAVIATE_INDEX_NAME
-        props = ["page_content", "title", "section_path", "endpoint", "http_method", "section"]
-        qb = state.weaviate_client_instance.query.get(cls, props)
+        props = ["page_content", "title", "section_path", "endpoint", "http_method", "section", "content_hash"]
+        qb = state.weaviate_client_instance.query.get(cls, props).with_additional(["score"])
         where_clause = _build_where_clause(method, endpoint)
         if where_clause:
             qb = qb.with_where(where_clause)
-        result = (
-            qb.with_hybrid(query=user_input, alpha=alpha, vector=query_vector)
-              .with_limit(k_candidates)
-              .do()
-        )
+        with span("search"):
+            result = (
+                qb.with_hybrid(query=user_input, alpha=alpha, vector=query_vector)
+                  .with_limit(k_candidates)
+                  .do()
+            )
         objs = result.get("data", {}).get("Get", {}).get(cls, []) if isinstance(result, dict) else []
         docs: List[Document] = []
+        scores: List[float] = []
         for obj in objs:
             text = obj.get("page_content") or ""
             meta = {
@@ -285,28 +291,57 @@ def hybrid_retrieve_documents(user_input: str, method: Optional[str], endpoint:
                 "endpoint": obj.get("endpoint"),
                 "http_method": obj.get("http_method"),
                 "section": obj.get("section"),
+                "content_hash": obj.get("content_hash"),
             }
             docs.append(Document(page_content=text, metadata=meta))
-        # Rerank with Cohere if available
+            # Hybrid scores come back as strings under _additional
+            try:
+                scores.append(float((obj.get("_additional") or {}).get("score")))
+            except (TypeError, ValueError):
+                scores = []
+        # Rerank with Cohere if available (cached, and skipped when the hybrid ranking is decisive)
         try:
             api_key = os.getenv("COHERE_API_KEY")
             if api_key and len(docs) > 1:
-                import cohere  # type: ignore
-                client = cohere.Client(api_key)
-                rer = client.rerank(model="rerank-english-v3.0", query=user_input, documents=[d.page_content for d in docs])
-                idx_to_score = {r.index: float(getattr(r, "relevance_score", 0.0)) for r in rer.results}
-                ranked = sorted(enumerate(docs), key=lambda t: idx_to_score.get(t[0], 0.0), reverse=True)
-                docs = [d for _, d in ranked[:k_final]]
+                docs = reranker.rerank(get_cohere_client(), user_input, docs, k_final, scores=scores if len(scores) == len(docs) else None)
             else:
                 docs = docs[:k_final]
         except Exception as rerank_err:
-            print(f"DEBUG: rerank failed: {rerank_err}")
+            logger.warning(f"rerank failed: {rerank_err}")
             docs = docs[:k_final]
         return docs
     except Exception as err:
-        print(f"DEBUG: hybrid_retrieve_documents error: {err}")
+        # Weaviate slow or down: answer from the in-process BM25 index instead of with no context
+        logger.warning(f"hybrid_retrieve_documents error: {err}")
+        return _lexical_filtered_retrieve(user_input, method, endpoint, k_final, fallback=True)
+
+def _metadata_filter(method: Optional[str], endpoint: Optional[str]) -> Optional[Dict[str, Any]]:
+    where: Dict[str, Any] = {}
+    if method:
+        where["http_method"] = method.upper()
+    if endpoint:
+        where["endpoint"] = endpoint
+    return where or None
+
+def _lexical_filtered_retrieve(user_input: str, method: Optional[str], endpoint: Optional[str], k_final: int, fallback: bool = False) -> List[Document]:
+    """BM25 search with the same method/endpoint filter ([] when there is no lexical index)."""
+    import core.state as state
+    if state.bm25_index is None or not BM25_ENABLED:
+        return []
+    try:
+        return lexical_search(state.bm25_index, user_input, k=k_final, filter=_metadata_filter(method, endpoint), fallback=fallback)
+    except Exception as err:
+        logger.warning(f"BM25 search failed: {err}")
         return []
 
+def _local_filtered_retrieve(store: LocalVectorStore, user_input: str, method: Optional[str], endpoint: Optional[str], k_final: int) -> List[Document]:
+    """Filtered vector search on the local backend, fused with BM25 via reciprocal-rank fusion."""
+    with span("search"):
+        vector_docs = store.similarity_search(user_input, k=k_final, filter=_metadata_filter(method, endpoint))
+    with span("bm25"):
+        lexical_docs = _lexical_filtered_retrieve(user_input, method, endpoint, k_final)
+    return rrf_fuse([vector_docs, lexical_docs], limit=k_final) if lexical_docs else vector_docs
+
 def _build_where_clause(method: Optional[str], endpoint: Optional[str]) -> Optional[Dict[str, Any]]:
     operands: List[Dict[str, Any]] = []
     if endpoint:
@@ -373,301 +408,403 @@ def build_structured_endpoint_json(base_url: Optional[str], endpoint: Dict[str,
         "_type": "api_endpoint_structured"
     }
 
-@router.post("/process", response_model=SuccessResponse)
-async def process_documentation(request: DocumentationRequest):
-    """Process API documentation and create RAG system efficiently."""
-    import core.state as state
-    
-    try:
-        # Strip yaml front matter and store raw text
-        raw = re.sub(r"^---\n.*?\n---\n", "", request.content, flags=re.DOTALL)
-        state.raw_document_text = raw
-        print(f"Processing document: {len(raw)} characters")
+def _split_major_sections(raw: str) -> List[Document]:
+    """Split raw documentation by its h1/h2 headers (shared by chunking and endpoint recall)."""
+    major_sections = [("#", "h1"), ("##", "h2")]
+    major_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=major_sections)
+    return major_splitter.split_text(raw)
 
-        # ENHANCED CHUNKING STRATEGY - Multi-level chunking for better context
-        # First: Split by major sections to preserve API structure
-        major_sections = [("#", "h1"), ("##", "h2")]
-        major_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=major_sections)
-        major_docs = major_splitter.split_text(raw)
-        
-        # Second: Create detailed chunks with better separators
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,           # Smaller chunks for better precision
-            chunk_overlap=300,         # Good overlap for context
-            separators=[
-                "\n\n## ",             # API section headers
-                "\n\n### ",            # Endpoint headers
-                "\n\n",                # Paragraph breaks
-                "\n",                  # Line breaks
-                " ",                   # Word breaks
-                ""                     # Character breaks
-            ],
-            length_function=len,
-            is_separator_regex=False
+def _chunk_document(raw: str, title: str, major_docs: Optional[List[Document]] = None) -> List[Document]:
+    """Split raw documentation into enriched, filtered chunks."""
+    # ENHANCED CHUNKING STRATEGY - Multi-level chunking for better context
+    # First: Split by major sections to preserve API structure
+    if major_docs is None:
+        major_docs = _split_major_sections(raw)
+    
+    # Second: Create detailed chunks with better separators
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=1500,           # Smaller chunks for better precision
+        chunk_overlap=300,         # Good overlap for context
+        separators=[
+            "\n\n## ",             # API section headers
+            "\n\n### ",            # Endpoint headers
+            "\n\n",                # Paragraph breaks
+            "\n",                  # Line breaks
+            " ",                   # Word breaks
+            ""                     # Character breaks
+        ],
+        length_function=len,
+        is_separator_regex=False
+    )
+    
+    # Process each major section
+    all_chunks = []
+    for major_doc in major_docs:
+        section_chunks = text_splitter.split_documents([major_doc])
+        all_chunks.extend(section_chunks)
+    
+    chunks = all_chunks
+    logger.info(f"Created {len(chunks)} chunks")
+    
+    # Enrich chunks with metadata
+    for i, chunk in enumerate(chunks):
+        chunk.metadata.update({
+            "source": title,
+            "chunk_index": i,
+            "chunk_size": len(chunk.page_content),
+            "section_path": build_section_path(chunk.metadata)
+        })
+    
+    # Filter out low-quality chunks (keep all valid content)
+    valid_chunks = []
+    for chunk in chunks:
+        content = chunk.page_content.strip()
+        # Only reject if extremely short or clearly broken
+        if len(content) >= 50 and not any(pattern in content for pattern in ["}\n]\n```", "wABEgEAAAADAOz_"]):
+            valid_chunks.append(chunk)
+    
+    chunks = valid_chunks
+    logger.info(f"Valid chunks after filtering: {len(chunks)}")
+    
+    # Fallback if too few chunks
+    if len(chunks) < 10:
+        logger.info("Creating fallback chunks with larger size")
+        fallback_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=4000,
+            chunk_overlap=800,
+            separators=["\n\n", "\n", " ", ""]
         )
-        
-        # Process each major section
-        all_chunks = []
-        for major_doc in major_docs:
-            section_chunks = text_splitter.split_documents([major_doc])
-            all_chunks.extend(section_chunks)
-        
-        chunks = all_chunks
-        print(f"Created {len(chunks)} chunks")
-        
-        # Enrich chunks with metadata
-        for i, chunk in enumerate(chunks):
-            chunk.metadata.update({
-                "source": request.title,
-                "chunk_index": i,
-                "chunk_size": len(chunk.page_content),
-                "section_path": build_section_path(chunk.metadata)
-            })
-        
-        # Filter out low-quality chunks (keep all valid content)
-        valid_chunks = []
-        for chunk in chunks:
-            content = chunk.page_content.strip()
-            # Only reject if extremely short or clearly broken
-            if len(content) >= 50 and not any(pattern in content for pattern in ["}\n]\n```", "wABEgEAAAADAOz_"]):
-                valid_chunks.append(chunk)
-        
-        chunks = valid_chunks
-        print(f"Valid chunks after filtering: {len(chunks)}")
-        
-        # Fallback if too few chunks
-        if len(chunks) < 10:
-            print("Creating fallback chunks with larger size")
-            fallback_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=4000,
-                chunk_overlap=800,
-                separators=["\n\n", "\n", " ", ""]
-            )
-            chunks = fallback_splitter.split_documents([Document(page_content=raw, metadata={"source": request.title})])
-            print(f"Fallback chunks created: {len(chunks)}")
-
-        # Initialize embeddings and Weaviate
-        print("Initializing embeddings and Weaviate...")
-        embeddings = CohereEmbeddings(model="embed-english-v3.0")
-        index_name = sanitize_index_name(request.title)
-        client = weaviate_client.Client(url=WEAVIATE_URL)
-        
-        # Test connections
-        client.is_ready()
-        print("✅ Connections successful")
-        
-        # Store globally
-        state.weaviate_client_instance = client
-        state.weaviate_index_name = index_name
+        chunks = fallback_splitter.split_documents([Document(page_content=raw, metadata={"source": title})])
+        logger.info(f"Fallback chunks created: {len(chunks)}")
+    return chunks
 
-        # Extract endpoints and base URL
-        print("Extracting endpoints...")
-        structured_eps = attempt_parse_openapi(raw)
-        text_eps = extract_endpoints_from_text(raw)
-        llm_eps_raw = _llm_recall_endpoints_full(raw)
-        
-        # Merge and validate endpoints
-        merged: Dict[str, Dict[str, Any]] = {}
-        all_endpoint_sources = structured_eps + text_eps + llm_eps_raw
-        
-        for e in all_endpoint_sources:
-            key = f"{e.get('http_method')} {e.get('endpoint')}"
-            if key not in merged and e.get('http_method') and e.get('endpoint'):
-                merged[key] = e
-        
-        state.extracted_endpoints = list(merged.values())
-        state.detected_base_url = detect_base_url_from_text(raw)
-        state.base_urls_detected = extract_all_base_urls(raw)
-        state.curl_examples_total_count = len(_extract_curl_blocks_from_text(raw))
-        
-        print(f"Found {len(state.extracted_endpoints)} endpoints")
-
-        # Create endpoint documents
-        endpoint_docs: List[Document] = []
-        for e in state.extracted_endpoints:
-            endpoint_doc = Document(
-                page_content=f"### {e['http_method']} {e['endpoint']}\n{e.get('summary', '')}",
-                metadata={
-                    "source": request.title,
-                    "title": f"{e['http_method']} {e['endpoint']}",
-                    "endpoint": e["endpoint"],
-                    "http_method": e["http_method"],
-                    "base_url": state.detected_base_url,
-                    "section": "endpoint",
-                }
-            )
-            endpoint_docs.append(endpoint_doc)
+def _extract_endpoint_catalog(raw: str, sections: List[Document]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Extract endpoints, base URLs and cURL counts from raw documentation.
+    Returns (catalog, endpoint recall stats).
+    """
+    structured_eps = attempt_parse_openapi(raw)
+    text_eps = extract_endpoints_from_text(raw)
+    llm_eps_raw, recall_stats = recall_endpoints(sections)
+    
+    # Merge and validate endpoints
+    merged: Dict[str, Dict[str, Any]] = {}
+    all_endpoint_sources = structured_eps + text_eps + llm_eps_raw
+    
+    for e in all_endpoint_sources:
+        key = f"{e.get('http_method')} {e.get('endpoint')}"
+        if key not in merged and e.get('http_method') and e.get('endpoint'):
+            merged[key] = e
+    
+    return {
+        "extracted_endpoints": list(merged.values()),
+        "detected_base_url": detect_base_url_from_text(raw),
+        "base_urls_detected": extract_all_base_urls(raw),
+        "curl_examples_total_count": len(_extract_curl_blocks_from_text(raw)),
+    }, recall_stats
 
-        # Combine all documents
-        all_docs: List[Document] = chunks + endpoint_docs
-        print(f"Total documents to store: {len(all_docs)}")
-        
-        # Store in Weaviate
-        print("Storing documents in Weaviate...")
-        vector_store = WeaviateStore.from_documents(
-            documents=all_docs,
-            embedding=embeddings,
-            client=client,
-            index_name=index_name,
-            text_key="page_content",
-        )
-        
-        # Verify storage
-        stored_count = len(client.query.get(index_name, ["page_content"]).with_limit(1000).do().get("data", {}).get("Get", {}).get(index_name, []))
-        print(f"✅ Stored {stored_count} documents in Weaviate")
-        
-        # Store in global state with MMR retrieval for better diversity
-        state.vector_store = vector_store
-        state.retriever = vector_store.as_retriever(
-            search_type="mmr",
-            search_kwargs={
-                "k": 8,                    # Final number of documents
-                "fetch_k": 20,             # Number of documents to fetch before MMR
-                "lambda_mult": 0.7         # Balance between relevance and diversity
+def _build_endpoint_docs(endpoints: List[Dict[str, Any]], title: str, base_url: Optional[str]) -> List[Document]:
+    """Create one small document per extracted endpoint."""
+    endpoint_docs: List[Document] = []
+    for e in endpoints:
+        endpoint_doc = Document(
+            page_content=f"### {e['http_method']} {e['endpoint']}\n{e.get('summary', '')}",
+            metadata={
+                "source": title,
+                "title": f"{e['http_method']} {e['endpoint']}",
+                "endpoint": e["endpoint"],
+                "http_method": e["http_method"],
+                "base_url": base_url,
+                "section": "endpoint",
             }
         )
-        state.documents_count = len(all_docs)
-        state.db_size_mb = len(raw) / (1024 * 1024)
+        endpoint_docs.append(endpoint_doc)
+    return endpoint_docs
 
-        # Create RAG chain
-        print("Creating RAG chain...")
-        llm = ChatAnthropic(model=ANTHROPIC_MODEL, temperature=0.2, max_tokens=600)
-        
-        # Read prompt from file
-        with open("prompts/question_prompt.txt", "r", encoding="utf-8") as f:
-            question_prompt = f.read()
+# Serializes ingest jobs so index swaps happen in submission order
+_ingest_lock = asyncio.Lock()
 
-        prompt = ChatPromptTemplate.from_template(question_prompt)
-        doc_chain = create_stuff_documents_chain(llm=llm, prompt=prompt)
-        
-        # Enhanced retriever mapping with query expansion
-        def _map_inputs(x: Dict[str, Any]) -> Dict[str, Any]:
-            user_input = x.get("input", "")
+def _close_replaced(previous: Any, current: Any) -> None:
+    """Release a local store that a swap just replaced; its generation directory may
+    already be deleted, so its SQLite connection and memory map would otherwise leak.
+    """
+    if isinstance(previous, LocalVectorStore) and previous is not current:
+        previous.close()
+# Keep references to running job tasks so they are not garbage collected
+_job_tasks: Set[asyncio.Task] = set()
+
+async def _run_ingest_job(job: IngestJob, request: DocumentationRequest) -> None:
+    """Build a new index in the background, then swap it into state in one step.
+    The previous index keeps serving queries until the swap; on Weaviate the new
+    index is a new class generation and the older ones are deleted after the swap.
+    """
+    import core.state as state
+    
+    async with _ingest_lock:
+        client = None
+        class_name = None
+        try:
+            # Strip yaml front matter
+            raw = re.sub(r"^---\n.*?\n---\n", "", request.content, flags=re.DOTALL)
+            logger.info("Processing document: %d characters", len(raw))
             
-            # Query expansion for better retrieval
-            expanded_queries = [user_input]
+            # OpenAPI/Swagger specs become one document per operation; no chunking or endpoint extraction passes
+            loaded = None
+            if OPENAPI_INGEST_ENABLED and looks_like_openapi(raw):
+                job.set_stage("parsing_openapi", 5)
+                loaded = await run_in_worker(load_spec, raw)
+            openapi: Optional[Dict[str, Any]] = None
+            if loaded is not None:
+                spec, loader = loaded
+                openapi = await run_in_worker(build_openapi_documents, spec, request.title)
+                openapi["stats"]["loader"] = loader
+                chunks = openapi["documents"]
+            else:
+                job.set_stage("chunking", 5)
+                sections = await run_in_worker(_split_major_sections, raw)
+                chunks = await run_in_worker(_chunk_document, raw, request.title, sections)
+            job.set_counts(chunks=len(chunks))
             
-            # Add API-specific query variations
-            if any(word in user_input.lower() for word in ["api", "endpoint", "request"]):
-                expanded_queries.extend([
-                    f"REST API {user_input}",
-                    f"HTTP {user_input}",
-                    f"API documentation {user_input}"
-                ])
+            # Initialize embeddings and the vector backend (Weaviate, or the in-process index)
+            job.set_stage("connecting", 15)
+            logger.info("Initializing embeddings and %s vector backend...", VECTOR_BACKEND)
+            embeddings = get_query_embeddings()
+            index_name = sanitize_index_name(request.title)
+            # Name the index serves under (the Weaviate class of this generation)
+            class_name = index_name
+            if VECTOR_BACKEND != "local":
+                class_name = new_class_name(index_name)
+                client = await run_in_worker(get_weaviate_client, WEAVIATE_URL)
+                
+                # Test connections
+                await run_in_worker(client.is_ready)
+                logger.info("✅ Connections successful")
             
-            # Add method-specific queries
-            if "get" in user_input.lower():
-                expanded_queries.append(user_input.replace("get", "retrieve fetch"))
-            if "post" in user_input.lower():
-                expanded_queries.append(user_input.replace("post", "create add"))
-            if "put" in user_input.lower():
-                expanded_queries.append(user_input.replace("put", "update modify"))
-            if "delete" in user_input.lower():
-                expanded_queries.append(user_input.replace("delete", "remove"))
+            # Extract endpoints and base URL
+            if openapi is not None:
+                catalog, recall_stats = openapi["catalog"], None
+            else:
+                job.set_stage("extracting_endpoints", 20)
+                logger.info("Extracting endpoints...")
+                catalog, recall_stats = await run_in_worker(_extract_endpoint_catalog, raw, sections)
+            endpoints = catalog["extracted_endpoints"]
+            job.set_counts(endpoints=len(endpoints))
+            logger.info("Found %d endpoints", len(endpoints))
             
-            # Retrieve documents using expanded queries
-            all_docs = []
-            for query in expanded_queries[:3]:  # Limit to 3 queries to avoid token limits
-                docs = state.retriever.invoke(query)
-                all_docs.extend(docs)
+            # Combine all documents (operation documents already are the endpoint documents)
+            endpoint_docs = _build_endpoint_docs(endpoints, request.title, catalog["detected_base_url"]) if openapi is None else []
+            all_docs: List[Document] = chunks + endpoint_docs
+            endpoint_index = await run_in_worker(build_endpoint_index, endpoints, all_docs, catalog["base_urls_detected"])
+            job.set_counts(documents=len(all_docs))
+            logger.info("Total documents to store: %d", len(all_docs))
             
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_docs = []
-            for doc in all_docs:
-                doc_id = hash(doc.page_content)
-                if doc_id not in seen:
-                    seen.add(doc_id)
-                    unique_docs.append(doc)
+            # Store vectors: only chunks whose content hash changed are embedded and written
+            job.set_stage("embedding_and_indexing", 30)
+            logger.info("Storing documents in %s vector backend...", VECTOR_BACKEND)
             
-            # Limit to top 8 most relevant documents
-            docs = unique_docs[:8]
+            def _on_progress(done: int, total: int) -> None:
+                job.percent = 30 + int(60 * done / max(total, 1))
+                job.set_counts(embedded=done)
             
-            return {
-                "context": docs,
-                "input": user_input,
-                "chat_history": x.get("chat_history", "")
-            }
+            if client is None:
+                vector_store, ingest_stats = await run_in_worker(ingest_documents_local, embeddings, index_name, all_docs, _on_progress)
+            else:
+                vector_store, ingest_stats = await run_in_worker(ingest_documents, client, embeddings, index_name, class_name, all_docs, _on_progress)
+            job.set_counts(
+                stored=ingest_stats["stored_count"],
+                new=ingest_stats["new_chunks"],
+                unchanged=ingest_stats["unchanged_chunks"],
+                deleted=ingest_stats["deleted_chunks"],
+                copied=ingest_stats["copied_chunks"]
+            )
+            logger.info(
+                "✅ Stored %d documents in %s (%d new, %d unchanged, %d deleted; "
+                "embed %s ms, copy %d chunks in %s ms, write %s ms, %s chunks/s)",
+                ingest_stats["stored_count"], VECTOR_BACKEND, ingest_stats["new_chunks"], ingest_stats["unchanged_chunks"],
+                ingest_stats["deleted_chunks"], ingest_stats["embed_ms"], ingest_stats["copied_chunks"],
+                ingest_stats.get("copy_ms", 0.0), ingest_stats["write_ms"], ingest_stats["chunks_per_s"]
+            )
+            
+            bm25_index = await run_in_worker(build_and_save, all_docs, class_name) if BM25_ENABLED else None
+            
+            # Create RAG chain
+            job.set_stage("building_chain", 95)
+            logger.info("Creating RAG chain...")
+            rag_chain = build_rag_chain()
+            
+            # Swap the new index in atomically (no awaits from here on)
+            previous_store = state.vector_store
+            state.swap({
+                **catalog,
+                "raw_document_text": raw,
+                "weaviate_client_instance": client,
+                "weaviate_index_name": class_name,
+                "vector_store": vector_store,
+                "embeddings": embeddings,
+                "retriever": create_mmr_retriever(vector_store),
+                "rag_chain": rag_chain,
+                "endpoint_index": endpoint_index,
+                "bm25_index": bm25_index,
+                "documents_count": len(all_docs),
+                "db_size_mb": len(raw) / (1024 * 1024),
+                "last_ingest_stats": ingest_stats,
+                "last_updated": time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime()),
+            })
+            answer_cache.invalidate()
+            _close_replaced(previous_store, vector_store)
+            
+            # Older generations of this index stopped serving at the swap
+            if client is not None:
+                for retired in await run_in_worker(retire_classes, client, index_name, class_name):
+                    delete_index(retired)
+            
+            logger.info("✅ RAG system created successfully")
+            job.complete({
+                "message": f"Documentation processed successfully. Created {len(all_docs)} chunks and found {len(endpoints)} endpoints.",
+                "chunks": len(all_docs),
+                "endpoints": len(endpoints),
+                "db_size_mb": round(state.db_size_mb, 2),
+                "ingest": ingest_stats,
+                "endpoint_recall": recall_stats,
+                "openapi": openapi["stats"] if openapi is not None else None
+            })
         
-        state.rag_chain = RunnableLambda(_map_inputs) | doc_chain
-        state.last_updated = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        except Exception as e:
+            logger.exception("Ingest job %s failed: %s", job.id, e)
+            # A generation that never went live (e.g. BM25 or the chain failed after the
+            # vectors were written) would otherwise be left behind as an orphan class
+            if client is not None and class_name and class_name != state.weaviate_index_name:
+                if await run_in_worker(drop_class, client, class_name):
+                    logger.info("Deleted unfinished generation %s", class_name)
+                delete_index(class_name)
+            job.fail(f"Failed to process documentation: {str(e)}")
+
+@router.post("/process", response_model=SuccessResponse)
+async def process_documentation(request: DocumentationRequest):
+    """Start processing API documentation in the background and return a job id."""
+    try:
+        job = create_job(request.title)
+        task = asyncio.create_task(_run_ingest_job(job, request))
+        _job_tasks.add(task)
+        task.add_done_callback(_job_tasks.discard)
         
-        print("✅ RAG system created successfully")
         return SuccessResponse(
-            message=f"Documentation processed successfully. Created {len(all_docs)} chunks and found {len(state.extracted_endpoints)} endpoints.",
+            message="Documentation processing started.",
             data={
-                "chunks": len(all_docs),
-                "endpoints": len(state.extracted_endpoints),
-                "db_size_mb": round(state.db_size_mb, 2)
+                "job_id": job.id,
+                "status_url": f"/docs/jobs/{job.id}"
             }
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process documentation: {str(e)}")
 
+@router.get("/jobs")
+async def get_ingest_jobs():
+    """List recent ingestion jobs, newest first."""
+    return list_jobs()
+
+@router.get("/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """Get stage, progress, chunk counts and timings for an ingestion job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
 @router.post("/clear", response_model=SuccessResponse)
 async def clear_documentation():
-    """Clear all processed documentation."""
+    """Clear all processed documentation.
+    Waits for a running ingest job, so the job cannot swap its index back in afterwards.
+    """
     try:
         import core.state as state
         
-        # Clear Weaviate database by deleting the class
-        if state.weaviate_client_instance and state.weaviate_index_name:
-            try:
-                # Delete the Weaviate class (this removes all data)
-                state.weaviate_client_instance.schema.delete_class(state.weaviate_index_name)
-                print(f"DEBUG: Deleted Weaviate class: {state.weaviate_index_name}")
-            except Exception as weaviate_error:
-                print(f"DEBUG: Error deleting Weaviate class: {weaviate_error}")
-                # Continue with state reset even if Weaviate deletion fails
-        
-        # Reset all state variables
-        state.vector_store = None
-        state.rag_chain = None
-        state.retriever = None
-        state.documents_count = 0
-        state.db_size_mb = 0.0
-        state.last_updated = None
-        state.weaviate_client_instance = None
-        state.weaviate_index_name = None
-        state.raw_document_text = ""
-        state.extracted_endpoints = []
-        state.detected_base_url = None
-        state.base_urls_detected = []
-        state.curl_examples_total_count = 0
+        async with _ingest_lock:
+            # Clear Weaviate database by deleting the class
+            if state.weaviate_client_instance and state.weaviate_index_name:
+                try:
+                    # Delete the Weaviate class (this removes all data)
+                    await run_in_worker(state.weaviate_client_instance.schema.delete_class, state.weaviate_index_name)
+                    logger.debug("Deleted Weaviate class: %s", state.weaviate_index_name)
+                except Exception as weaviate_error:
+                    logger.warning(f"Error deleting Weaviate class: {weaviate_error}")
+                    # Continue with state reset even if Weaviate deletion fails
+            elif isinstance(state.vector_store, LocalVectorStore):
+                state.vector_store.close()
+                await run_in_worker(delete_local_index, os.path.basename(state.vector_store.path))
+                logger.debug("Deleted local vector index: %s", state.vector_store.path)
+            if state.weaviate_index_name:
+                delete_index(state.weaviate_index_name)
+            
+            # Reset all state variables
+            state.vector_store = None
+            state.embeddings = None
+            state.rag_chain = None
+            state.retriever = None
+            state.documents_count = 0
+            state.db_size_mb = 0.0
+            state.last_updated = None
+            state.weaviate_client_instance = None
+            state.weaviate_index_name = None
+            state.raw_document_text = ""
+            state.extracted_endpoints = []
+            state.detected_base_url = None
+            state.base_urls_detected = []
+            state.curl_examples_total_count = 0
+            state.last_ingest_stats = None
+            state.endpoint_index = None
+            state.bm25_index = None
+            state.bump_version()
+            answer_cache.invalidate()
         
-        print("DEBUG: All state variables reset")
+        logger.debug("All state variables reset")
         
         return SuccessResponse(message="Documentation cleared successfully")
         
     except Exception as e:
-        print(f"DEBUG: Error in clear_documentation: {e}")
+        logger.warning(f"Error in clear_documentation: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to clear documentation: {str(e)}")
 
+# Rebuilt only when state or the cache/client counters change; unchanged polls get a 304
+_status_response = VersionedJSON()
+
+def _build_documentation_status(cache_stats: Dict[str, Any], clients: Dict[str, Any]) -> Dict[str, Any]:
+    import core.state as state
+    # Return the structure that matches what the frontend expects
+    return {
+        "is_ready": state.vector_store is not None and state.rag_chain is not None,
+        "documents_count": state.documents_count,
+        "db_size_mb": state.db_size_mb,
+        "last_updated": state.last_updated,
+        "vectorstore": {
+            "status": "ready" if state.vector_store is not None else "not_initialized",
+            "index_name": state.weaviate_index_name or WEAVIATE_INDEX_NAME,
+            "document_count": state.documents_count,
+            "db_size_mb": state.db_size_mb
+        },
+        "endpoints": {
+            "count": len(state.extracted_endpoints) if state.extracted_endpoints else 0,
+            "list": state.extracted_endpoints[:10] if state.extracted_endpoints else []  # Show first 10
+        },
+        "base_url": state.detected_base_url,
+        "curl_examples": state.curl_examples_total_count,
+        "embedding_cache": cache_stats,
+        "last_ingest": state.last_ingest_stats,
+        "clients": clients
+    }
+
 @router.get("/status")
-async def get_documentation_status():
-    """Get the status of processed documentation."""
+async def get_documentation_status(request: Request):
+    """Get the status of processed documentation (supports If-None-Match)."""
     try:
         import core.state as state
-        # Return the structure that matches what the frontend expects
-        return {
-            "is_ready": state.vector_store is not None and state.rag_chain is not None,
-            "documents_count": state.documents_count,
-            "db_size_mb": state.db_size_mb,
-            "last_updated": state.last_updated,
-            "vectorstore": {
-                "status": "ready" if state.vector_store is not None else "not_initialized",
-                "index_name": state.weaviate_index_name or WEAVIATE_INDEX_NAME,
-                "document_count": state.documents_count,
-                "db_size_mb": state.db_size_mb
-            },
-            "endpoints": {
-                "count": len(state.extracted_endpoints) if state.extracted_endpoints else 0,
-                "list": state.extracted_endpoints[:10] if state.extracted_endpoints else []  # Show first 10
-            },
-            "base_url": state.detected_base_url,
-            "curl_examples": state.curl_examples_total_count
-        }
+        cache_stats = get_cache_stats()
+        clients = client_stats()
+        return _status_response.respond(
+            request,
+            (state.version, cache_stats, clients),
+            lambda: _build_documentation_status(cache_stats, clients)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get status: {str(e)}")
 
@@ -697,7 +834,7 @@ async def docs_health():
 async def reload_documentation():
     """Manually reload existing documentation from Weaviate."""
     try:
-        print("🔄 Manual reload requested...")
+        logger.info("🔄 Manual reload requested...")
         success = await reload_existing_data()
         
         if success:
@@ -731,8 +868,8 @@ async def test_rag_system():
             }
         
         # Try a simple test query
-        test_result = state.rag_chain.invoke({
-            "question": "What is this documentation about?",
+        test_result = await state.rag_chain.ainvoke({
+            "input": "What is this documentation about?",
             "chat_history": ""
         })
         
@@ -751,320 +888,188 @@ async def test_rag_system():
             "error": str(e)
         }
 
-async def reload_existing_data():
-    """Reload existing data from Weaviate on application startup."""
+def _class_attributes(client, class_name: str, text_key: str = "page_content") -> List[str]:
+    """List the metadata properties of a Weaviate class (everything except the text key)."""
     try:
-        import core.state as state
-        from core.config import WEAVIATE_URL, WEAVIATE_INDEX_NAME
-        
-        print(f"DEBUG: Attempting to reload existing data from Weaviate...")
-        
-        # Check if Weaviate has any existing data
-        import weaviate as weaviate_client
-        
-        # Initialize Weaviate client
-        client = weaviate_client.Client(url=WEAVIATE_URL)
-        
-        # Check if any classes exist and have data
+        class_schema = client.schema.get(class_name)
+        return [p.get("name") for p in class_schema.get("properties", []) if p.get("name") and p.get("name") != text_key]
+    except Exception as e:
+        logger.warning(f"Could not read properties for class '{class_name}': {e}")
+        return []
+
+def _load_local_index() -> Optional[Dict[str, Any]]:
+    """Open the most recently written local index (memory-mapped, so this is near-instant).
+    Chunks live next to the vectors, so the catalog and the endpoint index are rebuilt in full.
+    Returns the state values to swap in, or None if there is no index with data.
+    """
+    names = list_local_indexes()
+    logger.debug("Found local vector indexes: %s", names)
+    if not names:
+        return None
+    embeddings = get_query_embeddings()
+    vector_store = LocalVectorStore(index_dir(names[0]), embeddings)
+    if not len(vector_store):
+        logger.debug("Local index '%s' is empty", names[0])
+        vector_store.close()
+        return None
+    
+    documents = vector_store.documents()
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    base_urls: List[str] = []
+    for doc in documents:
+        meta = doc.metadata
+        if meta.get("section") != "endpoint":
+            continue
+        key = f"{meta.get('http_method')} {meta.get('endpoint')}"
+        if meta.get("endpoint") and meta.get("http_method") and key not in endpoints:
+            summary_lines = doc.page_content.split("\n", 1)
+            endpoints[key] = {
+                "http_method": meta["http_method"],
+                "endpoint": meta["endpoint"],
+                "summary": summary_lines[1].strip() if len(summary_lines) > 1 else "",
+                "auth": "unknown",
+                "has_curl": False
+            }
+        if meta.get("base_url") and meta["base_url"] not in base_urls:
+            base_urls.append(meta["base_url"])
+    
+    return {
+        "weaviate_client_instance": None,
+        "weaviate_index_name": names[0],
+        "vector_store": vector_store,
+        "embeddings": embeddings,
+        "retriever": create_mmr_retriever(vector_store),
+        "rag_chain": build_rag_chain(),
+        "documents_count": len(vector_store),
+        "extracted_endpoints": list(endpoints.values()),
+        "detected_base_url": base_urls[0] if base_urls else None,
+        "base_urls_detected": base_urls,
+        "endpoint_index": build_endpoint_index(list(endpoints.values()), documents, base_urls),
+        "bm25_index": (load_index(names[0]) or build_and_save(documents, names[0])) if BM25_ENABLED else None,
+        "last_updated": "Reloaded from existing data",
+    }
+
+def _load_weaviate_index(client: Any) -> Optional[Dict[str, Any]]:
+    """Scan the Weaviate schema and open the newest generation that has data (older
+    generations and orphans of failed ingests are never read or counted).
+    Blocking (sync v3 client); returns the state values to swap in, or None.
+    """
+    import core.state as state
+    
+    schema = client.schema.get()
+    existing_classes = [cls.get("class") for cls in schema.get("classes", [])]
+    logger.debug("Found existing classes: %s", existing_classes)
+    
+    for class_name in sorted(existing_classes, key=generation_of, reverse=True):
         try:
-            schema = client.schema.get()
-            existing_classes = [cls.get("class") for cls in schema.get("classes", [])]
+            # Check whether this class has any objects
+            objects_response = client.query.get(class_name, ["page_content"]).with_limit(1).do()
+            objects = objects_response.get("data", {}).get("Get", {}).get(class_name, [])
             
-            print(f"DEBUG: Found existing classes: {existing_classes}")
+            logger.debug("Objects found in class '%s': %d", class_name, len(objects) if objects else 0)
             
-            # Look for classes with data and collect total counts
-            total_documents = 0
-            all_endpoints = []
-            primary_class = None
-            primary_vector_store = None
-            primary_retriever = None
+            if not objects:
+                continue
             
-            for class_name in existing_classes:
-                try:
-                    # Check how many objects exist in this class
-                    # First try with page_content field
-                    objects_response = client.query.get(class_name, ["page_content"]).with_limit(1).do()
-                    objects = objects_response.get("data", {}).get("Get", {}).get(class_name, [])
-                    
-                    print(f"DEBUG: Query response for class '{class_name}': {objects_response}")
-                    print(f"DEBUG: Objects found: {len(objects) if objects else 0}")
-                    
-                    if objects:
-                        print(f"DEBUG: Found class '{class_name}' with data, checking total count...")
-                        
-                        # Get total count of objects in this class
-                        total_objects_response = client.query.aggregate(class_name).with_meta_count().do()
-                        total_count = total_objects_response.get("data", {}).get("Aggregate", {}).get(class_name, [{}])[0].get("meta", {}).get("count", 0)
-                        total_documents += total_count
-                        
-                        print(f"DEBUG: Class '{class_name}' has {total_count} documents")
-                        
-                        # Use the first class with data as the primary one for vector store
-                        if primary_class is None:
-                            primary_class = class_name
-                            
-                            # Initialize embeddings
-                            from langchain_cohere import CohereEmbeddings
-                            embeddings = CohereEmbeddings(model="embed-english-v3.0")
-                            
-                            # Create vector store from existing data
-                            from langchain_community.vectorstores import Weaviate as WeaviateStore
-                            primary_vector_store = WeaviateStore(
-                                client=client,
-                                index_name=class_name,
-                                text_key="page_content",  # This should match the field in your data
-                                embedding=embeddings
-                            )
-                            
-                            # Create retriever
-                            primary_retriever = primary_vector_store.as_retriever(
-                                search_type="similarity",
-                                search_kwargs={"k": 50}
-                            )
-                        
-                        # Extract basic endpoint information from the documents
-                        try:
-                            # Get a sample of documents to extract endpoints
-                            sample_docs = client.query.get(class_name, ["page_content", "endpoint", "http_method"]).with_limit(100).do()
-                            sample_objects = sample_docs.get("data", {}).get("Get", {}).get(class_name, [])
-                            
-                            for obj in sample_objects:
-                                props = obj.get("properties", {})
-                                if props.get("endpoint") and props.get("http_method"):
-                                    all_endpoints.append({
-                                        "method": props.get("http_method"),
-                                        "path": props.get("endpoint"),
-                                        "summary": f"Endpoint from {class_name}",
-                                        "auth": "API Key",
-                                        "has_curl": True
-                                    })
-                            
-                        except Exception as endpoint_error:
-                            print(f"DEBUG: Could not extract endpoints from {class_name}: {endpoint_error}")
-                        
-                except Exception as class_error:
-                    print(f"DEBUG: Error checking class '{class_name}': {class_error}")
-                    continue
+            # Get total count of objects in this class
+            total_objects_response = client.query.aggregate(class_name).with_meta_count().do()
+            total_documents = total_objects_response.get("data", {}).get("Aggregate", {}).get(class_name, [{}])[0].get("meta", {}).get("count", 0)
+            logger.debug("Class '%s' has %s documents", class_name, total_documents)
             
-            if primary_class and primary_vector_store and primary_retriever:
-                print(f"DEBUG: Total documents found across all classes: {total_documents}")
-                print(f"DEBUG: Total endpoints extracted: {len(all_endpoints)}")
-                
-                # Create RAG chain
-                from langchain_core.prompts import ChatPromptTemplate
-                from langchain.chains.combine_documents import create_stuff_documents_chain
-                from langchain_anthropic import ChatAnthropic
-                
-                llm = ChatAnthropic(
-                    model="claude-3-5-haiku-20241022",
-                    anthropic_api_key=os.getenv("ANTHROPIC_API_KEY")
-                )
-                
-                # Read the structured prompt from file for reloaded data
-                with open("prompts/question_prompt.txt", "r", encoding="utf-8") as f:
-                    reloaded_prompt = f.read()
-
-                # Create the prompt template - no need to escape braces for create_stuff_documents_chain
-                
-                prompt = ChatPromptTemplate.from_template(reloaded_prompt)
-                
-                # Create the RAG chain with proper input mapping
-                rag_chain = create_stuff_documents_chain(llm, prompt)
-                
-                # Wrap the chain to handle the expected input format and include retrieval
-                from langchain.schema.runnable import RunnableLambda
-                
-                def _map_inputs_for_chain(inputs):
-                    """Map inputs to the expected format for the RAG chain with smart cURL generation."""
-                    question = inputs.get("input", inputs.get("question", ""))
-                    
-                    # SMART cURL GENERATION CHECK
-                    if "create" in question.lower() and "curl" in question.lower():
-                        print(f"DEBUG: Smart cURL generation detected in reloaded chain")
-                        try:
-                            # Get documents directly from Weaviate for cURL generation
-                            result = client.query.get(primary_class, ["page_content", "endpoint", "http_method", "title", "h1", "h2", "section_path"]).with_limit(20).do()
-                            
-                            if 'errors' in result:
-                                print(f"DEBUG: Weaviate query had errors for cURL generation: {result.get('errors')}")
-                                documents = []
-                            else:
-                                # Convert to Document objects
-                                from langchain_core.documents import Document
-                                documents = []
-                                get_data = result.get("data", {}).get("Get", {})
-                                if get_data:
-                                    available_classes = list(get_data.keys())
-                                    if available_classes:
-                                        actual_class = available_classes[0]
-                                        docs = get_data.get(actual_class, [])
-                                        for doc in docs:
-                                            # The fields are directly in the document, not in properties
-                                            content = doc.get("page_content", "")
-                                            if content:
-                                                documents.append(Document(
-                                                    page_content=content,
-                                                    metadata={
-                                                        "title": doc.get("h1", doc.get("title", "")),
-                                                        "endpoint": doc.get("endpoint", ""),
-                                                        "http_method": doc.get("http_method", ""),
-                                                        "section_path": doc.get("section_path", "")
-                                                    }
-                                                ))
-                            
-                            # Generate perfect cURL using the smart function
-                            curl_response = generate_perfect_curl(question, documents, None)
-                            if curl_response:
-                                print(f"DEBUG: Smart cURL generated successfully in reloaded chain")
-                                return {
-                                    "context": documents,
-                                    "input": question,
-                                    "curl_response": curl_response
-                                }
-                        except Exception as curl_error:
-                            print(f"DEBUG: Smart cURL generation failed in reloaded chain: {curl_error}")
-                    
-                    # NORMAL DOCUMENT RETRIEVAL
-                    try:
-                        print(f"DEBUG: Retrieving documents for question: {question}")
-                        
-                        # Get documents directly from Weaviate without using the retriever
-                        print(f"DEBUG: Querying Weaviate class: {primary_class}")
-                        
-                        # Try to get documents from the primary class
-                        try:
-                            # Query the primary class with the correct field names
-                            result = client.query.get(primary_class, ["page_content", "endpoint", "http_method", "title", "h1", "h2", "section_path"]).with_limit(50).do()
-                            print(f"DEBUG: Weaviate query result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
-                            
-                            if 'errors' in result:
-                                print(f"DEBUG: Weaviate query had errors: {result.get('errors')}")
-                                context = "Unable to retrieve documentation due to query error."
-                            else:
-                                # Get the first available class name from the Get results
-                                get_data = result.get("data", {}).get("Get", {})
-                                if get_data:
-                                    # Convert keys to list and get the first one
-                                    available_classes = list(get_data.keys())
-                                    if available_classes:
-                                        actual_class = available_classes[0]
-                                        docs = get_data.get(actual_class, [])
-                                        print(f"DEBUG: Using class '{actual_class}' for document retrieval")
-                                    else:
-                                        docs = []
-                                        print(f"DEBUG: No classes found in Get data")
-                                else:
-                                    docs = []
-                                    print(f"DEBUG: No Get data found in result")
-                                print(f"DEBUG: Raw docs from Weaviate: {len(docs) if docs else 0}")
-                                
-                                if docs:
-                                    # Convert to Document objects for context
-                                    from langchain_core.documents import Document
-                                    documents = []
-                                    for doc in docs:
-                                        # The fields are directly in the document, not in properties
-                                        # Use 'page_content' field which is the correct field name
-                                        content = doc.get("page_content", "")
-                                        if content and len(content.strip()) > 0:
-                                            documents.append(Document(
-                                                page_content=content,
-                                                metadata={
-                                                    "title": doc.get("h1", doc.get("title", "")),
-                                                    "endpoint": doc.get("endpoint", ""),
-                                                    "http_method": doc.get("http_method", ""),
-                                                    "section_path": doc.get("section_path", "")
-                                                }
-                                            ))
-                                        else:
-                                            print(f"DEBUG: Skipping document with empty content: {doc}")
-                                    
-                                    context = "\n\n".join([doc.page_content for doc in documents])
-                                    print(f"DEBUG: Successfully retrieved {len(documents)} documents for context")
-                                    print(f"DEBUG: Context length: {len(context)} characters")
-                                else:
-                                    context = "No relevant documentation found."
-                                    print(f"DEBUG: No documents found in Weaviate")
-                                
-                        except Exception as query_error:
-                            print(f"DEBUG: Error in Weaviate query: {query_error}")
-                            context = "Unable to retrieve documentation due to query error."
-                            
-                    except Exception as e:
-                        print(f"DEBUG: Error retrieving documents: {e}")
-                        context = "Unable to retrieve documentation."
-                    
-                    return {
-                        "context": documents,  # Pass documents list instead of string
-                        "input": question
+            # Same embeddings and vector-search setup as /docs/process
+            embeddings = get_query_embeddings()
+            vector_store = open_vector_store(client, class_name, embeddings, _class_attributes(client, class_name))
+        except Exception as class_error:
+            logger.warning(f"Error checking class '{class_name}': {class_error}")
+            continue
+        
+        # Rebuild the endpoint catalog from the per-endpoint documents written at ingest
+        all_endpoints: Dict[str, Dict[str, Any]] = {}
+        base_urls: List[str] = []
+        try:
+            endpoint_docs = (
+                client.query.get(class_name, ["page_content", "endpoint", "http_method", "base_url"])
+                .with_where({"path": ["section"], "operator": "Equal", "valueText": "endpoint"})
+                .with_limit(RELOAD_ENDPOINT_LIMIT)
+                .do()
+            )
+            endpoint_objects = endpoint_docs.get("data", {}).get("Get", {}).get(class_name, []) or []
+            
+            # GraphQL Get returns properties flat on each object
+            for obj in endpoint_objects:
+                key = f"{obj.get('http_method')} {obj.get('endpoint')}"
+                if obj.get("endpoint") and obj.get("http_method") and key not in all_endpoints:
+                    summary_lines = (obj.get("page_content") or "").split("\n", 1)
+                    all_endpoints[key] = {
+                        "http_method": obj["http_method"],
+                        "endpoint": obj["endpoint"],
+                        "summary": summary_lines[1].strip() if len(summary_lines) > 1 else "",
+                        "auth": "unknown",
+                        "has_curl": False
                     }
-                
-                # Create the base RAG chain first
-                base_rag_chain = create_stuff_documents_chain(llm, prompt)
-                
-                # Create a custom chain that handles cURL generation bypass for reloaded data
-                def _handle_curl_bypass_reloaded(x: Dict[str, Any]) -> Dict[str, Any]:
-                    """Handle cURL generation bypass when perfect cURL is generated in reloaded chain"""
-                    if "curl_response" in x:
-                        print(f"DEBUG: Bypassing LLM with perfect cURL response in reloaded chain")
-                        return x["curl_response"]
-                    else:
-                        # Normal flow - use the base LLM chain
-                        return base_rag_chain.invoke(x)
-                
-                # Create the final chain with cURL bypass capability
-                rag_chain = RunnableLambda(_map_inputs_for_chain) | RunnableLambda(_handle_curl_bypass_reloaded)
-                
-                # Test the chain to make sure it works
-                try:
-                    print("DEBUG: Testing reloaded RAG chain...")
-                    test_result = rag_chain.invoke({
-                        "input": "What is this documentation about?",
-                        "chat_history": ""
-                    })
-                    print(f"DEBUG: Chain test successful: {str(test_result)[:100]}...")
-                except Exception as test_error:
-                    print(f"DEBUG: Chain test failed: {test_error}")
-                    # Fallback to simple chain if complex one fails
-                    rag_chain = base_rag_chain
-                    print("DEBUG: Using fallback simple chain")
-                    
-                    # Test the fallback chain
-                    try:
-                        # Create a simple document for testing
-                        from langchain_core.documents import Document
-                        test_doc = Document(page_content="Template Service documentation", metadata={})
-                        test_result = rag_chain.invoke({
-                            "context": [test_doc],
-                            "input": "What is this documentation about?"
-                        })
-                        print(f"DEBUG: Fallback chain test successful: {str(test_result)[:100]}...")
-                    except Exception as fallback_error:
-                        print(f"DEBUG: Fallback chain test also failed: {fallback_error}")
-                
-                # Update state with combined data
-                state.vector_store = primary_vector_store
-                state.retriever = primary_retriever
-                state.rag_chain = rag_chain
-                state.weaviate_client_instance = client
-                state.weaviate_index_name = primary_class
-                state.documents_count = total_documents
-                state.last_updated = "Reloaded from existing data"
-                
-                if all_endpoints:
-                    state.extracted_endpoints = all_endpoints
-                
-                print(f"✅ Successfully reloaded {total_documents} documents from {len([c for c in existing_classes if c in ['Test_API_Documentation', 'API_Documentation', 'RAG_V1']])} classes")
-                return True
+                if obj.get("base_url") and obj["base_url"] not in base_urls:
+                    base_urls.append(obj["base_url"])
+        except Exception as endpoint_error:
+            logger.warning(f"Could not extract endpoints from {class_name}: {endpoint_error}")
+        logger.debug("Total endpoints extracted: %d", len(all_endpoints))
+        
+        # Chunks come back with the persisted BM25 index; without it the
+        # endpoint index only resolves templates
+        extracted_endpoints = list(all_endpoints.values()) if all_endpoints else state.extracted_endpoints
+        base_urls_detected = base_urls or state.base_urls_detected
+        bm25_index = load_index(class_name) if BM25_ENABLED else None
+        bm25_documents = bm25_index.documents if bm25_index is not None else None
+        return {
+            "vector_store": vector_store,
+            "embeddings": embeddings,
+            "retriever": create_mmr_retriever(vector_store),
+            "rag_chain": build_rag_chain(),
+            "weaviate_client_instance": client,
+            "weaviate_index_name": class_name,
+            "documents_count": total_documents,
+            "extracted_endpoints": extracted_endpoints,
+            "detected_base_url": base_urls[0] if base_urls else state.detected_base_url,
+            "base_urls_detected": base_urls_detected,
+            "bm25_index": bm25_index,
+            "endpoint_index": build_endpoint_index(extracted_endpoints, bm25_documents, base_urls_detected),
+            "last_updated": "Reloaded from existing data",
+        }
+    
+    logger.debug("No classes with data found")
+    return None
+
+async def reload_existing_data():
+    """Reload existing data from Weaviate (or the local index) on startup and via /docs/reload.
+    The reloaded index is wired through the same retriever and chain factory as a
+    freshly processed document, so cold-start answers match warm ones. All backend
+    I/O runs in the worker pool; the swap holds the ingest lock so a reload can
+    never replace a newer generation written by a concurrent ingest.
+    """
+    try:
+        import core.state as state
+        from core.config import WEAVIATE_URL
+        
+        async with _ingest_lock:
+            if VECTOR_BACKEND == "local":
+                values = await run_in_worker(_load_local_index)
             else:
-                print(f"DEBUG: No classes with data found")
-                
-        except Exception as schema_error:
-            print(f"DEBUG: Error checking Weaviate schema: {schema_error}")
+                logger.debug("Attempting to reload existing data from Weaviate...")
+                # Shared Weaviate client from the registry
+                client = await run_in_worker(get_weaviate_client, WEAVIATE_URL)
+                values = await run_in_worker(_load_weaviate_index, client)
+            if values is None:
+                return False
+            
+            # Swap in one step (no awaits from here on)
+            previous_store = state.vector_store
+            state.swap(values)
+            answer_cache.invalidate()
+            _close_replaced(previous_store, values["vector_store"])
+        
+        logger.info("✅ Successfully reloaded %d documents from '%s'", values["documents_count"], values["weaviate_index_name"])
+        return True
             
     except Exception as e:
-        print(f"DEBUG: Error in reload_existing_data: {e}")
-        import traceback
-        print(f"DEBUG: Full traceback: {traceback.format_exc()}")
+        logger.exception(f"Error in reload_existing_data: {e}")
         
     return False
@@ -1,8 +1,18 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
 from models.requests import MemoryRequest
 from models.responses import MemoryResponse, SuccessResponse
-from core.memory import get_memory_for_session, clear_memory_for_session, get_memory_status, clear_all_memories, get_all_memory_sessions
-from typing import List
+from core.memory import aget_memory_for_session, clear_memory_for_session, get_memory_status, clear_all_memories, get_all_memory_sessions, get_memory_store_stats, get_memory_totals, get_memory_version
+from core.concurrency import run_in_worker
+from utils.http_cache import VersionedJSON
+from utils.logger import get_logger
+from typing import List, Optional
+
+logger = get_logger(__name__)
+
+HEALTH_SESSIONS_LISTED = 100  # Session ids returned by /memory/health
+
+# Rebuilt only when the memory counters move; unchanged polls get a 304
+_health_response = VersionedJSON()
 
 router = APIRouter(prefix="/memory", tags=["memory"])
 
@@ -10,7 +20,7 @@ router = APIRouter(prefix="/memory", tags=["memory"])
 async def clear_memory(request: MemoryRequest):
     """Clear memory for a specific session."""
     try:
-        success = clear_memory_for_session(request.session_id)
+        success = await run_in_worker(clear_memory_for_session, request.session_id)
         if success:
             return SuccessResponse(message=f"Memory cleared for session {request.session_id}")
         else:
@@ -22,16 +32,16 @@ async def clear_memory(request: MemoryRequest):
 async def clear_all_memory():
     """Clear all session memories."""
     try:
-        count = clear_all_memories()
+        count = await run_in_worker(clear_all_memories)
         return SuccessResponse(message=f"Cleared {count} session memories")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear all memories: {str(e)}")
 
 @router.get("/status/{session_id}", response_model=MemoryResponse)
-async def get_memory_status_endpoint(session_id: str):
-    """Get memory status for a specific session."""
+async def get_memory_status_endpoint(session_id: str, offset: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
+    """Get memory status for a specific session (messages paged by offset/limit)."""
     try:
-        status = get_memory_status(session_id)
+        status = await run_in_worker(get_memory_status, session_id, offset, limit)
         return MemoryResponse(
             session_id=status["session_id"],
             message_count=status["message_count"],
@@ -41,10 +51,10 @@ async def get_memory_status_endpoint(session_id: str):
         raise HTTPException(status_code=500, detail=f"Failed to get memory status: {str(e)}")
 
 @router.get("/sessions", response_model=List[str])
-async def get_all_sessions():
-    """Get list of all active session IDs."""
+async def get_all_sessions(offset: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=10000)):
+    """Get a page of session IDs, most recently used first."""
     try:
-        return get_all_memory_sessions()
+        return await run_in_worker(get_all_memory_sessions, offset, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get sessions: {str(e)}")
 
@@ -52,20 +62,17 @@ async def get_all_sessions():
 async def test_memory(session_id: str):
     """Test memory functionality for a session."""
     try:
-        from core.memory import get_memory_for_session
-        
         # Get memory for session
-        memory = get_memory_for_session(session_id)
+        memory = await aget_memory_for_session(session_id)
         
         # Add a test message
         memory.chat_memory.add_user_message("Test user message")
         memory.chat_memory.add_ai_message("Test AI response")
         
         # Get status
-        from core.memory import get_memory_status
-        status = get_memory_status(session_id)
+        status = await run_in_worker(get_memory_status, session_id)
         
-        print(f"DEBUG: Memory test for session {session_id} - Status: {status}")
+        logger.debug("Memory test for session %s - Status: %s", session_id, status)
         
         return {
             "session_id": session_id,
@@ -74,26 +81,27 @@ async def test_memory(session_id: str):
             "message": f"Test message added to session {session_id}"
         }
     except Exception as e:
-        print(f"ERROR: Memory test failed: {e}")
+        logger.error(f"Memory test failed: {e}")
         raise HTTPException(status_code=500, detail=f"Memory test failed: {str(e)}")
 
+def _build_memory_health():
+    active_sessions, total_messages = get_memory_totals()
+    sessions = get_all_memory_sessions(0, HEALTH_SESSIONS_LISTED)
+    
+    return {
+        "status": "healthy",
+        "active_sessions": active_sessions,
+        "total_messages": total_messages,
+        "sessions": sessions,
+        "sessions_truncated": active_sessions > len(sessions),
+        "store": get_memory_store_stats()
+    }
+
 @router.get("/health")
-async def memory_health():
-    """Get memory system health status."""
+async def memory_health(request: Request):
+    """Get memory system health status (supports If-None-Match)."""
     try:
-        sessions = get_all_memory_sessions()
-        total_messages = 0
-        
-        for session_id in sessions:
-            status = get_memory_status(session_id)
-            total_messages += status["message_count"]
-        
-        return {
-            "status": "healthy",
-            "active_sessions": len(sessions),
-            "total_messages": total_messages,
-            "sessions": sessions
-        }
+        return _health_response.respond(request, get_memory_version(), _build_memory_health)
     except Exception as e:
         return {
             "status": "unhealthy",
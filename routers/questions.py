@@ -3,12 +3,144 @@ from models.requests import QuestionRequest
 from models.responses import StructuredResponse
 from core.state import is_ready, get_state
 from utils.helpers import parse_structured_response
-from langchain.memory import ConversationBufferMemory
-from typing import Dict, Any
+from core.answer_cache import answer_cache
+from core.catalog import answer_from_catalog, catalog_answer_text, get_catalog_stats
+from core.context_packer import get_packer_stats
+from core.bm25 import get_bm25_stats
+from core.rerank import get_rerank_stats
+from core.tracing import span
+from fastapi.responses import StreamingResponse
+from utils.helpers import AnswerTextStreamer
+from utils.logger import get_logger
+from typing import Any, AsyncIterator, Dict, List
 import json
+import time
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
+def _structure_answer(answer: str) -> Dict[str, Any]:
+    """Turn the raw LLM answer into StructuredResponse fields."""
+    # Parse the response directly (expects valid JSON per prompt). If the model
+    # accidentally returns JSON-as-string under the "answer" key, unwrap it.
+    structured_content = {}
+    
+    try:
+        # First try to parse the entire response as JSON
+        parsed = json.loads(answer) if isinstance(answer, str) else answer
+        logger.debug("Initial JSON parse successful: %s", type(parsed))
+        
+        if isinstance(parsed, dict):
+            # Check if the "answer" field contains a JSON string that needs unwrapping
+            if "answer" in parsed and isinstance(parsed["answer"], str):
+                inner = parsed["answer"].strip()
+                logger.debug("Found answer field with string, length: %d", len(inner))
+                logger.debug("Starts with {: %s, Ends with }: %s", inner.startswith("{"), inner.endswith("}"))
+                
+                if inner.startswith("{") and inner.endswith("}"):
+                    try:
+                        # Try to parse the inner JSON
+                        inner_parsed = json.loads(inner)
+                        if isinstance(inner_parsed, dict):
+                            logger.debug("Successfully unwrapped inner JSON")
+                            # Use the unwrapped JSON
+                            structured_content = inner_parsed
+                        else:
+                            logger.debug("Inner JSON is not a dict, using outer structure")
+                            structured_content = parsed
+                    except json.JSONDecodeError as e:
+                        logger.warning("Inner JSON parsing failed: %s", e)
+                        # If inner JSON is malformed, use the outer structure
+                        structured_content = parsed
+                else:
+                    logger.debug("Answer field doesn't look like JSON, using outer structure")
+                    structured_content = parsed
+            else:
+                logger.debug("No answer field or not a string, using parsed structure")
+                structured_content = parsed
+        else:
+            logger.debug("Parsed result is not a dict, wrapping as answer")
+            structured_content = {"answer": str(parsed)}
+            
+    except json.JSONDecodeError as e:
+        logger.warning("Initial JSON parsing failed: %s", e)
+        # If JSON parsing fails, wrap the raw text
+        structured_content = {
+            "answer": answer if isinstance(answer, str) else str(answer),
+            "description": "",
+            "endpoints": [],
+            "code_examples": None,
+            "links": []
+        }
+    
+    # Lazy %-args: multi-KB payloads are only rendered when DEBUG is enabled
+    logger.debug("Final structured_content: %s", structured_content)
+    
+    # Define allowed fields - only these will be returned
+    ALLOWED_FIELDS = ["answer", "description", "endpoints", "code_examples", "links"]
+    
+    # Check for additional fields and warn
+    additional_fields = [key for key in structured_content.keys() if key not in ALLOWED_FIELDS]
+    if additional_fields:
+        logger.warning("AI generated additional fields that will be filtered out: %s", additional_fields)
+    
+    # Filter to only allowed fields and ensure all required fields exist with proper defaults
+    structured_content = {
+        "answer": structured_content.get("answer", ""),
+        "description": structured_content.get("description", ""),
+        "endpoints": structured_content.get("endpoints", []),
+        "code_examples": structured_content.get("code_examples", None),
+        "links": structured_content.get("links", [])
+    }
+    
+    # Convert endpoints to EndpointInfo objects
+    endpoints = []
+    for endpoint_data in structured_content.get("endpoints", []):
+        if isinstance(endpoint_data, dict):
+            from models.responses import EndpointInfo
+            endpoints.append(EndpointInfo(
+                method=endpoint_data.get("method", ""),
+                url=endpoint_data.get("url", ""),
+                params=endpoint_data.get("params"),
+                response_example=endpoint_data.get("response_example")
+            ))
+    
+    # Convert code_examples to CodeExamples object
+    code_examples = None
+    if structured_content.get("code_examples"):
+        from models.responses import CodeExamples
+        code_examples = CodeExamples(
+            curl=structured_content["code_examples"].get("curl"),
+            python=structured_content["code_examples"].get("python"),
+            javascript=structured_content["code_examples"].get("javascript")
+        )
+    
+    return {
+        "answer": structured_content.get("answer", ""),
+        "description": structured_content.get("description", ""),
+        "endpoints": endpoints,
+        "code_examples": code_examples,
+        "links": structured_content.get("links", [])
+    }
+
+def _context_with_history(question: str, chat_history: List[Any]) -> Dict[str, str]:
+    """Build the chain input with the (token-limited) session chat history."""
+    if chat_history:
+        # TOKEN MANAGEMENT: Limit chat history to prevent token limit exceeded
+        max_history_messages = 5  # Keep only last 5 messages to save tokens
+        limited_history = chat_history[-max_history_messages:]
+        logger.debug("Using limited chat history: %d messages (from %d total)", len(limited_history), len(chat_history))
+        return {
+            "input": question,
+            "chat_history": "\n".join([f"{msg.type}: {msg.content}" for msg in limited_history])
+        }
+    logger.debug("No chat history available")
+    return {
+        "input": question,
+        "chat_history": ""
+    }
+
 @router.post("/ask", response_model=StructuredResponse)
 async def ask_question(request: QuestionRequest):
     """Ask a question about the processed documentation."""
@@ -42,42 +174,60 @@ async def ask_question(request: QuestionRequest):
             )
         
         # Get memory for this session using the session_id
-        from core.memory import get_memory_for_session
+        from core.memory import aget_memory_for_session
         session_id = request.session_id or "default"
-        memory = get_memory_for_session(session_id)
+        memory = await aget_memory_for_session(session_id)
         
         # Get chat history (last 10 messages)
         chat_history = memory.chat_memory.messages
-        print(f"DEBUG: session_id: {session_id}, chat_history count: {len(chat_history)}=================")
-        
-        # Prepare context with proper chat history
-        if chat_history:
-            # TOKEN MANAGEMENT: Limit chat history to prevent token limit exceeded
-            max_history_messages = 5  # Keep only last 5 messages to save tokens
-            limited_history = chat_history[-max_history_messages:]
-            context_with_history = {
-                "input": request.question,
-                "chat_history": "\n".join([f"{msg.type}: {msg.content}" for msg in limited_history])
-            }
-            print(f"DEBUG: Using limited chat history: {len(limited_history)} messages (from {len(chat_history)} total)")
-        else:
-            context_with_history = {
-                "input": request.question,
-                "chat_history": ""
-            }
-            print(f"DEBUG: No chat history available")
+        logger.debug("session_id: %s, chat_history count: %d", session_id, len(chat_history))
+        
+        # Catalog intents (list/count endpoints, base URLs) are answered from the
+        # extracted endpoint catalog, with full coverage and no retrieval or LLM call
+        with span("intent"):
+            catalog_answer = answer_from_catalog(request.question)
+        if catalog_answer is not None:
+            logger.debug("Answered from endpoint catalog")
+            with span("memory_write"):
+                memory.chat_memory.add_user_message(request.question)
+                memory.chat_memory.add_ai_message(catalog_answer_text(catalog_answer))
+            return StructuredResponse(**catalog_answer, memory_count=len(memory.chat_memory.messages))
+        
+        context_with_history = _context_with_history(request.question, chat_history)
         
-        print("DEBUG: About to invoke rag_chain...")
+        # Answer cache: only questions without chat history are cacheable, keyed by
+        # the active index and its version so corpus changes never serve stale answers
+        index_name = state.get("weaviate_index_name")
+        index_version = state.get("last_updated")
+        use_answer_cache = not chat_history
+        query_vector = None
+        if use_answer_cache:
+            if answer_cache.semantic_enabled and state.get("embeddings") is not None:
+                with span("embed"):
+                    query_vector = await state["embeddings"].aembed_query(request.question)
+            with span("answer_cache"):
+                cached = answer_cache.lookup(request.question, index_name, index_version, query_vector=query_vector)
+            if cached is not None:
+                logger.debug("Answer cache hit")
+                with span("memory_write"):
+                    memory.chat_memory.add_user_message(request.question)
+                    memory.chat_memory.add_ai_message(cached["raw_answer"])
+                return StructuredResponse(**cached["response"], memory_count=len(memory.chat_memory.messages))
+        
+        started = time.perf_counter()
+        logger.debug("About to invoke rag_chain...")
         try:
             # Add recursion depth protection
             import sys
             if sys.getrecursionlimit() < 1000:
                 sys.setrecursionlimit(1000)
             
-            result = rag_chain.invoke(context_with_history)
-            print(f"DEBUG: rag_chain.invoke returned: {result}=================")
+            # Async end to end: Cohere/Anthropic use their async clients and the
+            # sync-only Weaviate retriever runs in the bounded worker pool.
+            result = await rag_chain.ainvoke(context_with_history)
+            logger.debug("rag_chain.ainvoke returned: %s", result)
         except RecursionError as e:
-            print(f"DEBUG: Recursion error during rag_chain.invoke: {e}")
+            logger.warning("Recursion error during rag_chain.ainvoke: %s", e)
             return StructuredResponse(
                 short_answers=[],
                 descriptions=["The system encountered a recursion error. Please try again or contact support."],
@@ -88,7 +238,7 @@ async def ask_question(request: QuestionRequest):
                 memory_count=len(memory.chat_memory.messages)
             )
         except Exception as e:
-            print(f"DEBUG: Exception during rag_chain.invoke: {e}")
+            logger.warning("Exception during rag_chain.ainvoke: %s", e)
             raise
         
         # Robust answer extraction
@@ -110,126 +260,34 @@ async def ask_question(request: QuestionRequest):
         else:
             answer = str(result)
         
-        print(f"DEBUG: answer: {answer}=================")
-        print(f"DEBUG: answer type: {type(answer)}")
-        print(f"DEBUG: answer length: {len(answer) if isinstance(answer, str) else 'N/A'}")
-        print(f"DEBUG: answer starts with '{{': {answer.strip().startswith('{') if isinstance(answer, str) else False}")
-        print(f"DEBUG: answer ends with '}}': {answer.strip().endswith('}') if isinstance(answer, str) else False}")
+        logger.debug("Answer (%d chars): %s", len(answer), answer)
         
 
         
         # Save conversation in memory
-        memory.chat_memory.add_user_message(request.question)
-        memory.chat_memory.add_ai_message(answer)
-        print(f"DEBUG: Memory updated - User message: {request.question[:50]}..., AI message: {answer[:50]}...")
-        print(f"DEBUG: Memory count after update: {len(memory.chat_memory.messages)}")
+        with span("memory_write"):
+            memory.chat_memory.add_user_message(request.question)
+            memory.chat_memory.add_ai_message(answer)
+        logger.debug("Memory updated for session %s, %d messages", session_id, len(memory.chat_memory.messages))
         
-        # Parse the response directly (expects valid JSON per prompt). If the model
-        # accidentally returns JSON-as-string under the "answer" key, unwrap it.
-        structured_content = {}
+        with span("parse"):
+            structured = _structure_answer(answer)
         
-        try:
-            # First try to parse the entire response as JSON
-            parsed = json.loads(answer) if isinstance(answer, str) else answer
-            print(f"DEBUG: Initial JSON parse successful: {type(parsed)}")
-            
-            if isinstance(parsed, dict):
-                # Check if the "answer" field contains a JSON string that needs unwrapping
-                if "answer" in parsed and isinstance(parsed["answer"], str):
-                    inner = parsed["answer"].strip()
-                    print(f"DEBUG: Found answer field with string, length: {len(inner)}")
-                    print(f"DEBUG: Starts with {{: {inner.startswith('{')}, Ends with }}: {inner.endswith('}')}")
-                    
-                    if inner.startswith("{") and inner.endswith("}"):
-                        try:
-                            # Try to parse the inner JSON
-                            inner_parsed = json.loads(inner)
-                            if isinstance(inner_parsed, dict):
-                                print("DEBUG: Successfully unwrapped inner JSON")
-                                # Use the unwrapped JSON
-                                structured_content = inner_parsed
-                            else:
-                                print("DEBUG: Inner JSON is not a dict, using outer structure")
-                                structured_content = parsed
-                        except json.JSONDecodeError as e:
-                            print(f"DEBUG: Inner JSON parsing failed: {e}")
-                            # If inner JSON is malformed, use the outer structure
-                            structured_content = parsed
-                    else:
-                        print("DEBUG: Answer field doesn't look like JSON, using outer structure")
-                        structured_content = parsed
-                else:
-                    print("DEBUG: No answer field or not a string, using parsed structure")
-                    structured_content = parsed
-            else:
-                print("DEBUG: Parsed result is not a dict, wrapping as answer")
-                structured_content = {"answer": str(parsed)}
-                
-        except json.JSONDecodeError as e:
-            print(f"DEBUG: Initial JSON parsing failed: {e}")
-            # If JSON parsing fails, wrap the raw text
-            structured_content = {
-                "answer": answer if isinstance(answer, str) else str(answer),
-                "description": "",
-                "endpoints": [],
-                "code_examples": None,
-                "links": []
-            }
-        
-        print(f"DEBUG: Final structured_content: {structured_content}")
-        
-        # Define allowed fields - only these will be returned
-        ALLOWED_FIELDS = ["answer", "description", "endpoints", "code_examples", "links"]
-        
-        # Check for additional fields and warn
-        additional_fields = [key for key in structured_content.keys() if key not in ALLOWED_FIELDS]
-        if additional_fields:
-            print(f"WARNING: AI generated additional fields that will be filtered out: {additional_fields}")
-        
-        # Filter to only allowed fields and ensure all required fields exist with proper defaults
-        structured_content = {
-            "answer": structured_content.get("answer", ""),
-            "description": structured_content.get("description", ""),
-            "endpoints": structured_content.get("endpoints", []),
-            "code_examples": structured_content.get("code_examples", None),
-            "links": structured_content.get("links", [])
-        }
+        # Return the response
+        response = StructuredResponse(**structured, memory_count=len(memory.chat_memory.messages))
         
-        # Convert endpoints to EndpointInfo objects
-        endpoints = []
-        for endpoint_data in structured_content.get("endpoints", []):
-            if isinstance(endpoint_data, dict):
-                from models.responses import EndpointInfo
-                endpoints.append(EndpointInfo(
-                    method=endpoint_data.get("method", ""),
-                    url=endpoint_data.get("url", ""),
-                    params=endpoint_data.get("params"),
-                    response_example=endpoint_data.get("response_example")
-                ))
-        
-        # Convert code_examples to CodeExamples object
-        code_examples = None
-        if structured_content.get("code_examples"):
-            from models.responses import CodeExamples
-            code_examples = CodeExamples(
-                curl=structured_content["code_examples"].get("curl"),
-                python=structured_content["code_examples"].get("python"),
-                javascript=structured_content["code_examples"].get("javascript")
+        if use_answer_cache:
+            answer_cache.store(
+                request.question, index_name, index_version,
+                payload={"raw_answer": answer, "response": response.model_dump(exclude={"memory_count"})},
+                latency_ms=(time.perf_counter() - started) * 1000.0,
+                query_vector=query_vector
             )
-        
-        # Return the response
-        return StructuredResponse(
-            answer=structured_content.get("answer", ""),
-            description=structured_content.get("description", ""),
-            endpoints=endpoints,
-            code_examples=code_examples,
-            links=structured_content.get("links", []),
-            memory_count=len(memory.chat_memory.messages)
-        )
+        return response
     
     except Exception as e:
         error_message = f"Error processing question: {str(e)}"
-        print(f"DEBUG: {error_message}")
+        logger.error(error_message)
         return StructuredResponse(
             answer=f"Error: {error_message}",
             description="An error occurred while processing your question.",
@@ -238,3 +296,105 @@ async def ask_question(request: QuestionRequest):
             links=[],
             memory_count=0
         )
+
+def _sse(payload: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(payload)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Ask a question and stream the answer as server-sent events.
+    Events: {"data": text} while the answer streams, then {"structured": StructuredResponse},
+    {"memory_count": n} and finally {"data": "[END]"}.
+    """
+    async def _events() -> AsyncIterator[str]:
+        state = get_state()
+        rag_chain = state.get("rag_chain")
+        if not is_ready() or not rag_chain:
+            yield _sse({"data": "No documentation has been processed yet. Please upload documentation first."})
+            yield _sse({"data": "[END]"})
+            return
+        
+        from core.memory import aget_memory_for_session
+        session_id = request.session_id or "default"
+        memory = await aget_memory_for_session(session_id)
+        chat_history = memory.chat_memory.messages
+        context_with_history = _context_with_history(request.question, chat_history)
+        
+        # Same answer-cache rules as /ask: only questions without chat history
+        index_name = state.get("weaviate_index_name")
+        index_version = state.get("last_updated")
+        use_answer_cache = not chat_history
+        query_vector = None
+        try:
+            cached = None
+            with span("intent"):
+                catalog_answer = answer_from_catalog(request.question)
+            if catalog_answer is not None:
+                use_answer_cache = False
+            if use_answer_cache:
+                if answer_cache.semantic_enabled and state.get("embeddings") is not None:
+                    with span("embed"):
+                        query_vector = await state["embeddings"].aembed_query(request.question)
+                with span("answer_cache"):
+                    cached = answer_cache.lookup(request.question, index_name, index_version, query_vector=query_vector)
+            
+            started = time.perf_counter()
+            if catalog_answer is not None:
+                logger.debug("Answered from endpoint catalog (stream)")
+                answer = catalog_answer_text(catalog_answer)
+                structured_payload = StructuredResponse(**catalog_answer).model_dump(exclude={"memory_count"})
+                yield _sse({"data": AnswerTextStreamer().feed(answer)})
+            elif cached is not None:
+                logger.debug("Answer cache hit (stream)")
+                answer = cached["raw_answer"]
+                structured_payload = cached["response"]
+                yield _sse({"data": AnswerTextStreamer().feed(answer)})
+            else:
+                streamer = AnswerTextStreamer()
+                parts: List[str] = []
+                first_token_ms = None
+                async for chunk in rag_chain.astream(context_with_history):
+                    if not isinstance(chunk, str) or not chunk:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000.0
+                        logger.debug("First token after %.1f ms", first_token_ms)
+                    parts.append(chunk)
+                    text = streamer.feed(chunk)
+                    if text:
+                        yield _sse({"data": text})
+                answer = "".join(parts)
+                with span("parse"):
+                    structured_payload = StructuredResponse(**_structure_answer(answer)).model_dump(exclude={"memory_count"})
+            
+            # Save conversation in memory once the full answer is known
+            with span("memory_write"):
+                memory.chat_memory.add_user_message(request.question)
+                memory.chat_memory.add_ai_message(answer)
+            memory_count = len(memory.chat_memory.messages)
+            
+            if use_answer_cache and cached is None:
+                answer_cache.store(
+                    request.question, index_name, index_version,
+                    payload={"raw_answer": answer, "response": structured_payload},
+                    latency_ms=(time.perf_counter() - started) * 1000.0,
+                    query_vector=query_vector
+                )
+            
+            yield _sse({"structured": {**structured_payload, "memory_count": memory_count}})
+            yield _sse({"memory_count": memory_count})
+        except Exception as e:
+            logger.warning("Error streaming answer: %s", e)
+            yield _sse({"error": f"Error processing question: {str(e)}"})
+        yield _sse({"data": "[END]"})
+    
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache/stats")
+async def answer_cache_stats():
+    """Get answer-cache hit ratio and latency saved by cached answers, plus catalog, context-packing, BM25 and rerank counters."""
+    return {**answer_cache.stats(), "catalog": get_catalog_stats(), "context_packer": get_packer_stats(), "bm25": get_bm25_stats(), "rerank": get_rerank_stats()}
@@ -0,0 +1,64 @@
+"""
+Test setup: isolated, dependency-free backends.
+core.config reads the environment at import time, so this runs before any app module is imported.
+"""
+
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="rag-tests-")
+
+os.environ.update({
+    "VECTOR_BACKEND": "local",
+    "LOCAL_VECTOR_DIR": os.path.join(WORKDIR, "vector_index"),
+    "BM25_INDEX_DIR": os.path.join(WORKDIR, "bm25_index"),
+    "MEMORY_BACKEND": "memory",
+    "LOG_FILE": os.path.join(WORKDIR, "rag_assistant.log"),
+    "ANTHROPIC_API_KEY": "",
+    "COHERE_API_KEY": "",
+})
+sys.path.insert(0, ROOT)
+
+def _corpus() -> str:
+    from bench.bench_retrieval import CORPUS
+    parts = []
+    for path in CORPUS:
+        with open(os.path.join(ROOT, path), "r", encoding="utf-8") as f:
+            parts.append(f.read())
+    return "\n\n".join(parts)
+
+def _reset_state() -> None:
+    import core.state as state
+    if state.vector_store is not None:
+        state.vector_store.close()
+    state.swap({
+        "vector_store": None, "embeddings": None, "retriever": None, "rag_chain": None,
+        "weaviate_index_name": None, "bm25_index": None, "endpoint_index": None,
+        "extracted_endpoints": [], "detected_base_url": None, "base_urls_detected": [],
+        "documents_count": 0, "last_updated": None,
+    })
+
+@pytest.fixture
+def offline_models(monkeypatch):
+    """Deterministic hashing embeddings and a canned LLM in place of Cohere/Anthropic."""
+    import core.chains as chains
+    import routers.docs as docs_router
+    from bench.bench_retrieval import HashingEmbeddings, _fake_llm
+
+    embeddings = HashingEmbeddings(256)
+    monkeypatch.setattr(docs_router, "get_query_embeddings", lambda *args, **kwargs: embeddings)
+    monkeypatch.setattr(chains, "create_llm", lambda *args, **kwargs: _fake_llm(0))
+    return embeddings
+
+@pytest.fixture
+def corpus():
+    """The bench corpus as one document; serving state is reset afterwards."""
+    yield _corpus()
+    _reset_state()
+
+@pytest.fixture
+def reset_state():
+    return _reset_state
@@ -0,0 +1,21 @@
+"""Method filter of the catalog fast path."""
+
+import pytest
+
+from core.catalog import method_filter
+
+@pytest.mark.parametrize("question, expected", [
+    ("List all GET endpoints", ["GET"]),
+    ("list all get endpoints", ["GET"]),
+    ("Show delete routes", ["DELETE"]),
+    ("list POST and put apis", ["POST", "PUT"]),
+    ("show patch http endpoints", ["PATCH"]),
+    ("list all endpoints", []),
+    ("get all endpoints", []),
+    ("How do I get the list of endpoints", []),
+    # A method word away from the listed noun may be a verb: the LLM decides
+    ("list endpoints to delete a file", None),
+    ("which endpoints let me post a comment", None),
+])
+def test_method_filter(question, expected):
+    assert method_filter(question) == expected
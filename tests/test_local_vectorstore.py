@@ -0,0 +1,134 @@
+"""
+LocalVectorStore: add/search/filter, generations on disk, index deletion and closing replaced stores.
+Uses the bench's deterministic hashing embeddings, so no model is needed.
+"""
+
+import os
+
+import pytest
+from langchain_core.documents import Document
+
+from bench.bench_retrieval import HashingEmbeddings
+from core.local_vectorstore import (
+    LocalVectorStore, ingest_documents_local, delete_local_index, list_local_indexes, index_dir
+)
+
+TEXTS = [
+    "Upload a file with POST /file-storage/upload",
+    "Delete a file with DELETE /file-storage/file",
+    "List folders with GET /file-storage/folders",
+    "Rotate the api key with POST /auth/rotate",
+]
+METADATAS = [
+    {"source": "files", "http_method": "POST"},
+    {"source": "files", "http_method": "DELETE"},
+    {"source": "files", "http_method": "GET"},
+    {"source": "auth", "http_method": "POST"},
+]
+
+@pytest.fixture
+def embeddings():
+    return HashingEmbeddings(128)
+
+def _store(name, embeddings):
+    return LocalVectorStore.from_texts(TEXTS, embeddings, metadatas=METADATAS, index_name=name)
+
+def test_add_and_search(embeddings):
+    store = _store("add_search", embeddings)
+    assert len(store) == len(TEXTS)
+    assert store.similarity_search("delete a file", k=1)[0].page_content == TEXTS[1]
+    scored = store.similarity_search_with_score("rotate api key", k=2)
+    assert scored[0][0].page_content == TEXTS[3]
+    assert scored[0][1] >= scored[1][1]
+    mmr = store.max_marginal_relevance_search("file storage", k=3, fetch_k=4)
+    assert len({d.page_content for d in mmr}) == 3
+    store.close()
+
+def test_search_with_metadata_filter(embeddings):
+    store = _store("filter", embeddings)
+    posts = store.similarity_search("file", k=4, filter={"http_method": "POST"})
+    assert {d.page_content for d in posts} == {TEXTS[0], TEXTS[3]}
+    either = store.similarity_search("file", k=4, filter={"http_method": ["GET", "DELETE"]})
+    assert {d.page_content for d in either} == {TEXTS[1], TEXTS[2]}
+    assert store.similarity_search("file", k=4, filter={"source": "nope"}) == []
+    with pytest.raises(ValueError):
+        store.similarity_search("file", filter={"bad key": 1})
+    store.close()
+
+def test_reopen_generation(embeddings):
+    store = _store("reopen", embeddings)
+    generation = store.generation
+    reopened = LocalVectorStore(index_dir("reopen"), embeddings)
+    assert reopened.generation == generation
+    assert [d.page_content for d in reopened.documents()] == TEXTS
+    assert reopened.similarity_search("delete a file", k=1)[0].page_content == TEXTS[1]
+
+    # A write makes a new generation; a store opened earlier keeps its consistent view
+    store.add_texts(["Download a file with GET /file-storage/download"], [{"source": "files"}])
+    assert store.generation != generation
+    assert not os.path.isdir(generation)
+    assert len(reopened) == len(TEXTS)
+    latest = LocalVectorStore(index_dir("reopen"), embeddings)
+    assert latest.generation == store.generation
+    assert len(latest) == len(TEXTS) + 1
+    for s in (store, reopened, latest):
+        s.close()
+
+def test_ingest_reuses_unchanged_chunks(embeddings):
+    docs = lambda texts: [Document(page_content=t, metadata={"source": "doc", "chunk_index": i}) for i, t in enumerate(texts)]
+    store, stats = ingest_documents_local(embeddings, "ingest", docs(TEXTS[:3]))
+    assert stats["new_chunks"] == 3
+    store.close()
+
+    store, stats = ingest_documents_local(embeddings, "ingest", docs(TEXTS[3:] + TEXTS[:2]))
+    assert (stats["new_chunks"], stats["unchanged_chunks"], stats["deleted_chunks"]) == (1, 2, 1)
+    # The new generation rewrites the kept rows, and the stats say so
+    assert stats["copied_chunks"] == 2
+    # Kept chunks moved down one position; their stored chunk_index follows them
+    assert sorted((d.metadata["chunk_index"], d.page_content) for d in store.documents()) == list(enumerate(TEXTS[3:] + TEXTS[:2]))
+    generation = store.generation
+    store.close()
+
+    store, stats = ingest_documents_local(embeddings, "ingest", docs(TEXTS[3:] + TEXTS[:2]))
+    assert stats["new_chunks"] == 0 and stats["reindexed_chunks"] == 0 and stats["copied_chunks"] == 0
+    assert store.generation == generation
+    store.close()
+
+def test_delete_local_index(embeddings):
+    _store("doomed", embeddings).close()
+    assert "doomed" in list_local_indexes()
+    delete_local_index("doomed")
+    assert not os.path.exists(index_dir("doomed"))
+    assert "doomed" not in list_local_indexes()
+    assert len(LocalVectorStore(index_dir("doomed"), embeddings)) == 0
+
+def test_close_releases_store(embeddings):
+    store = _store("closed", embeddings)
+    store.close()
+    assert len(store) == 0
+    assert store.similarity_search("delete a file", k=1) == []
+    assert store.documents() == []
+
+def test_reingest_closes_replaced_store(offline_models, reset_state):
+    import asyncio
+    import core.state as state
+    import routers.docs as docs_router
+    from core.config import LOCAL_VECTOR_DIR
+    from core.jobs import create_job
+    from models.requests import DocumentationRequest
+
+    async def _ingest(content):
+        job = create_job("lifecycle")
+        await docs_router._run_ingest_job(job, DocumentationRequest(title="lifecycle", content=content))
+        assert job.status == "completed", job.error
+        return state.vector_store
+
+    first = asyncio.run(_ingest("\n\n".join(TEXTS)))
+    second = asyncio.run(_ingest("\n\n".join(TEXTS + ["Revoke a token with DELETE /auth/token"])))
+    assert second is not first and len(second) > 0
+    # The first generation's directory is gone; its store must not keep it mapped
+    assert first._conn is None and len(first) == 0
+    if os.path.exists("/proc/self/maps"):
+        with open("/proc/self/maps", "r", encoding="utf-8") as f:
+            assert not [line for line in f if LOCAL_VECTOR_DIR in line and "(deleted)" in line]
+    reset_state()
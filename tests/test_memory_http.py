@@ -0,0 +1,42 @@
+"""
+Memory routes over HTTP with the SQLite backend: sessions evicted from the
+hot cache are still listed and paged from the database.
+"""
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+@pytest.fixture
+def sqlite_sessions(monkeypatch, tmp_path):
+    import core.memory as memory
+    store = memory.SessionMemoryStore(max_sessions=2, ttl_seconds=0, backend=memory.SQLiteBackend(os.path.join(tmp_path, "memory.db")))
+    monkeypatch.setattr(memory, "session_store", store)
+    yield store
+    store.backend.close()
+
+def _run(scenario):
+    from app_new import app
+
+    async def _with_client():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await scenario(client)
+    return asyncio.run(_with_client())
+
+def test_evicted_sessions_page_from_sqlite(sqlite_sessions):
+    async def _scenario(client):
+        for session_id in ("s0", "s1", "s2"):
+            assert (await client.get(f"/memory/test/{session_id}")).status_code == 200
+        first = await client.get("/memory/status/s0", params={"offset": 1, "limit": 1})
+        sessions = await client.get("/memory/sessions")
+        return first.json(), sessions.json()
+
+    status, sessions = _run(_scenario)
+    # s0 fell out of the two-session hot cache; its page comes from SQLite
+    assert sqlite_sessions.get("s0") is None
+    assert status["message_count"] == 2
+    assert status["messages"] == [{"type": "ai", "content": "Test AI response"}]
+    assert sessions == ["s2", "s1", "s0"]
@@ -0,0 +1,49 @@
+"""
+A reloaded index must retrieve exactly what the freshly processed one did.
+Runs the real ingest job on the local backend with the bench's deterministic
+hashing embeddings, records the top-k for the golden questions, resets state,
+reloads from disk and compares.
+"""
+
+import asyncio
+import json
+from typing import Dict, List
+
+TOP_K = 8
+
+def _questions() -> List[str]:
+    from bench.bench_retrieval import GOLDEN_PATH
+    with open(GOLDEN_PATH, "r", encoding="utf-8") as f:
+        return [item["question"] for item in json.load(f)]
+
+async def _top_k(questions: List[str]) -> Dict[str, List[str]]:
+    import core.chains as chains
+    results = {}
+    for question in questions:
+        docs = chains._endpoint_index_documents(question) or await chains._retrieve(question)
+        results[question] = [doc.page_content for doc in docs[:TOP_K]]
+    return results
+
+def test_reloaded_index_matches_fresh_top_k(offline_models, corpus, reset_state):
+    import core.state as state
+    import routers.docs as docs_router
+    from core.jobs import create_job
+    from models.requests import DocumentationRequest
+
+    questions = _questions()
+
+    async def _scenario():
+        job = create_job("parity-corpus")
+        await docs_router._run_ingest_job(job, DocumentationRequest(title="parity-corpus", content=corpus))
+        assert job.status == "completed", job.error
+        fresh = await _top_k(questions)
+
+        reset_state()
+        assert await docs_router.reload_existing_data()
+        assert state.last_updated == "Reloaded from existing data"
+        return fresh, await _top_k(questions)
+
+    fresh, reloaded = asyncio.run(_scenario())
+    assert any(fresh.values())
+    for question in questions:
+        assert reloaded[question] == fresh[question], question
@@ -0,0 +1,61 @@
+"""
+/questions/ask reranks the fused candidates through the cached reranker:
+asking the same question twice sends one Cohere request and serves the
+second from the rerank cache.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+QUESTION = "How do I create a new customer?"
+
+class FakeCohere:
+    """Counts rerank calls and scores candidates in reverse order."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def rerank(self, model, query, documents, top_n):
+        self.calls += 1
+        results = [SimpleNamespace(index=i, relevance_score=float(i)) for i in range(len(documents))]
+        return SimpleNamespace(results=sorted(results, key=lambda r: r.relevance_score, reverse=True)[:top_n])
+
+def test_repeated_ask_hits_rerank_cache(monkeypatch, offline_models, corpus):
+    import core.chains as chains
+    import routers.docs as docs_router
+    from app_new import app
+    from core.answer_cache import answer_cache
+    from core.jobs import create_job
+    from core.rerank import reranker
+    from models.requests import DocumentationRequest
+
+    cohere = FakeCohere()
+    monkeypatch.setattr(chains, "COHERE_API_KEY", "test-key")
+    monkeypatch.setattr(chains, "get_cohere_client", lambda: cohere)
+    # RRF scores are often decisive on this corpus; force the rerank path
+    monkeypatch.setattr(reranker, "margin", 0.0)
+    reranker.clear()
+
+    async def _scenario():
+        job = create_job("rerank-corpus")
+        await docs_router._run_ingest_job(job, DocumentationRequest(title="rerank-corpus", content=corpus))
+        assert job.status == "completed", job.error
+
+        before = reranker.stats()
+        transport = httpx.ASGITransport(app=app)
+        responses = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for session_id in ("rerank-a", "rerank-b"):
+                # The answer cache would otherwise short-circuit the second ask before retrieval
+                answer_cache.invalidate()
+                responses.append(await client.post("/questions/ask", json={"question": QUESTION, "session_id": session_id}))
+        return before, reranker.stats(), responses
+
+    before, after, responses = asyncio.run(_scenario())
+    assert [r.status_code for r in responses] == [200, 200]
+    assert "rerank;dur=" in responses[0].headers["server-timing"]
+    assert cohere.calls == 1
+    assert after["requests"] - before["requests"] == 2
+    assert after["cache_hits"] - before["cache_hits"] == 1
@@ -0,0 +1,37 @@
+"""
+Polled status endpoints answer a matching If-None-Match with a bodyless 304
+and rebuild the body (new ETag) once their version key moves.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+async def _add_memory_message(client):
+    await client.get("/memory/test/etag-session")
+
+async def _change_documents_count(client):
+    import core.state as state
+    state.swap({"documents_count": state.documents_count + 1})
+
+@pytest.mark.parametrize("path, change", [
+    ("/memory/health", _add_memory_message),
+    ("/docs/status", _change_documents_count),
+])
+def test_unchanged_poll_gets_304(path, change):
+    from app_new import app
+
+    async def _scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = await client.get(path)
+            again = await client.get(path, headers={"If-None-Match": first.headers["etag"]})
+            await change(client)
+            changed = await client.get(path, headers={"If-None-Match": first.headers["etag"]})
+            return first, again, changed
+
+    first, again, changed = asyncio.run(_scenario())
+    assert first.status_code == 200 and first.headers["etag"]
+    assert again.status_code == 304 and again.content == b""
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
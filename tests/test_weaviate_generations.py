@@ -0,0 +1,142 @@
+"""
+Weaviate generation handling in the ingest job and reload, against an
+in-memory stand-in for the v3 client: a failed ingest deletes the generation
+it created, and reload serves (and counts) only the newest generation,
+scanning in the worker pool and swapping under the ingest lock.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+
+class FakeQuery:
+    def __init__(self, classes: Dict[str, int], class_name: str, aggregate: bool = False):
+        self.classes = classes
+        self.class_name = class_name
+        self.aggregate = aggregate
+        self.where: Optional[dict] = None
+
+    def with_limit(self, limit: int) -> "FakeQuery":
+        return self
+
+    def with_where(self, where: dict) -> "FakeQuery":
+        self.where = where
+        return self
+
+    def with_meta_count(self) -> "FakeQuery":
+        return self
+
+    def do(self) -> dict:
+        count = self.classes[self.class_name]
+        if self.aggregate:
+            return {"data": {"Aggregate": {self.class_name: [{"meta": {"count": count}}]}}}
+        objects = [] if self.where is not None or not count else [{"page_content": "chunk"}]
+        return {"data": {"Get": {self.class_name: objects}}}
+
+class FakeWeaviate:
+    """Just enough of weaviate.Client (v3) for the ingest job and reload; classes map to object counts."""
+
+    def __init__(self, classes: Dict[str, int]):
+        self.classes = dict(classes)
+        self.schema = SimpleNamespace(get=self._schema_get, exists=self.classes.__contains__, delete_class=self.classes.pop)
+        self.query = SimpleNamespace(
+            get=lambda name, fields: FakeQuery(self.classes, name),
+            aggregate=lambda name: FakeQuery(self.classes, name, aggregate=True),
+        )
+
+    def _schema_get(self, class_name: Optional[str] = None) -> dict:
+        if class_name is None:
+            return {"classes": [{"class": name} for name in self.classes]}
+        return {"class": class_name, "properties": [{"name": "page_content"}, {"name": "content_hash"}]}
+
+    def is_ready(self) -> bool:
+        return True
+
+def _store(name: str) -> SimpleNamespace:
+    return SimpleNamespace(name=name, as_retriever=lambda **kwargs: None, close=lambda: None)
+
+@pytest.fixture
+def weaviate_backend(monkeypatch, offline_models, reset_state):
+    import routers.docs as docs_router
+
+    def _install(client: FakeWeaviate) -> FakeWeaviate:
+        monkeypatch.setattr(docs_router, "VECTOR_BACKEND", "weaviate")
+        monkeypatch.setattr(docs_router, "get_weaviate_client", lambda url: client)
+        monkeypatch.setattr(docs_router, "open_vector_store", lambda client, name, embeddings, attributes: _store(name))
+        return client
+
+    yield _install
+    reset_state()
+
+def test_failed_ingest_deletes_its_generation(monkeypatch, weaviate_backend):
+    import core.state as state
+    import routers.docs as docs_router
+    from core.jobs import create_job
+    from models.requests import DocumentationRequest
+
+    client = weaviate_backend(FakeWeaviate({"Guide_G1000000000000000000": 3}))
+    state.swap({"weaviate_index_name": "Guide_G1000000000000000000"})
+    created: List[str] = []
+
+    def _ingest(client, embeddings, index_name, class_name, docs, on_progress=None):
+        client.classes[class_name] = len(docs)
+        created.append(class_name)
+        return _store(class_name), {"stored_count": len(docs), "new_chunks": len(docs), "unchanged_chunks": 0, "deleted_chunks": 0,
+                                    "copied_chunks": 0, "copy_ms": 0.0, "embed_ms": 0.0, "write_ms": 0.0, "chunks_per_s": 0.0}
+
+    def _bm25_fails(docs, name):
+        raise RuntimeError("disk full")
+
+    monkeypatch.setattr(docs_router, "ingest_documents", _ingest)
+    monkeypatch.setattr(docs_router, "build_and_save", _bm25_fails)
+    monkeypatch.setattr(docs_router, "BM25_ENABLED", True)
+
+    job = create_job("guide")
+    asyncio.run(docs_router._run_ingest_job(job, DocumentationRequest(title="guide", content="# Guide\n\nGET /v1/items lists items.")))
+
+    assert job.status == "failed"
+    assert len(created) == 1 and created[0] not in client.classes
+    assert list(client.classes) == ["Guide_G1000000000000000000"]
+    assert state.weaviate_index_name == "Guide_G1000000000000000000"
+
+def test_reload_serves_newest_generation_only(weaviate_backend):
+    import core.state as state
+    import routers.docs as docs_router
+
+    weaviate_backend(FakeWeaviate({
+        "Guide": 7,
+        "Guide_G1000000000000000000": 5,
+        "Guide_G3000000000000000000": 4,
+        "Other_G2000000000000000000": 6,
+        "Guide_G4000000000000000000": 0,
+    }))
+
+    assert asyncio.run(docs_router.reload_existing_data())
+    assert state.weaviate_index_name == "Guide_G3000000000000000000"
+    assert state.vector_store.name == "Guide_G3000000000000000000"
+    assert state.documents_count == 4
+
+def test_reload_scans_off_the_loop_and_waits_for_ingest(weaviate_backend):
+    import threading
+    import core.state as state
+    import routers.docs as docs_router
+
+    client = weaviate_backend(FakeWeaviate({"Guide_G1000000000000000000": 2}))
+    scanned_on = []
+    schema_get = client.schema.get
+    client.schema.get = lambda *args: scanned_on.append(threading.current_thread()) or schema_get(*args)
+
+    async def _scenario():
+        async with docs_router._ingest_lock:
+            reload = asyncio.create_task(docs_router.reload_existing_data())
+            await asyncio.sleep(0.05)
+            # An ingest holds the lock: the reload must not swap under it
+            assert not reload.done()
+            assert state.weaviate_index_name != "Guide_G1000000000000000000"
+        return await reload
+
+    assert asyncio.run(_scenario())
+    assert state.weaviate_index_name == "Guide_G1000000000000000000"
+    assert scanned_on and threading.main_thread() not in scanned_on
@@ -1,22 +1,7 @@
 import re
 import json
 from typing import Dict, Any, List, Optional
-
-def parse_explicit_endpoint(question: str) -> Optional[Dict[str, str]]:
-    """Parse patterns like 'GET /users/{id}' from the question."""
-    # First try explicit method + path pattern
-    import re
-    m = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+(/[^\s#]+)", question)
-    if m:
-        return {"http_method": m.group(1).upper(), "endpoint": m.group(2)}
-    
-    # Then try to extract just the method if no path is specified
-    # This helps with queries like "generate curl for PUT endpoints"
-    method_match = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\b", question)
-    if method_match:
-        return {"http_method": method_match.group(1).upper(), "endpoint": None}
-    
-    return None
+from utils.parser import parse_explicit_endpoint
 
 def detect_intent(question: str) -> str:
     """Simple intent detector: list_apis | get_payload | find_curl | generate_curl | count_apis | list_base_urls | comprehensive_list | other."""
@@ -51,7 +36,7 @@ def detect_intent(question: str) -> str:
             return "find_curl"
         # ambiguous mention of curl → generic
         return "other"
-    if any(sig in q for sig in ["how many apis", "count apis", "number of apis", "api count", "endpoint count"]):
+    if any(sig in q for sig in ["how many apis", "how many endpoints", "count apis", "count endpoints", "number of apis", "number of endpoints", "api count", "endpoint count"]):
         return "count_apis"
     if any(sig in q for sig in ["base url", "base urls", "list base urls", "api url", "api urls"]):
         return "list_base_urls"
@@ -89,6 +74,92 @@ def parse_structured_response(text: str) -> Dict[str, Any]:
             "links": []
         }
 
+_JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class AnswerTextStreamer:
+    """Incrementally pull readable text out of the streamed JSON answer.
+    Feed raw LLM chunks; get back the decoded characters of the top-level
+    "answer" and "description" string fields as soon as they arrive. Output that
+    does not start with '{' is passed through unchanged.
+    """
+
+    STREAMED_FIELDS = ("answer", "description")
+
+    def __init__(self):
+        self.mode: Optional[str] = None     # None until the first non-space char, then "json" | "raw"
+        self.depth = 0
+        self.in_string = False
+        self.is_key = False
+        self.escape: Optional[str] = None   # pending escape sequence after a backslash
+        self.high_surrogate = ""
+        self.key = ""
+        self.current_key: Optional[str] = None
+        self.streaming_field = False
+        self.needs_separator = False        # put a blank line between streamed fields
+        self.emitted = False
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for ch in chunk:
+            if self.mode is None:
+                if ch.isspace():
+                    continue
+                self.mode = "json" if ch == "{" else "raw"
+            if self.mode == "raw":
+                out.append(ch)
+            else:
+                self._feed_json_char(ch, out)
+        return "".join(out)
+
+    def _feed_json_char(self, ch: str, out: List[str]) -> None:
+        if self.in_string:
+            if self.escape is not None:
+                self.escape += ch
+                if self.escape[0] == "u" and len(self.escape) < 5:
+                    return
+                decoded = chr(int(self.escape[1:], 16)) if self.escape[0] == "u" else _JSON_ESCAPES.get(ch, ch)
+                self.escape = None
+                if "\ud800" <= decoded <= "\udbff":
+                    self.high_surrogate = decoded   # wait for the low half of the pair
+                    return
+                if self.high_surrogate and "\udc00" <= decoded <= "\udfff":
+                    decoded = (self.high_surrogate + decoded).encode("utf-16", "surrogatepass").decode("utf-16")
+                self.high_surrogate = ""
+                self._emit(decoded, out)
+            elif ch == "\\":
+                self.escape = ""
+            elif ch == '"':
+                self.in_string = False
+                if self.is_key:
+                    self.current_key = self.key
+                self.streaming_field = False
+            else:
+                self._emit(ch, out)
+            return
+        if ch == '"':
+            self.in_string = True
+            # Keys are strings at depth 1 that are not preceded by ':'
+            self.is_key = self.depth == 1 and self.current_key is None
+            self.key = ""
+            if not self.is_key and self.depth == 1 and self.current_key in self.STREAMED_FIELDS:
+                self.streaming_field = True
+                self.needs_separator = self.emitted
+        elif ch in "{[":
+            self.depth += 1
+        elif ch in "}]":
+            self.depth -= 1
+        elif ch == "," and self.depth == 1:
+            self.current_key = None
+
+    def _emit(self, text: str, out: List[str]) -> None:
+        if self.is_key:
+            self.key += text
+        elif self.streaming_field:
+            if self.needs_separator:
+                out.append("\n\n")
+                self.needs_separator = False
+            out.append(text)
+            self.emitted = True
 
 def _synthesize_curl(method: str, endpoint: str, example_body: Optional[str] = None, api_version: Optional[str] = None) -> str:
     """Synthesize a basic cURL command from method and endpoint."""
@@ -128,43 +199,6 @@ def _synthesize_curl(method: str, endpoint: str, example_body: Optional[str] = N
 
 
 
-def _llm_recall_endpoints_full(text: str, max_chars: int = 160000) -> List[Dict[str, Any]]:
-    """Use Claude to propose additional endpoints (method + path). Returns list of dicts.
-    We cap input size to avoid token limits.
-    """
-    try:
-        from core.config import ANTHROPIC_API_KEY, ANTHROPIC_MODEL
-        if not ANTHROPIC_API_KEY:
-            return []
-        
-        snippet = text[:max_chars]
-        from langchain_anthropic import ChatAnthropic
-        llm = ChatAnthropic(model=ANTHROPIC_MODEL, temperature=0, max_tokens=500)
-        prompt = (
-            "You are reading API docs. Extract unique endpoints explicitly mentioned.\n"
-            "Return STRICT JSON: {\n  \"endpoints\": [ { \"method\": \"GET|POST|...\", \"path\": \"/path\", \"summary\": \"...\" } ]\n}\n"
-            "Do not invent. Only include items that actually appear in the text.\n\nDOC:\n" + snippet
-        )
-        resp = llm.invoke(prompt)
-        text_response = getattr(resp, 'content', None) or (resp if isinstance(resp, str) else str(resp))
-        import re
-        m = re.search(r"\{[\s\S]*\}", text_response)
-        data = json.loads(m.group(0)) if m else json.loads(text_response)
-        items = data.get("endpoints") if isinstance(data, dict) else None
-        out: List[Dict[str, Any]] = []
-        if isinstance(items, list):
-            for it in items:
-                method = str(it.get("method", "")).upper().strip()
-                path = str(it.get("path", "")).strip()
-                summary = str(it.get("summary", "")).strip() if it.get("summary") else ""
-                if method in {"GET","POST","PUT","PATCH","DELETE","OPTIONS","HEAD"} and path:
-                    if not path.startswith('/') and not re.match(r"(?i)^https?://", path):
-                        path = "/" + path
-                    out.append({"http_method": method, "endpoint": path, "summary": summary})
-        return out
-    except Exception:
-        return []
-
 def _validate_endpoint_presence(text: str, method: str, endpoint: str) -> bool:
     """Validate that an endpoint actually exists in the text."""
     # Simple validation - check if method and endpoint appear together
@@ -227,34 +261,15 @@ def build_catalog_text(title: str, endpoints: List[Dict[str, Any]]) -> str:
     return "\n".join(lines)
 
 def attempt_parse_openapi(raw_text: str) -> List[Dict[str, Any]]:
-    """Try to parse OpenAPI/Swagger content to extract endpoints. Returns same shape as extract_endpoints_from_text.
-    Conservative: only acts if 'openapi:' or 'swagger:' keyword is present. Fallback returns empty list on failure.
+    """Try to parse OpenAPI/Swagger content (YAML or JSON) to extract endpoints. Returns same shape as extract_endpoints_from_text.
+    Conservative: only acts if a top-level 'openapi'/'swagger' key is present. Fallback returns empty list on failure.
     """
-    endpoints: List[Dict[str, Any]] = []
     try:
-        if 'openapi:' not in raw_text and 'swagger:' not in raw_text:
+        from core.openapi import load_spec, build_openapi_documents
+        loaded = load_spec(raw_text)
+        if loaded is None:
             return []
-        import yaml  # PyYAML
-        data = yaml.safe_load(raw_text)
-        paths = data.get('paths', {}) if isinstance(data, dict) else {}
-        for path, methods in paths.items():
-            if not isinstance(methods, dict):
-                continue
-            for method, info in methods.items():
-                method_upper = str(method).upper()
-                if method_upper not in {"GET","POST","PUT","PATCH","DELETE","OPTIONS","HEAD"}:
-                    continue
-                summary = (info or {}).get('summary') or ''
-                tags = (info or {}).get('tags') or []
-                endpoints.append({
-                    "http_method": method_upper,
-                    "endpoint": path,
-                    "summary": summary,
-                    "auth": "unknown",
-                    "has_curl": False,
-                    "tags": tags,
-                })
-        return endpoints
+        return build_openapi_documents(loaded[0], "")["catalog"]["extracted_endpoints"]
     except Exception:
         return []
 
@@ -0,0 +1,38 @@
+import hashlib
+import json
+from typing import Any, Callable, Dict, Optional
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+class VersionedJSON:
+    """Caches one endpoint's JSON body per version key and answers If-None-Match.
+
+    The body is only rebuilt (and its ETag only recomputed) when the key changes;
+    a poll whose If-None-Match still matches gets a bodyless 304.
+    """
+
+    def __init__(self):
+        self._key: Any = None
+        self._payload: bytes = b""
+        self._etag: str = ""
+        self.builds = 0
+        self.not_modified = 0
+
+    def respond(self, request: Request, key: Any, build: Callable[[], Dict[str, Any]]) -> Response:
+        if key != self._key or not self._etag:
+            self._payload = json.dumps(jsonable_encoder(build()), separators=(",", ":")).encode("utf-8")
+            self._etag = f'"{hashlib.sha1(self._payload).hexdigest()[:20]}"'
+            self._key = key
+            self.builds += 1
+        # no-cache: browsers may store the body but must revalidate, which sends If-None-Match
+        headers = {"ETag": self._etag, "Cache-Control": "no-cache"}
+        if _etag_matches(request.headers.get("if-none-match"), self._etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=self._payload, media_type="application/json", headers=headers)
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
@@ -1,43 +1,116 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import zlib
 from typing import Optional
+from core.config import LOG_LEVEL, LOG_FILE, LOG_QUEUE_SIZE, LOG_SAMPLE_RATE
 
-def setup_logger(name: str = "rag_assistant", level: int = logging.INFO) -> logging.Logger:
-    """Set up a logger with console and file handlers."""
+ROOT_LOGGER_NAME = "rag_assistant"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop sentinel waits for room instead of raising queue.Full."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+class RequestSamplingFilter(logging.Filter):
+    """Tags records with the request trace id and samples per-request chatter.
+    Records below WARNING logged inside a request are kept for LOG_SAMPLE_RATE of
+    requests (decided per trace id, so a sampled request keeps all its lines);
+    warnings, errors and records outside requests are always kept.
+    """
+
+    def __init__(self, sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        from core.tracing import current_trace_id
+        trace_id = current_trace_id()
+        record.trace_id = trace_id or "-"
+        if trace_id is None or record.levelno >= logging.WARNING or self.sample_rate >= 1.0:
+            return True
+        return (zlib.crc32(trace_id.encode("utf-8")) % 10000) < self.sample_rate * 10000
+
+def setup_logger(name: str = ROOT_LOGGER_NAME, level: Optional[int] = None) -> logging.Logger:
+    """Set up a logger whose console and file handlers run on a background listener thread.
+    Callers only enqueue records (QueueHandler); formatting and I/O happen off the request path.
+    """
+    global _listener, _queue_handler
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
+    logger.setLevel(level if level is not None else logging.getLevelName(LOG_LEVEL.upper()))
+
     # Avoid adding handlers multiple times
     if logger.handlers:
         return logger
-    
+
     # Create formatters
     console_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
     )
     file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+        '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(funcName)s:%(lineno)d - %(message)s'
     )
-    
+
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
-    
+    handlers = [console_handler]
+
     # File handler
     try:
-        file_handler = logging.FileHandler('rag_assistant.log')
-        file_handler.setLevel(level)
+        file_handler = logging.FileHandler(LOG_FILE)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
-        logger.warning(f"Could not create file handler: {e}")
-    
+        # Handled directly (not through the queue filter), so it needs its own trace_id for the formatter
+        record = logging.LogRecord(name, logging.WARNING, __file__, 0, "Could not create file handler: %s", (e,), None)
+        record.trace_id = "-"
+        console_handler.handle(record)
+
+    # Both handlers are fed from a bounded queue by one listener thread
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(RequestSamplingFilter())
+    logger.addHandler(_queue_handler)
+    _listener = _DrainingQueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
     return logger
 
-def get_logger(name: str = "rag_assistant") -> logging.Logger:
-    """Get a logger instance."""
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread (idempotent)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_dropped_records() -> int:
+    """Records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def get_logger(name: str = ROOT_LOGGER_NAME) -> logging.Logger:
+    """Get a logger instance under the configured rag_assistant logger."""
+    if name != ROOT_LOGGER_NAME and not name.startswith(ROOT_LOGGER_NAME + "."):
+        name = f"{ROOT_LOGGER_NAME}.{name}"
     return logging.getLogger(name)
 
 # Create default logger
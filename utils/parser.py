@@ -1,4 +1,5 @@
 import re
+from bisect import bisect_left, bisect_right
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
@@ -10,87 +11,163 @@ def _get_curl_code_fence_spans(text: str) -> List[Tuple[int, int]]:
             spans.append((m.start(), m.end()))
     return spans
 
-def _pos_in_spans(pos: int, spans: List[Tuple[int, int]]) -> bool:
-    """Check if position is inside any of the spans."""
-    for start, end in spans:
-        if start <= pos <= end:
-            return True
-    return False
+def _pos_in_spans(pos: int, spans: List[Tuple[int, int]], starts: Optional[List[int]] = None) -> bool:
+    """Check if position is inside any of the (sorted, non-overlapping) spans."""
+    starts = starts if starts is not None else [start for start, _ in spans]
+    i = bisect_right(starts, pos) - 1
+    return i >= 0 and pos <= spans[i][1]
+
+_HTTP_METHODS = r"(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)"
+# Tokenizer for the single pass: a cheap superset of method keywords that can start
+# any of the patterns below (all of them need a word boundary before the method and
+# whitespace or '*' after it). Each pattern is then tried anchored at the token.
+_METHOD_TOKEN = re.compile(r"(?i)\b[GPDOH](?:ET|OST|UT|ATCH|ELETE|PTIONS|EAD)(?=[\s*])")
+# Pattern A: Plain 'METHOD /path'
+_PATTERN_PLAIN = re.compile(r"(?i)\b" + _HTTP_METHODS + r"\s+(/[^\s`#]+)")
+# Pattern B: Markdown '**METHOD** `/path`'
+_PATTERN_MD = re.compile(r"(?is)\*\*\s*" + _HTTP_METHODS + r"\s*\*\*\s*`\s*(/[^`\s]+)\s*`")
+# Pattern C: 'METHOD path' where path lacks leading '/' but contains a slash, and is not a full URL
+_PATTERN_NO_SLASH = re.compile(r"(?i)\b" + _HTTP_METHODS + r"\s+([a-zA-Z][^\s`#]+/[^\s`#]+)")
+
+_WS_RUN = re.compile(r"\s*")
+_CURL_FENCE = re.compile(r"(?i)(?=(```\s*curl))")
+_CURL_WORD = re.compile(r"(?i)curl(?=\s)")
+_CURL_AT = re.compile(r"(?i)\s*curl\s")
+_AUTH_HINT = re.compile(r"(?i)(?=(authorization|bearer|oauth|api[-_ ]?key))")
+_HEADING_START = re.compile(r"(?m)^#")
+_HEADING_AT = re.compile(r"(?m)[#]{1,3}\s+.*$")
+
+WINDOW_BEFORE = 300
+WINDOW_AFTER = 500
+
+def _merge_windows(windows: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for a, b in sorted(windows):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+def _suffix_min(values: List[int]) -> List[int]:
+    result = list(values)
+    for i in range(len(result) - 2, -1, -1):
+        result[i] = min(result[i], result[i + 1])
+    return result
+
+class _WindowIndex:
+    """cURL/auth/heading positions inside the merged match windows, so overlapping
+    windows share one scan and each window is answered with bisects.
+    Semantics match searching text[a:b] with '(?im)```\\s*curl|^\\s*curl\\s',
+    '(?i)authorization|bearer|oauth|api[-_ ]?key' and '(?m)^[#]{1,3}\\s+.*$'.
+    """
+
+    def __init__(self, text: str, regions: List[Tuple[int, int]]):
+        self.text = text
+        # (start, end) of every occurrence; a window [a, b] contains one if start >= a and end <= b
+        fence_ends: List[int] = []
+        auth_ends: List[int] = []
+        line_ends: List[int] = []
+        self.fence_starts: List[int] = []
+        self.auth_starts: List[int] = []
+        self.curl_line_starts: List[int] = []
+        self.heading_starts: List[int] = []
+        for ra, rb in regions:
+            for m in _CURL_FENCE.finditer(text, ra, rb):
+                self.fence_starts.append(m.start(1))
+                fence_ends.append(m.end(1))
+            for m in _AUTH_HINT.finditer(text, ra, rb):
+                self.auth_starts.append(m.start(1))
+                auth_ends.append(m.end(1))
+            # '^\s*curl\s' can start at the latest line start that is only whitespace before 'curl'
+            for m in _CURL_WORD.finditer(text, ra, rb):
+                line_start = text.rfind("\n", 0, m.start()) + 1
+                if _WS_RUN.match(text, line_start).end() >= m.start():
+                    self.curl_line_starts.append(line_start)
+                    line_ends.append(m.end() + 1)
+            self.heading_starts.extend(m.start() for m in _HEADING_START.finditer(text, ra, rb))
+        self.fence_min_end = _suffix_min(fence_ends)
+        self.auth_min_end = _suffix_min(auth_ends)
+        # Line starts can precede the region; keep the list sorted for bisect
+        order = sorted(range(len(line_ends)), key=lambda i: self.curl_line_starts[i])
+        self.curl_line_starts = [self.curl_line_starts[i] for i in order]
+        self.curl_line_min_end = _suffix_min([line_ends[i] for i in order])
+
+    @staticmethod
+    def _contains(starts: List[int], min_ends: List[int], a: int, b: int) -> bool:
+        i = bisect_left(starts, a)
+        return i < len(starts) and min_ends[i] <= b
+
+    def has_curl(self, a: int, b: int) -> bool:
+        # '^' also matches at the start of the window itself
+        return (
+            self._contains(self.fence_starts, self.fence_min_end, a, b)
+            or self._contains(self.curl_line_starts, self.curl_line_min_end, a, b)
+            or _CURL_AT.match(self.text, a, b) is not None
+        )
+
+    def has_auth(self, a: int, b: int) -> bool:
+        return self._contains(self.auth_starts, self.auth_min_end, a, b)
+
+    def summary(self, a: int, b: int) -> str:
+        m = _HEADING_AT.match(self.text, a, b)
+        i = bisect_right(self.heading_starts, a)
+        while m is None and i < len(self.heading_starts) and self.heading_starts[i] < b:
+            m = _HEADING_AT.match(self.text, self.heading_starts[i], b)
+            i += 1
+        return m.group(0).lstrip('# ').strip() if m else ""
 
 def extract_endpoints_from_text(text: str) -> List[Dict[str, Any]]:
     """Extract endpoint candidates (supports Markdown like '**POST** `/path`' as well).
-    Returns list of dicts with http_method and endpoint.
+    Returns list of dicts with http_method and endpoint: plain matches first, then
+    Markdown, then slash-less paths, each in document order.
     """
-    endpoints: List[Dict[str, Any]] = []
-
     curl_spans = _get_curl_code_fence_spans(text)
-    # Pattern A: Plain 'METHOD /path'
-    pattern_plain = re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+(/[^\s`#]+)")
-    # Pattern B: Markdown '**METHOD** `/path`'
-    pattern_md = re.compile(r"(?is)\*\*\s*(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s*\*\*\s*`\s*(/[^`\s]+)\s*`")
-    # Pattern C: 'METHOD path' where path lacks leading '/' but contains a slash, and is not a full URL
-    pattern_no_slash = re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+([a-zA-Z][^\s`#]+/[^\s`#]+)")
-
-    for match in pattern_plain.finditer(text):
-        if _pos_in_spans(match.start(), curl_spans):
-            continue
-        method = match.group(1).upper()
-        path = match.group(2).strip()
-        window_start = max(0, match.start() - 300)
-        window_end = min(len(text), match.end() + 500)
-        window = text[window_start:window_end]
-        has_curl = bool(re.search(r"(?im)```\s*curl|^\s*curl\s", window))
-        auth = "bearer" if re.search(r"(?i)authorization|bearer|oauth|api[-_ ]?key", window) else "unknown"
-        summary_match = re.search(r"(?m)^[#]{1,3}\s+.*$", window)
-        summary = summary_match.group(0).lstrip('# ').strip() if summary_match else ""
-        endpoints.append({
-            "http_method": method,
-            "endpoint": path,
-            "summary": summary,
-            "auth": auth,
-            "has_curl": has_curl,
-        })
+    curl_span_starts = [start for start, _ in curl_spans]
+    matches: Dict[str, List[Tuple["re.Match[str]", str]]] = {"plain": [], "md": [], "no_slash": []}
+    # End of the last match per pattern, mirroring finditer's non-overlapping scan
+    last_end = {"plain": 0, "md": 0, "no_slash": 0}
 
-    for match in pattern_md.finditer(text):
-        if _pos_in_spans(match.start(), curl_spans):
-            continue
-        method = match.group(1).upper()
-        path = match.group(2).strip()
-        window_start = max(0, match.start() - 300)
-        window_end = min(len(text), match.end() + 500)
-        window = text[window_start:window_end]
-        has_curl = bool(re.search(r"(?im)```\s*curl|^\s*curl\s", window))
-        auth = "bearer" if re.search(r"(?i)authorization|bearer|oauth|api[-_ ]?key", window) else "unknown"
-        summary_match = re.search(r"(?m)^[#]{1,3}\s+.*$", window)
-        summary = summary_match.group(0).lstrip('# ').strip() if summary_match else ""
-        endpoints.append({
-            "http_method": method,
-            "endpoint": path,
-            "summary": summary,
-            "auth": auth,
-            "has_curl": has_curl,
-        })
+    def _accept(kind: str, match: "re.Match[str]", path: str) -> None:
+        last_end[kind] = match.end()
+        if not _pos_in_spans(match.start(), curl_spans, curl_span_starts):
+            matches[kind].append((match, path))
+
+    for token in _METHOD_TOKEN.finditer(text):
+        pos = token.start()
+        if pos >= last_end["plain"]:
+            m = _PATTERN_PLAIN.match(text, pos)
+            if m:
+                _accept("plain", m, m.group(2).strip())
+        if pos >= last_end["no_slash"]:
+            m = _PATTERN_NO_SLASH.match(text, pos)
+            if m:
+                _accept("no_slash", m, "/" + m.group(2).strip())  # Normalize to start with /
+        # Markdown matches start at the '**' before the method
+        md_start = pos
+        while md_start > 0 and text[md_start - 1].isspace():
+            md_start -= 1
+        md_start -= 2
+        if md_start >= last_end["md"] and text.startswith("**", md_start):
+            m = _PATTERN_MD.match(text, md_start)
+            if m:
+                _accept("md", m, m.group(2).strip())
 
-    for match in pattern_no_slash.finditer(text):
-        if _pos_in_spans(match.start(), curl_spans):
-            continue
-        method = match.group(1).upper()
-        path = "/" + match.group(2).strip()  # Normalize to start with /
-        window_start = max(0, match.start() - 300)
-        window_end = min(len(text), match.end() + 500)
-        window = text[window_start:window_end]
-        has_curl = bool(re.search(r"(?im)```\s*curl|^\s*curl\s", window))
-        auth = "bearer" if re.search(r"(?i)authorization|bearer|oauth|api[-_ ]?key", window) else "unknown"
-        summary_match = re.search(r"(?m)^[#]{1,3}\s+.*$", window)
-        summary = summary_match.group(0).lstrip('# ').strip() if summary_match else ""
+    ordered = matches["plain"] + matches["md"] + matches["no_slash"]
+    windows = [
+        (max(0, m.start() - WINDOW_BEFORE), min(len(text), m.end() + WINDOW_AFTER))
+        for m, _ in ordered
+    ]
+    index = _WindowIndex(text, _merge_windows(windows))
+    endpoints: List[Dict[str, Any]] = []
+    for (m, path), (a, b) in zip(ordered, windows):
         endpoints.append({
-            "http_method": method,
+            "http_method": m.group(1).upper(),
             "endpoint": path,
-            "summary": summary,
-            "auth": auth,
-            "has_curl": has_curl,
+            "summary": index.summary(a, b),
+            "auth": "bearer" if index.has_auth(a, b) else "unknown",
+            "has_curl": index.has_curl(a, b),
         })
-
     return endpoints
 
 def _extract_curl_blocks_from_text(text: str) -> List[Dict[str, Any]]:
@@ -148,16 +225,19 @@ def extract_all_base_urls(text: str) -> List[str]:
     
     return list(set(urls))  # Remove duplicates
 
+_EXPLICIT_ENDPOINT = re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+`?(/[^\s#`?]+)")
+_EXPLICIT_METHOD = re.compile(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\b")
+
 def parse_explicit_endpoint(question: str) -> Optional[Dict[str, str]]:
     """Parse patterns like 'GET /users/{id}' from the question."""
     # First try explicit method + path pattern
-    m = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\s+(/[^\s#]+)", question)
+    m = _EXPLICIT_ENDPOINT.search(question)
     if m:
-        return {"http_method": m.group(1).upper(), "endpoint": m.group(2)}
+        return {"http_method": m.group(1).upper(), "endpoint": m.group(2).rstrip(".,;:!)")}
     
     # Then try to extract just the method if no path is specified
     # This helps with queries like "generate curl for PUT endpoints"
-    method_match = re.search(r"(?im)\b(GET|POST|PUT|PATCH|DELETE|OPTIONS|HEAD)\b", question)
+    method_match = _EXPLICIT_METHOD.search(question)
     if method_match:
         return {"http_method": method_match.group(1).upper(), "endpoint": None}
     